@@ -1,7 +1,18 @@
 from flask import Flask
-from . import routes
 
-def create_app():
+def create_app(config: dict = None, **services):
+    """
+    Builds the web app. Services are constructed lazily on first use (see
+    app.container.Services); keyword arguments replace individual services,
+    e.g. create_app(report_service=stub) in tests.
+    """
+    from app import routes
+    from app.container import Services
+    from app.services import metrics
+
     app = Flask(__name__)
+    app.config.update(config or {})
+    app.extensions["services"] = Services(app.config, **services)
+    app.extensions["services"].register_metrics(metrics.REGISTRY)
     app.register_blueprint(routes.bp)
-    return app
\ No newline at end of file
+    return app
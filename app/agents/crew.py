@@ -1,20 +1,59 @@
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from crewai import Crew, Process, Task
 from app.agents.research_agent import ResearchAgent
 from app.agents.data_agent import DataAgent
 from app.agents.scoring_agent import ScoringAgent
 from app.agents.writer_agent import WriterAgent
+from app.services.data_adapter import create_adapter
+from app.services.data_service import DataService
+from app.services.score_service import ScoreService
 from ollama_llm import OllamaLLM
 
+def crew_mode(mode: str = None) -> str:
+    return mode or os.getenv("CREW_MODE", "parallel")
+
+class CrewAgents:
+    """
+    One set of crew agents, bound to a shared LLM client. Parallel mode only runs the
+    writer through an LLM, so only the writer is built; sequential mode builds all four.
+    """
+
+    def __init__(self, llm, mode: str = None):
+        sequential = crew_mode(mode) == "sequential"
+        self.research_agent = ResearchAgent(llm=llm) if sequential else None
+        self.data_agent = DataAgent(llm=llm) if sequential else None
+        self.scoring_agent = ScoringAgent(llm=llm) if sequential else None
+        self.writer_agent = WriterAgent(llm=llm)
+
 class TickerCrew:
-    def __init__(self, ticker: str):
+    def __init__(self, ticker: str, mode: str = None, data_service: DataService = None,
+                 score_service: ScoreService = None, agents: CrewAgents = None):
+        """
+        mode "parallel" (default, CREW_MODE) runs the dependency graph with deterministic
+        steps on the services; "sequential" runs all four agents one after another.
+        Pass prebuilt agents (see CrewRuntime) to skip building a new LLM client and agent set.
+        """
         self.ticker = ticker
-        llm = OllamaLLM()
-        self.research_agent = ResearchAgent(llm=llm)
-        self.data_agent = DataAgent(llm=llm)
-        self.scoring_agent = ScoringAgent(llm=llm)
-        self.writer_agent = WriterAgent(llm=llm)
+        self.mode = crew_mode(mode)
+        self.data_service = data_service
+        self.score_service = score_service or ScoreService()
+        agents = agents or CrewAgents(OllamaLLM(), self.mode)
+        self.research_agent = agents.research_agent
+        self.data_agent = agents.data_agent
+        self.scoring_agent = agents.scoring_agent
+        self.writer_agent = agents.writer_agent
 
     def run(self):
+        if self.mode == "sequential":
+            return self.run_sequential()
+        return self.run_parallel()
+
+    def run_sequential(self):
         # Define tasks for each agent.
         # For now, these are placeholders with simple descriptions.
         # They will be expanded later with tools and context.
@@ -52,4 +91,127 @@ class TickerCrew:
         )
 
         result = crew.kickoff()
-        return result
\ No newline at end of file
+        return result
+
+    def run_parallel(self) -> dict:
+        """
+        Runs the real dependency graph:
+
+            collect_profile ----+
+                                +--> compute_scores --> write_summary
+            collect_financials -+
+
+        Profile and financials (plus ratios and quote) are fetched concurrently by
+        DataService, scoring (F-Score, Value and Growth) calls ScoreService directly, and
+        only the writing step goes through an LLM agent. Returns the report, the summary and per-stage timings in ms.
+        """
+        timings = {}
+        start = time.perf_counter()
+        if self.data_service is None:
+            self.data_service = DataService(create_adapter())
+
+        report = self.data_service.get_full_report_data(self.ticker)
+        fetch_timings = (report or {}).get("timings", {})
+        timings["collect_profile"] = fetch_timings.get("profile")
+        timings["collect_financials"] = fetch_timings.get("financials")
+        timings["collect"] = round((time.perf_counter() - start) * 1000, 2)
+        if report is None:
+            timings["total"] = timings["collect"]
+            return {"ticker": self.ticker.upper(), "error": f"Data for ticker '{self.ticker}' not found.", "timings": timings}
+
+        stage = time.perf_counter()
+        score, metrics = self.score_service.calculate_piotroski_f_score(report.get("raw_financials") or {})
+        report["scores"]["piotroskiF"] = score
+        investor = self.score_service.calculate_investor_scores(report, piotroski=score)
+        report["scores"]["valueInvestor"] = investor["value"]["score"]
+        report["scores"]["growthInvestor"] = investor["growth"]["score"]
+        report["explain"]["value"] = investor["value"]["summary"]
+        report["explain"]["growth"] = investor["growth"]["summary"]
+        timings["compute_scores"] = round((time.perf_counter() - stage) * 1000, 2)
+
+        stage = time.perf_counter()
+        context = {
+            "company": report["company"],
+            "scores": report["scores"],
+            "score_notes": {"value": report["explain"]["value"], "growth": report["explain"]["growth"]},
+            "piotroski_metrics": metrics,
+            "fundamentals": report["fundamentals"],
+        }
+        write_summary_task = Task(
+            description=(
+                f"Write a neutral company bio and a terse cash-cow summary for {self.ticker} "
+                f"using only this data:\n{json.dumps(context, default=str)}"
+            ),
+            agent=self.writer_agent,
+            expected_output=f"A string containing the summary for {self.ticker}"
+        )
+        crew = Crew(agents=[self.writer_agent], tasks=[write_summary_task], process=Process.sequential, verbose=True)
+        summary = crew.kickoff()
+        timings["write_summary"] = round((time.perf_counter() - stage) * 1000, 2)
+        timings["total"] = round((time.perf_counter() - start) * 1000, 2)
+
+        return {"ticker": report["ticker"], "report": report, "summary": str(summary), "timings": timings}
+
+
+class CrewRuntime:
+    """
+    Long-lived crew runtime for batches. Builds one LLM client and `size` warm agent sets
+    once, then runs ticker tasks against them. Each run checks an agent set out of the pool,
+    so concurrent threads never share an agent; the services are shared by every run.
+    Setup cost and per-ticker time are reported separately by stats().
+    """
+
+    def __init__(self, size: int = None, mode: str = None, data_service: DataService = None,
+                 score_service: ScoreService = None):
+        self.size = size or int(os.getenv("CREW_POOL_SIZE", "4"))
+        self.mode = mode
+        self.data_service = data_service
+        self.score_service = score_service or ScoreService()
+        self._agents = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+        self._stats = {"setup_seconds": None, "runs": 0, "run_seconds_total": 0.0, "run_seconds_max": 0.0}
+
+    def start(self):
+        """Builds the LLM client, the agent pool and the shared services (idempotent)."""
+        with self._lock:
+            if self._started:
+                return
+            start = time.perf_counter()
+            llm = OllamaLLM()
+            for _ in range(self.size):
+                self._agents.put(CrewAgents(llm, self.mode))
+            if self.data_service is None:
+                self.data_service = DataService(create_adapter())
+            self._stats["setup_seconds"] = round(time.perf_counter() - start, 4)
+            self._started = True
+
+    def run(self, ticker: str):
+        """Runs one ticker on a pooled agent set; blocks while all sets are busy."""
+        self.start()
+        agents = self._agents.get()
+        start = time.perf_counter()
+        try:
+            crew = TickerCrew(ticker, mode=self.mode, data_service=self.data_service,
+                              score_service=self.score_service, agents=agents)
+            return crew.run()
+        finally:
+            self._agents.put(agents)
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._stats["runs"] += 1
+                self._stats["run_seconds_total"] += elapsed
+                self._stats["run_seconds_max"] = max(self._stats["run_seconds_max"], elapsed)
+
+    def run_many(self, tickers: list[str]) -> list:
+        """Runs tickers across the whole agent pool; results are in input order."""
+        self.start()
+        with ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="crew") as pool:
+            return list(pool.map(self.run, tickers))
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["run_seconds_avg"] = stats["run_seconds_total"] / stats["runs"] if stats["runs"] else 0.0
+        stats["pool_size"] = self.size
+        return stats
\ No newline at end of file
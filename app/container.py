@@ -0,0 +1,114 @@
+import threading
+
+class _lazy:
+    """Service built by the decorated method on first access, then stored on the instance."""
+
+    def __init__(self, build):
+        self.build = build
+        self.name = build.__name__
+
+    def __get__(self, services, owner):
+        if services is None:
+            return self
+        with services._lock:
+            if self.name not in services.__dict__:
+                services.__dict__[self.name] = self.build(services)
+            return services.__dict__[self.name]
+
+class Services:
+    """
+    The service graph of one app, kept in app.extensions["services"].
+
+    Every service is constructed on first access, and its module imported then too.
+    So create_app() needs no FMP_API_KEY and loads neither NumPy, Redis, WeasyPrint
+    nor the LLM stack until a request uses them. Built services are plain attributes:
+    tests (or create_app keyword arguments) can replace any of them.
+
+    `config` is the app config; DATA_PROVIDER there overrides the environment.
+    """
+
+    def __init__(self, config: dict = None, **overrides):
+        self.config = config or {}
+        self._lock = threading.RLock()
+        self.draining = False
+        self.__dict__.update(overrides)
+
+    def built(self, name: str) -> bool:
+        return name in self.__dict__
+
+    def shutdown(self):
+        """
+        Graceful stop (gunicorn's worker_exit hook): queued work is dropped and running
+        work finishes. Services that were never built are skipped. /ready already turned
+        503 when SIGTERM arrived (see gunicorn.conf.py).
+        """
+        self.draining = True
+        for name in ("job_queue", "report_service", "pdf_service", "news_service"):
+            service = self.__dict__.get(name)
+            if service is None or not hasattr(service, "shutdown"):
+                continue
+            try:
+                service.shutdown()
+            except Exception as e:
+                print(f"Error shutting down {name}: {e}")
+
+    @_lazy
+    def adapter(self):
+        from app.services.data_adapter import create_adapter
+        return create_adapter(self.config.get("DATA_PROVIDER"))
+
+    @_lazy
+    def data_service(self):
+        from app.services.data_service import DataService
+        return DataService(adapter=self.adapter)
+
+    @_lazy
+    def report_cache(self):
+        from app.services.cache_service import ReportCache
+        return ReportCache()
+
+    @_lazy
+    def news_service(self):
+        from app.services.news_service import NewsService
+        return NewsService()
+
+    @_lazy
+    def llm_service(self):
+        from app.services.llm_service import LLMService
+        return LLMService()
+
+    @_lazy
+    def score_service(self):
+        from app.services.score_service import ScoreService
+        return ScoreService()
+
+    @_lazy
+    def report_service(self):
+        from app.services.report_service import ReportService
+        return ReportService(self.data_service, self.score_service, self.llm_service, cache=self.report_cache,
+                             news_service=self.news_service)
+
+    @_lazy
+    def job_queue(self):
+        from app.services.job_service import JobQueue
+        # Resolved per job, so the report pipeline is only built once a job runs
+        return JobQueue(lambda ticker: self.report_service.get_full_report(ticker))
+
+    @_lazy
+    def pdf_service(self):
+        from app.services.pdf_service import PdfService
+        return PdfService()
+
+    def _collector(self, name: str, stats):
+        # Only services that requests already built are reported; a scrape never builds one
+        return lambda: stats(getattr(self, name)) if self.built(name) else {}
+
+    def register_metrics(self, registry):
+        """Exports queue and cache state of the built services as /metrics gauges."""
+        registry.add_collector("report_cache", self._collector("report_cache", lambda cache: cache.stats()))
+        registry.add_collector("llm_scheduler", self._collector("llm_service", lambda llm: llm.scheduler.stats()))
+        registry.add_collector("llm_cache", self._collector(
+            "llm_service", lambda llm: llm.cache.stats() if llm.cache is not None else {}))
+        registry.add_collector("jobs", self._collector("job_queue", lambda queue: queue.stats()))
+        registry.add_collector("news", self._collector("news_service", lambda news: {"stored_items": len(news.store)}))
+        registry.add_collector("pdf", self._collector("pdf_service", lambda pdf: pdf.stats()))
@@ -10,8 +10,8 @@ class Company(BaseModel):
 
 class Scores(BaseModel):
     piotroskiF: int
-    valueInvestor: int
-    growthInvestor: int
+    valueInvestor: Optional[int] # None: not enough peers or data to rank against
+    growthInvestor: Optional[int]
 
 class Explain(BaseModel):
     piotroski: str
@@ -1,27 +1,58 @@
-from flask import Blueprint, render_template, request, redirect, url_for, jsonify
-from app.services.data_service import DataService
-from app.services.fmp_adapter import FMPAdapter
+import concurrent.futures
+import io
+import json
+import os
+import re
+import time
+import zipfile
+from flask import Blueprint, Response, current_app, g, render_template, request, redirect, stream_with_context, url_for, jsonify
+from app import serialization
+from app.container import Services
+from app.services import metrics
+from app.services.job_service import QueueFullError
+from app.services.llm_scheduler import SchedulerBusyError
+from app.services.pdf_service import PdfUnavailableError
 
 bp = Blueprint('main', __name__)
 
-# Initialize the adapter and the service
-fmp_adapter = FMPAdapter()
-data_service = DataService(adapter=fmp_adapter)
+def _services() -> Services:
+    """The lazily built services of the current app (see create_app)."""
+    return current_app.extensions["services"]
+
+TICKER_RE = re.compile(r"^[A-Za-z0-9.\-]{1,10}$")
+MAX_BATCH_TICKERS = 1000
+MAX_PDF_BATCH_TICKERS = int(os.getenv("PDF_MAX_BATCH", "50"))
 
 def _generate_report_data(ticker: str) -> dict | None:
     """
     Helper function to encapsulate data generation.
     This makes the routes cleaner and easier to test by mocking this function.
+    Reports are served from the ticker+asOf cache when possible.
     """
     try:
-        # Corrected the method name from get_data to get_full_report_data
-        report_data = data_service.get_full_report_data(ticker)
+        report_data = _services().report_service.get_report(ticker)
         return report_data
     except Exception as e:
         # In a real app, you'd want to log this error.
         print(f"Error generating report data for {ticker}: {e}")
         return None
 
+@bp.before_app_request
+def _start_timing():
+    g.request_started = time.perf_counter()
+    metrics.begin_request()
+
+@bp.after_app_request
+def _record_timing(response):
+    """Records the request in the HTTP histogram and, with SERVER_TIMING on, adds the per-stage breakdown."""
+    elapsed = time.perf_counter() - g.pop("request_started", time.perf_counter())
+    timings = metrics.end_request()
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.HTTP_SECONDS.observe(elapsed, endpoint=endpoint, method=request.method, status=response.status_code)
+    if metrics.server_timing_enabled():
+        response.headers["Server-Timing"] = metrics.server_timing(timings, elapsed)
+    return response
+
 @bp.route('/', methods=['GET', 'POST'])
 def index():
     """Renders the main page with the ticker submission form."""
@@ -37,15 +68,217 @@ def report(ticker):
     """Renders the HTML report for a given ticker."""
     report_data = _generate_report_data(ticker)
     if report_data:
-        return render_template('report.html', report=report_data)
+        with metrics.span("render.html"):
+            return render_template('report.html', report=report_data)
     else:
         return render_template('error.html', error=f"Could not generate a report for ticker: {ticker}")
 
+@bp.route('/report/<ticker>.pdf')
+def report_pdf(ticker):
+    """Downloads the report as a PDF, rendered off the request thread and cached per ticker+asOf."""
+    report_data = _generate_report_data(ticker)
+    if not report_data:
+        return render_template('error.html', error=f"Could not generate a report for ticker: {ticker}"), 404
+    try:
+        with metrics.span("render.pdf"):
+            pdf = _services().pdf_service.render(report_data["ticker"], report_data["asOf"],
+                                     lambda: render_template('report_pdf.html', report=report_data))
+    except PdfUnavailableError as e:
+        return render_template('error.html', error=str(e)), 503
+    except Exception as e:
+        print(f"Error rendering PDF for {ticker}: {e}")
+        return render_template('error.html', error=f"Could not render the PDF for ticker: {ticker}"), 500
+    filename = f"{report_data['ticker']}-{report_data['asOf']}.pdf"
+    return Response(pdf, mimetype='application/pdf', headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
 @bp.route('/api/report/<ticker>', methods=['GET'])
 def api_report(ticker):
-    """API endpoint that returns the full report data as JSON."""
+    """
+    API endpoint that returns the report as JSON (the public schema only).
+    ?fields=scores,fundamentals.ratios limits the response to those fields.
+    """
+    fields = serialization.parse_fields(request.args.get('fields'))
     report_data = _generate_report_data(ticker)
     if report_data:
-        return jsonify(report_data)
+        with metrics.span("render.json"):
+            try:
+                payload = serialization.project(serialization.public_report(report_data), fields)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            return serialization.json_response(payload)
     else:
-        return jsonify({"error": f"Data for ticker '{ticker}' not found."}), 404
\ No newline at end of file
+        return jsonify({"error": f"Data for ticker '{ticker}' not found."}), 404
+
+def _parse_tickers(payload: dict) -> tuple[list[str], str | None]:
+    """Reads 'ticker' or 'tickers' from a JSON body. Returns (tickers, error message)."""
+    tickers = payload.get('tickers') or ([payload['ticker']] if payload.get('ticker') else [])
+    if not isinstance(tickers, list) or not tickers:
+        return [], "Provide a 'ticker' or a non-empty 'tickers' list."
+    if len(tickers) > MAX_BATCH_TICKERS:
+        return [], f"At most {MAX_BATCH_TICKERS} tickers per request."
+    invalid = [t for t in tickers if not isinstance(t, str) or not TICKER_RE.match(t)]
+    if invalid:
+        return [], f"Invalid tickers: {invalid}"
+    return tickers, None
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@bp.route('/api/report/<ticker>/explain', methods=['GET'])
+def api_report_explain(ticker):
+    """
+    Server-Sent Events stream of the LLM explanations for a report. Emits one event per
+    text fragment, named after the explain field it belongs to ("piotroski" for the bio,
+    "cashCow"), then a final "done" event. The numeric report is served separately.
+    """
+    report_data = _generate_report_data(ticker)
+    if not report_data:
+        return jsonify({"error": f"Data for ticker '{ticker}' not found."}), 404
+
+    def events():
+        import requests # loaded with the report pipeline anyway; keeps it out of startup
+        try:
+            for field, text in _services().report_service.stream_explanations(report_data):
+                yield _sse(field, {"text": text})
+        except (requests.exceptions.RequestException, SchedulerBusyError) as e:
+            print(f"Error streaming explanations for {ticker}: {e}")
+            yield _sse("error", {"error": "The language model is unavailable."})
+        yield _sse("done", {})
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(stream_with_context(events()), mimetype='text/event-stream', headers=headers)
+
+@bp.route('/api/reports', methods=['POST'])
+def api_reports():
+    """
+    Batch endpoint. Body: {"tickers": [...], "fields": "scores,..."} ("fields" optional,
+    as in ?fields=). Streams one NDJSON line per ticker as soon as its report is ready;
+    failures are emitted as {"ticker": ..., "error": ...} lines.
+    """
+    payload = request.get_json(silent=True) or {}
+    tickers, error = _parse_tickers(payload)
+    if error:
+        return jsonify({"error": error}), 400
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    fields = serialization.parse_fields(payload.get('fields') or request.args.get('fields'))
+    try:
+        serialization.validate_fields(fields)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    report_service = _services().report_service
+
+    def generate():
+        for ticker, report_data, exc in report_service.iter_reports(tickers):
+            if exc is not None:
+                print(f"Error generating report data for {ticker}: {exc}")
+                record = {"ticker": ticker, "error": f"Could not generate a report for ticker: {ticker}"}
+            elif report_data is None:
+                record = {"ticker": ticker, "error": f"Data for ticker '{ticker}' not found."}
+            else:
+                try:
+                    record = serialization.project(serialization.public_report(report_data), fields)
+                except ValueError as e:
+                    record = {"ticker": ticker, "error": str(e)}
+            yield record
+
+    return serialization.ndjson_response(stream_with_context(generate()))
+
+@bp.route('/api/reports/pdf', methods=['POST'])
+def api_reports_pdf():
+    """
+    Batch PDF export. Body: {"tickers": [...]} (at most PDF_MAX_BATCH). Reports are built
+    on the batch pool and each is handed to the PDF workers as soon as it is ready.
+    Returns a zip with one <TICKER>-<asOf>.pdf per ticker, plus errors.txt listing the
+    tickers that failed or did not render within PDF_TIMEOUT seconds.
+    """
+    services = _services()
+    pdf_service = services.pdf_service
+    if not pdf_service.available():
+        return jsonify({"error": "PDF export needs WeasyPrint, which is not installed."}), 503
+    tickers, error = _parse_tickers(request.get_json(silent=True) or {})
+    if not error and len(tickers) > MAX_PDF_BATCH_TICKERS:
+        error = f"At most {MAX_PDF_BATCH_TICKERS} tickers per PDF batch."
+    if error:
+        return jsonify({"error": error}), 400
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+
+    renders, errors = {}, {}
+    for ticker, report_data, exc in services.report_service.iter_reports(tickers):
+        if exc is not None or report_data is None:
+            errors[ticker] = "report not available"
+            continue
+        html = lambda report_data=report_data: render_template('report_pdf.html', report=report_data)
+        renders[f"{ticker}-{report_data['asOf']}.pdf"] = (ticker, pdf_service.submit(ticker, report_data["asOf"], html))
+
+    # One deadline for the whole batch, not pdf_service.timeout per render. Unfinished renders
+    # are left running: their futures may be shared with other requests for the same report.
+    done, _ = concurrent.futures.wait([future for _, future in renders.values()], timeout=pdf_service.timeout)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive: # PDFs are already compressed
+        for filename, (ticker, future) in renders.items():
+            if future not in done:
+                print(f"PDF for {ticker} not rendered within {pdf_service.timeout}s")
+                errors[ticker] = "PDF rendering timed out"
+                continue
+            try:
+                archive.writestr(filename, future.result())
+            except Exception as e:
+                print(f"Error rendering PDF for {ticker}: {e}")
+                errors[ticker] = "PDF rendering failed"
+        if errors:
+            archive.writestr("errors.txt", "".join(f"{ticker}: {message}\n" for ticker, message in sorted(errors.items())))
+    return Response(buffer.getvalue(), mimetype='application/zip',
+                    headers={"Content-Disposition": 'attachment; filename="reports.zip"'})
+
+@bp.route('/api/jobs', methods=['POST'])
+def create_job():
+    """
+    Queues report generation in the background.
+    Body: {"ticker": "AAPL"} or {"tickers": ["AAPL", "MSFT"]}. Returns 202 with the job to poll.
+    """
+    tickers, error = _parse_tickers(request.get_json(silent=True) or {})
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        job = _services().job_queue.submit(tickers)
+    except QueueFullError as e:
+        return jsonify({"error": str(e)}), 503
+    return jsonify(job.to_dict()), 202, {"Location": url_for('main.get_job', job_id=job.id)}
+
+@bp.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Returns the status of a queued job and the reports finished so far."""
+    job = _services().job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Job '{job_id}' not found."}), 404
+    data = job.to_dict()
+    data["results"] = {ticker: serialization.public_report(report) for ticker, report in data["results"].items()}
+    return serialization.json_response(data)
+
+@bp.route('/health', methods=['GET'])
+def health():
+    return jsonify({"status": "ok"})
+
+@bp.route('/ready', methods=['GET'])
+def ready():
+    """
+    Readiness probe. Builds the report pipeline on first call (so a new worker is warm
+    before it takes traffic) and answers 503 if that fails, e.g. without FMP_API_KEY,
+    or while the worker drains on shutdown.
+    """
+    services = _services()
+    if services.draining:
+        return jsonify({"status": "draining"}), 503
+    try:
+        services.report_service
+    except Exception as e:
+        print(f"Readiness check failed: {e}")
+        return jsonify({"status": "unavailable"}), 503
+    return jsonify({"status": "ready"})
+
+@bp.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Stage and request latency histograms plus cache, LLM queue and job gauges, in Prometheus text format."""
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
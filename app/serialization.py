@@ -0,0 +1,125 @@
+import gzip
+import json
+import os
+import zlib
+from functools import cache
+from typing import Iterable, Iterator
+
+from flask import Response, request
+
+try:
+    import orjson
+except ImportError: # Fast serializer is optional
+    orjson = None
+
+try:
+    import brotli
+except ImportError: # Brotli is optional; gzip is always available
+    brotli = None
+
+@cache
+def public_fields() -> tuple[str, ...]:
+    """
+    Top-level keys of the public report (the TRD schema). Anything else in the report
+    dict, e.g. raw_financials or timings, is an internal input and never serialized.
+    Read from the pydantic model on first use, so importing this module stays cheap.
+    """
+    from app.models.report import Report
+    return tuple(Report.model_fields)
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+
+def public_report(report: dict) -> dict:
+    return {key: report[key] for key in public_fields() if key in report}
+
+def parse_fields(value: str | None) -> list[str] | None:
+    """Splits a ?fields=a,b.c parameter; None or empty means every field."""
+    fields = [f.strip() for f in (value or "").split(",") if f.strip()]
+    return fields or None
+
+def validate_fields(fields: list[str] | None):
+    """Raises ValueError if a field does not start with a public top-level key."""
+    unknown = [f for f in fields or () if f.split(".")[0] not in public_fields()]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+def project(report: dict, fields: list[str] | None) -> dict:
+    """
+    Keeps only the dotted `fields` of a public report, e.g. ["scores", "fundamentals.ratios"],
+    plus "ticker" so records stay identifiable. Raises ValueError naming unknown fields.
+    """
+    if not fields:
+        return report
+    validate_fields(fields)
+    # Widest paths first, so "scores.pe" after "scores" is already covered
+    paths = sorted({tuple(f.split(".")) for f in fields}, key=len)
+
+    projected = {"ticker": report.get("ticker")}
+    included = set()
+    for path in paths:
+        if any(path[:i] in included for i in range(1, len(path))):
+            continue
+        source, target = report, projected
+        for i, part in enumerate(path):
+            if not isinstance(source, dict) or part not in source:
+                raise ValueError(f"Unknown fields: {'.'.join(path)}")
+            source = source[part]
+            if i < len(path) - 1:
+                target = target.setdefault(part, {})
+        target[path[-1]] = source
+        included.add(path)
+    return projected
+
+def dumps(data) -> bytes:
+    """Compact JSON bytes, through orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+def negotiate_encoding() -> str | None:
+    """Best compression the client accepts: br (if brotli is installed), then gzip."""
+    accept = request.accept_encodings
+    if brotli is not None and accept["br"]:
+        return "br"
+    if accept["gzip"]:
+        return "gzip"
+    return None
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=4)
+    return gzip.compress(body, compresslevel=5)
+
+def compress_stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """Compresses a streamed body, flushing after every chunk so records are not held back."""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=4)
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(5, zlib.DEFLATED, 16 + zlib.MAX_WBITS) # gzip container
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+def json_response(data, status: int = 200, headers: dict = None) -> Response:
+    """JSON response, compressed when the body is at least COMPRESS_MIN_BYTES and the client accepts it."""
+    body = dumps(data)
+    response = Response(body, status=status, mimetype="application/json", headers=headers)
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate_encoding() if len(body) >= COMPRESS_MIN_BYTES else None
+    if encoding:
+        response.set_data(compress(body, encoding))
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+def ndjson_response(records: Iterable) -> Response:
+    """Streams one JSON line per record, compressed on the fly when the client accepts it."""
+    lines = (dumps(record) + b"\n" for record in records)
+    encoding = negotiate_encoding()
+    response = Response(compress_stream(lines, encoding) if encoding else lines, mimetype="application/x-ndjson")
+    response.vary.add("Accept-Encoding")
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    return response
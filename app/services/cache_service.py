@@ -0,0 +1,171 @@
+import json
+import os
+import threading
+from concurrent.futures import Future
+from typing import Callable
+
+from cachetools import TTLCache
+
+try:
+    import redis
+except ImportError: # Redis tier is optional
+    redis = None
+
+class _CountingTTLCache(TTLCache):
+    """TTLCache that reports capacity evictions (not expirations) to a callback."""
+
+    def __init__(self, maxsize, ttl, on_evict: Callable[[], None]):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self._on_evict = on_evict
+
+    def popitem(self):
+        item = super().popitem()
+        self._on_evict()
+        return item
+
+class ReportCache:
+    """
+    Two-tier cache for serialized reports keyed by ticker+asOf.
+    A bounded in-process TTL/LRU tier sits in front of a shared Redis tier (CACHE_URL).
+    Concurrent misses for the same key are collapsed so each report is computed once.
+    Partial reports (report["partial"], some fetch missed its deadline) are never
+    stored, so one slow upstream call does not pin a degraded report for the TTL.
+    """
+
+    def __init__(self, url: str = None, maxsize: int = None, ttl: int = None, redis_client=None):
+        self.ttl = ttl or int(os.getenv("CACHE_TTL", "86400"))
+        maxsize = maxsize or int(os.getenv("CACHE_MAXSIZE", "512"))
+        self._lock = threading.Lock()
+        self._local = _CountingTTLCache(maxsize, self.ttl, self._count_eviction)
+        self._inflight: dict[str, Future] = {}
+        self._stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "redis_errors": 0,
+                       "partial_skipped": 0}
+
+        self.redis = redis_client
+        url = url or os.getenv("CACHE_URL")
+        if self.redis is None and url and redis is not None:
+            self.redis = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    @staticmethod
+    def key(ticker: str, as_of: str) -> str:
+        return f"report:{ticker.upper()}:{as_of}"
+
+    def _count_eviction(self):
+        # Called from TTLCache.__setitem__, i.e. with self._lock already held
+        self._stats["evictions"] += 1
+
+    def _redis_get(self, key: str) -> bytes | None:
+        if self.redis is None:
+            return None
+        try:
+            return self.redis.get(key)
+        except Exception as e:
+            self._stats["redis_errors"] += 1
+            print(f"Error reading report cache from Redis: {e}")
+            return None
+
+    def _redis_set(self, key: str, payload: bytes):
+        if self.redis is None:
+            return
+        try:
+            self.redis.set(key, payload, ex=self.ttl)
+        except Exception as e:
+            self._stats["redis_errors"] += 1
+            print(f"Error writing report cache to Redis: {e}")
+
+    def get(self, ticker: str, as_of: str) -> dict | None:
+        """Returns the cached report from either tier, or None."""
+        key = self.key(ticker, as_of)
+        with self._lock:
+            payload = self._local.get(key)
+            if payload is not None:
+                self._stats["local_hits"] += 1
+                return json.loads(payload)
+        payload = self._redis_get(key)
+        if payload is None:
+            return None
+        with self._lock:
+            self._stats["redis_hits"] += 1
+            self._local[key] = payload
+        return json.loads(payload)
+
+    def _cacheable(self, report: dict) -> bool:
+        if report.get("partial"):
+            with self._lock:
+                self._stats["partial_skipped"] += 1
+            return False
+        return True
+
+    def set(self, ticker: str, as_of: str, report: dict):
+        if not self._cacheable(report):
+            return
+        key = self.key(ticker, as_of)
+        payload = json.dumps(report).encode("utf-8")
+        with self._lock:
+            self._local[key] = payload
+        self._redis_set(key, payload)
+
+    def get_or_compute(self, ticker: str, as_of: str, compute: Callable[[], dict | None]) -> dict | None:
+        """
+        Returns the cached report, or calls compute() on a miss and caches its result.
+        Threads that miss on a key already being computed wait for that result instead.
+        None results (unknown ticker) and partial reports are returned but not cached.
+        """
+        key = self.key(ticker, as_of)
+        with self._lock:
+            payload = self._local.get(key)
+            if payload is not None:
+                self._stats["local_hits"] += 1
+                return json.loads(payload)
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+            else:
+                self._stats["coalesced"] += 1
+
+        if not owner:
+            payload = future.result()
+            return json.loads(payload) if payload is not None else None
+
+        try:
+            payload = self._redis_get(key)
+            if payload is not None:
+                with self._lock:
+                    self._stats["redis_hits"] += 1
+            else:
+                with self._lock:
+                    self._stats["misses"] += 1
+                report = compute()
+                if report is not None and not self._cacheable(report):
+                    future.set_result(json.dumps(report).encode("utf-8")) # waiters still share it
+                    return report
+                if report is not None:
+                    payload = json.dumps(report).encode("utf-8")
+                    self._redis_set(key, payload)
+            if payload is not None:
+                with self._lock:
+                    self._local[key] = payload
+            future.set_result(payload)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+        return json.loads(payload) if payload is not None else None
+
+    def clear(self):
+        """Drops the in-process tier; Redis entries expire on their own TTL."""
+        with self._lock:
+            self._local.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss/eviction counters plus the current size of the local tier."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["local_size"] = len(self._local)
+            stats["local_maxsize"] = self._local.maxsize
+        stats["redis_enabled"] = self.redis is not None
+        return stats
@@ -1,3 +1,5 @@
+import os
+
 class FundamentalsAdapter:
     def get_profile(self, ticker):
         raise NotImplementedError
@@ -9,4 +11,30 @@ class FundamentalsAdapter:
         raise NotImplementedError
 
     def get_ratios(self, ticker):
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    # Bulk variants return {ticker: data} with an entry ({} when unavailable) per
+    # requested ticker. Adapters backed by a multi-symbol endpoint override these.
+    def get_profiles_many(self, tickers):
+        return {ticker: self.get_profile(ticker) for ticker in tickers}
+
+    def get_prices_many(self, tickers):
+        return {ticker: self.get_prices(ticker) for ticker in tickers}
+
+def create_adapter(provider: str = None) -> FundamentalsAdapter:
+    """
+    Builds the adapter selected by DATA_PROVIDER: "fmp" (default, live API),
+    "store" (local FundamentalsStore at FUNDAMENTALS_STORE_PATH, fully offline) or
+    "fixture" (recorded FMP responses at FIXTURE_PATH, for benchmarks and load tests).
+    """
+    provider = (provider or os.getenv("DATA_PROVIDER", "fmp")).lower()
+    if provider == "fixture":
+        from app.services.fixture_adapter import FixtureAdapter
+        return FixtureAdapter()
+    if provider == "store":
+        from app.services.fundamentals_store import StoreAdapter
+        return StoreAdapter()
+    if provider == "fmp":
+        from app.services.fmp_adapter import FMPAdapter
+        return FMPAdapter()
+    raise ValueError(f"Unknown DATA_PROVIDER '{provider}'")
@@ -1,23 +1,107 @@
+import copy
 import datetime
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from app.services import metrics
 from app.services.data_adapter import FundamentalsAdapter
-from app.models.report import Report, Company, Scores, Explain, Fundamentals, FundamentalsTTM, Ratios, News
+
+def fcf_yield(fcf: float, market_cap: float) -> float:
+    """Free cash flow as a percentage of market cap (0 when the market cap is unknown)."""
+    return (fcf / market_cap) * 100 if market_cap else 0
 
 class DataService:
-    def __init__(self, adapter: FundamentalsAdapter):
+    # Adapter calls made for every report, in the order the sequential path runs them.
+    FETCHES = ("profile", "financials", "ratios", "prices")
+
+    def __init__(self, adapter: FundamentalsAdapter, max_workers: int = None, deadline: float = None):
+        """
+        max_workers > 1 fans the adapter calls out on a shared thread pool; 1 keeps the
+        sequential path. deadline is the per-report budget in seconds for the concurrent path.
+        """
         self.adapter = adapter
+        self.max_workers = max_workers if max_workers is not None else int(os.getenv("FETCH_WORKERS", "16"))
+        self.deadline = deadline if deadline is not None else float(os.getenv("FETCH_DEADLINE", "8"))
+        self._executor = None
+        if self.max_workers > 1:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="data-fetch")
 
-    def get_full_report_data(self, ticker: str) -> dict:
+    def _timed(self, name: str, ticker: str) -> tuple:
+        """Calls the adapter's get_<name>(ticker); returns (result, wall time in ms)."""
+        start = time.perf_counter()
+        with metrics.span(f"adapter.{name}"):
+            result = getattr(self.adapter, f"get_{name}")(ticker)
+        return result, round((time.perf_counter() - start) * 1000, 2)
+
+    def _fetch_sequential(self, ticker: str, timings: dict, prefetched: dict) -> dict | None:
+        results = dict(prefetched)
+        for name in self.FETCHES:
+            if name in prefetched:
+                continue
+            results[name], timings[name] = self._timed(name, ticker)
+            if name == "profile" and not results[name]:
+                return None
+        return results
+
+    def _fetch_concurrent(self, ticker: str, timings: dict, prefetched: dict) -> tuple[dict, set[str]] | None:
+        """
+        Submits every adapter call at once and waits at most self.deadline seconds.
+        Returns (results, names of the calls that missed the deadline); those are empty
+        dicts in results and None in timings. A missed call that finishes later only
+        completes its own future, so it cannot change the report.
+        """
+        started = time.monotonic()
+        futures = {name: metrics.submit(self._executor, self._timed, name, ticker)
+                   for name in self.FETCHES if name not in prefetched}
+
+        done, _ = wait([futures["profile"]], timeout=self.deadline)
+        if not done or not futures["profile"].result()[0]:
+            for future in futures.values():
+                future.cancel()
+            if not done:
+                print(f"Timed out fetching profile for {ticker}")
+            return None
+
+        remaining = max(0.0, self.deadline - (time.monotonic() - started))
+        wait(futures.values(), timeout=remaining)
+
+        results, missed = dict(prefetched), set()
+        for name, future in futures.items():
+            if future.done() and not future.cancelled():
+                results[name], timings[name] = future.result()
+            else:
+                future.cancel()
+                print(f"Timed out fetching {name} for {ticker}")
+                results[name] = {}
+                timings[name] = None
+                missed.add(name)
+        return results, missed
+
+    def get_full_report_data(self, ticker: str, financials: dict = None) -> dict:
         """
         Orchestrates calls to the adapter to fetch all necessary data
         and assemble it into a dictionary matching the Report model structure.
+        Statements the caller already fetched can be passed as `financials`.
+        Per-call wall times in milliseconds are returned under "timings"; "partial" is
+        True when a call missed the deadline and its section is empty.
         """
-        profile = self.adapter.get_profile(ticker)
-        if not profile:
+        timings = {}
+        missed = set()
+        prefetched = {"financials": financials} if financials is not None else {}
+        start = time.perf_counter()
+        if self._executor is not None:
+            fetched = self._fetch_concurrent(ticker, timings, prefetched)
+            results, missed = fetched if fetched is not None else (None, missed)
+        else:
+            results = self._fetch_sequential(ticker, timings, prefetched)
+        if results is None:
             return None # Ticker not found or error
+        timings["total"] = round((time.perf_counter() - start) * 1000, 2)
 
-        financials = self.adapter.get_financials(ticker)
-        ratios = self.adapter.get_ratios(ticker)
-        price_data = self.adapter.get_prices(ticker)
+        profile = results["profile"]
+        financials = results["financials"] or {}
+        ratios = results["ratios"] or {}
+        price_data = results["prices"] or {}
 
         # For now, we will use placeholder data for scores and explanations,
         # as the ScoreService and LLMService will fill these in later.
@@ -34,7 +118,6 @@ class DataService:
         fcf = ocf - capex
 
         market_cap = price_data.get('marketCap', 0)
-        fcf_yield = (fcf / market_cap) * 100 if market_cap else 0
 
         report_data = {
             "ticker": ticker.upper(),
@@ -77,7 +160,7 @@ class DataService:
                     "pe": ratios.get('peRatioTTM', 0),
                     "pb": ratios.get('priceToBookRatioTTM', 0),
                     "evEbit": ratios.get('enterpriseValueOverEBITDATTM', 0), # Using EV/EBITDA as proxy
-                    "fcfYield": fcf_yield,
+                    "fcfYield": fcf_yield(fcf, market_cap),
                     "roa": ratios.get('returnOnAssetsTTM', 0),
                     "roe": ratios.get('returnOnEquityTTM', 0),
                     "grossMargin": ratios.get('grossProfitMarginTTM', 0),
@@ -85,7 +168,31 @@ class DataService:
                 },
             },
             "news": [], # Placeholder, to be filled by NewsService
-            "raw_financials": financials # Pass raw data for scoring service
+            "raw_financials": financials, # Pass raw data for scoring service
+            "timings": timings,
+            "partial": bool(missed),
         }
 
-        return report_data
\ No newline at end of file
+        return report_data
+
+    @staticmethod
+    def reprice(report: dict, price_data: dict, previous: dict) -> dict:
+        """
+        Copy of a report with its price-dependent fields moved from the `previous` quote
+        to `price_data`, without refetching statements or ratios: fcfYield is recomputed
+        and P/E, P/B and EV/EBITDA scale with market cap (or price). Scaling EV with the
+        equity value ignores its debt part, which only moves when statements do.
+        """
+        report = copy.deepcopy(report)
+        ttm = report["fundamentals"]["ttm"]
+        ratios = report["fundamentals"]["ratios"]
+        for field in ("marketCap", "price"):
+            if price_data.get(field) and previous.get(field):
+                scale = price_data[field] / previous[field]
+                for key in ("pe", "pb", "evEbit"):
+                    ratios[key] = ratios[key] * scale
+                break
+        ratios["fcfYield"] = fcf_yield(ttm["freeCashFlow"], price_data.get('marketCap', 0))
+        ttm["sharesDiluted"] = price_data.get('sharesOutstanding', 0)
+        report["asOf"] = datetime.date.today().isoformat()
+        return report
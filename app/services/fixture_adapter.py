@@ -0,0 +1,129 @@
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+import requests
+
+from app.services.fmp_adapter import FMPAdapter
+from app.services.response_cache import ResponseCache
+
+DEFAULT_FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "tests", "fixtures", "fmp")
+
+class FixtureResponse:
+    """The subset of requests.Response that FMPAdapter._get reads."""
+
+    def __init__(self, data, status_code: int = 200, headers: dict = None):
+        self._data = data
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} injected error")
+
+    def json(self):
+        return self._data
+
+class FixtureAdapter(FMPAdapter):
+    """
+    FMPAdapter that replays recorded responses from `<path>/<SYMBOL>.json` files
+    ({"profile": [...], "quote": [...], "income-statement": [...], ...}) instead of
+    calling the API. Everything above the HTTP call (response cache, bulk endpoints,
+    parallel statements) is the real FMPAdapter code.
+
+    latency (FIXTURE_LATENCY_MS) and jitter (FIXTURE_JITTER_MS) delay each response;
+    error_rate (FIXTURE_ERROR_RATE, 0-1) makes that share of calls fail with a 503.
+    Unknown symbols answer with an empty list, as FMP does.
+    """
+
+    def __init__(self, path: str = None, latency: float = None, jitter: float = None, error_rate: float = None,
+                 seed: int = None, max_workers: int = None, cache: ResponseCache = None):
+        super().__init__(api_key="fixture", max_workers=max_workers, cache=cache)
+        self.path = path or os.getenv("FIXTURE_PATH", DEFAULT_FIXTURE_PATH)
+        self.latency = (latency if latency is not None else float(os.getenv("FIXTURE_LATENCY_MS", "0"))) / 1000
+        self.jitter = (jitter if jitter is not None else float(os.getenv("FIXTURE_JITTER_MS", "0"))) / 1000
+        self.error_rate = error_rate if error_rate is not None else float(os.getenv("FIXTURE_ERROR_RATE", "0"))
+        self._random = random.Random(seed if seed is not None else os.getenv("FIXTURE_SEED"))
+        self._random_lock = threading.Lock()
+        self._fixtures: dict[str, dict] = {}
+        for name in os.listdir(self.path):
+            if name.endswith(".json"):
+                with open(os.path.join(self.path, name), encoding="utf-8") as f:
+                    self._fixtures[name[:-5].upper()] = json.load(f)
+        self.calls = 0
+
+    def tickers(self) -> list[str]:
+        return sorted(self._fixtures)
+
+    def _request(self, path: str, params: dict, headers: dict):
+        with self._random_lock:
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            failed = self._random.random() < self.error_rate
+            self.calls += 1
+        if delay:
+            time.sleep(delay)
+        if failed:
+            return FixtureResponse({}, status_code=503)
+
+        endpoint, _, symbols = path.strip("/").rpartition("/")
+        rows = []
+        for symbol in symbols.split(","):
+            rows.extend(self._fixtures.get(symbol.upper(), {}).get(endpoint, []))
+        return FixtureResponse(rows)
+
+class RecordingAdapter(FMPAdapter):
+    """FMPAdapter that saves every live response it receives in the FixtureAdapter layout."""
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def _request(self, path: str, params: dict, headers: dict):
+        # Never send validators: a 304 has no body to record
+        response = super()._request(path, params, {})
+        endpoint, _, symbols = path.strip("/").rpartition("/")
+        if response.status_code == 200 and "," not in symbols:
+            data = response.json()
+            if isinstance(data, list):
+                self._save(symbols.upper(), endpoint, data)
+        return response
+
+    def _save(self, symbol: str, endpoint: str, data: list):
+        file = os.path.join(self.path, f"{symbol}.json")
+        with self._lock:
+            fixture = {}
+            if os.path.exists(file):
+                with open(file, encoding="utf-8") as f:
+                    fixture = json.load(f)
+            fixture[endpoint] = data
+            with open(file, "w", encoding="utf-8") as f:
+                json.dump(fixture, f, indent=1, sort_keys=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m app.services.fixture_adapter",
+        description="Record live FMP responses as fixtures for DATA_PROVIDER=fixture.",
+    )
+    parser.add_argument("tickers", nargs="+")
+    parser.add_argument("--out", default=os.getenv("FIXTURE_PATH", DEFAULT_FIXTURE_PATH))
+    args = parser.parse_args(argv)
+
+    adapter = RecordingAdapter(args.out)
+    for ticker in args.tickers:
+        if not adapter.get_profile(ticker):
+            print(f"No profile for {ticker}; skipped")
+            continue
+        adapter.get_financials(ticker)
+        adapter.get_ratios(ticker)
+        adapter.get_prices(ticker)
+        print(f"Recorded {ticker.upper()}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
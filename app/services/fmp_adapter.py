@@ -1,32 +1,109 @@
 import os
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from app.services import http_client, metrics
 from app.services.data_adapter import FundamentalsAdapter
+from app.services.response_cache import ResponseCache
 
 class FMPAdapter(FundamentalsAdapter):
-    def __init__(self, api_key: str = None):
+    STATEMENTS = {
+        "income_statement": "/income-statement",
+        "balance_sheet": "/balance-sheet-statement",
+        "cash_flow_statement": "/cash-flow-statement",
+    }
+
+    # Seconds each endpoint class stays fresh, keyed by the first path segment.
+    # Annual statements and profiles barely move; quotes and TTM ratios move intraday.
+    CACHE_TTLS = {
+        "income-statement": 86400,
+        "balance-sheet-statement": 86400,
+        "cash-flow-statement": 86400,
+        "profile": 86400,
+        "ratios-ttm": 300,
+        "quote": 60,
+    }
+
+    # Symbols per request for the comma-separated /quote and /profile endpoints
+    BULK_CHUNK_SIZE = 100
+
+    def __init__(self, api_key: str = None, max_workers: int = None, cache: ResponseCache = None):
         self.api_key = api_key or os.getenv("FMP_API_KEY")
         if not self.api_key:
             raise ValueError("FMP_API_KEY is required for the FMPAdapter.")
         self.base_url = "https://financialmodelingprep.com/api/v3"
+        max_workers = max_workers if max_workers is not None else int(os.getenv("FMP_MAX_WORKERS", "8"))
+        # Used to fetch the three annual statements in parallel
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fmp")
+        self._cache = cache if cache is not None else ResponseCache()
+
+    def _ttl(self, path: str) -> int:
+        return self.CACHE_TTLS.get(path.strip("/").split("/")[0], 0)
+
+    def _request(self, path: str, params: dict, headers: dict):
+        """Performs the HTTP GET for _get. Overridden by the fixture adapter to replay responses."""
+        params = dict(params, apikey=self.api_key)
+        return http_client.get(f"{self.base_url}{path}", params=params, headers=headers, timeout=10)
+
+    def _get(self, path: str, params: dict = None, cache: bool = True) -> list | dict:
+        params = dict(params or {})
+        key = (path, tuple(sorted(params.items())))
+        ttl = self._ttl(path) if cache else 0
+        entry = self._cache.lookup(key) if ttl else None
+        if entry is not None and entry.fresh:
+            return entry.data
 
-    def _get(self, path: str, params: dict = None) -> list | dict:
-        if params is None:
-            params = {}
-        params["apikey"] = self.api_key
-        url = f"{self.base_url}{path}"
+        headers = entry.validators() if entry is not None else {}
         try:
-            r = requests.get(url, params=params, timeout=10)
+            with metrics.span("fmp.request"):
+                r = self._request(path, params, headers)
+            if entry is not None and r.status_code == 304:
+                self._cache.refresh(key, ttl)
+                return entry.data
             r.raise_for_status()
-            return r.json()
+            data = r.json()
         except requests.exceptions.RequestException as e:
             print(f"Error fetching data from FMP: {e}")
+            if entry is not None:
+                return entry.data # Serve stale rather than nothing
             return {} # Return empty dict on error
 
-    def get_profile(self, ticker: str) -> dict:
-        data = self._get(f"/profile/{ticker}")
-        if not data or not isinstance(data, list):
-            return {}
-        profile = data[0]
+        # Only cache real payloads; FMP reports errors as 200s with a dict body
+        if ttl and isinstance(data, list) and data:
+            self._cache.store(key, data, ttl, r.headers.get("ETag"), r.headers.get("Last-Modified"))
+        return data
+
+    def _get_many(self, endpoint: str, tickers) -> dict[str, dict]:
+        """
+        Fetches /<endpoint>/<SYM1,SYM2,...> in chunks of BULK_CHUNK_SIZE (chunks in parallel)
+        and returns the raw rows keyed by upper-case symbol. Only the per-symbol entries are
+        cached, under the single-symbol key: symbols still fresh there are not requested, and
+        later per-ticker calls are served from the same entries.
+        """
+        symbols = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+        ttl = self._ttl(endpoint)
+        rows, stale = {}, {}
+        for symbol in symbols:
+            entry = self._cache.lookup((f"/{endpoint}/{symbol}", ())) if ttl else None
+            if entry is not None and entry.fresh:
+                rows[symbol] = entry.data[0]
+            elif entry is not None:
+                stale[symbol] = entry.data[0]
+
+        missing = [symbol for symbol in symbols if symbol not in rows]
+        chunks = [missing[i:i + self.BULK_CHUNK_SIZE] for i in range(0, len(missing), self.BULK_CHUNK_SIZE)]
+        for data in self._executor.map(lambda chunk: self._get(f"/{endpoint}/{','.join(chunk)}", cache=False), chunks):
+            if not isinstance(data, list):
+                continue
+            for row in data:
+                symbol = str(row.get("symbol", "")).upper()
+                rows[symbol] = row
+                if ttl:
+                    self._cache.store((f"/{endpoint}/{symbol}", ()), [row], ttl)
+        # Serve stale rather than nothing for symbols a failed chunk did not return
+        return dict(stale, **rows)
+
+    @staticmethod
+    def _map_profile(profile: dict) -> dict:
         return {
             "name": profile.get("companyName"),
             "exchange": profile.get("exchangeShortName"),
@@ -35,19 +112,28 @@ class FMPAdapter(FundamentalsAdapter):
             "homepage": profile.get("website"),
         }
 
-    def get_financials(self, ticker: str) -> dict:
-        # Fetch annual statements for the last 5 years
-        income_statement = self._get(f"/income-statement/{ticker}", {"limit": 5, "period": "annual"})
-        balance_sheet = self._get(f"/balance-sheet-statement/{ticker}", {"limit": 5, "period": "annual"})
-        cash_flow = self._get(f"/cash-flow-statement/{ticker}", {"limit": 5, "period": "annual"})
+    def get_profile(self, ticker: str) -> dict:
+        ticker = ticker.upper() # one cache entry per symbol, whatever the caller's casing
+        data = self._get(f"/profile/{ticker}")
+        if not data or not isinstance(data, list):
+            return {}
+        return self._map_profile(data[0])
 
-        return {
-            "income_statement": income_statement,
-            "balance_sheet": balance_sheet,
-            "cash_flow_statement": cash_flow
+    def get_profiles_many(self, tickers) -> dict[str, dict]:
+        rows = self._get_many("profile", tickers)
+        return {ticker: self._map_profile(rows[ticker.upper()]) if ticker.upper() in rows else {} for ticker in tickers}
+
+    def get_financials(self, ticker: str) -> dict:
+        ticker = ticker.upper()
+        # Fetch annual statements for the last 5 years, all three in parallel
+        futures = {
+            key: metrics.submit(self._executor, self._get, f"{path}/{ticker}", {"limit": 5, "period": "annual"})
+            for key, path in self.STATEMENTS.items()
         }
+        return {key: future.result() for key, future in futures.items()}
 
     def get_ratios(self, ticker: str) -> dict:
+        ticker = ticker.upper()
         # Fetch TTM ratios
         ratios_ttm = self._get(f"/ratios-ttm/{ticker}")
         if not ratios_ttm or not isinstance(ratios_ttm, list):
@@ -55,7 +141,12 @@ class FMPAdapter(FundamentalsAdapter):
         return ratios_ttm[0]
 
     def get_prices(self, ticker: str) -> dict:
+        ticker = ticker.upper()
         price_data = self._get(f"/quote/{ticker}")
         if not price_data or not isinstance(price_data, list):
             return {}
-        return price_data[0]
\ No newline at end of file
+        return price_data[0]
+
+    def get_prices_many(self, tickers) -> dict[str, dict]:
+        rows = self._get_many("quote", tickers)
+        return {ticker: rows.get(ticker.upper(), {}) for ticker in tickers}
\ No newline at end of file
@@ -0,0 +1,312 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.services.data_adapter import FundamentalsAdapter
+from app.services.data_service import DataService
+from app.services.score_service import PIOTROSKI_FIELDS, ScoreService
+from app.services.sector_stats import FACTORS, SectorStats, factor_values, growth_years
+
+STATEMENTS = ("income_statement", "balance_sheet", "cash_flow_statement")
+
+# Every statement field read by ScoreService, DataService and ReportService.
+# Each becomes one float64 column; NaN marks a field the statement did not report.
+STORE_FIELDS = tuple(dict.fromkeys([(statement, field) for statement, field, _ in PIOTROSKI_FIELDS] + [
+    ("income_statement", "ebitda"),
+    ("income_statement", "depreciationAndAmortization"),
+    ("income_statement", "operatingIncome"),
+    ("income_statement", "interestExpense"),
+    ("income_statement", "eps"),
+    ("income_statement", "weightedAverageShsOutDil"),
+    ("cash_flow_statement", "capitalExpenditure"),
+]))
+
+SYMBOL_DTYPE = "<U12"
+DATE_DTYPE = "<U10"
+
+def _column_file(statement: str, field: str) -> str:
+    return f"{statement}.{field}.npy"
+
+def _fiscal_year(row: dict) -> int | None:
+    year = row.get("calendarYear") or str(row.get("date", ""))[:4]
+    try:
+        return int(year)
+    except (TypeError, ValueError):
+        return None
+
+class FundamentalsStore:
+    """
+    On-disk statement history, one record per ticker and fiscal year.
+
+    Records are stored column by column as .npy files (one per STORE_FIELDS entry, plus
+    symbol, fiscal year, date and a presence flag per statement), sorted by ticker and
+    newest year first, and opened memory-mapped. A ticker's rows are located through the
+    sorted `symbols` / `offsets` / `counts` arrays. Profiles, TTM ratios and quotes are
+    small and kept in a `meta.json` sidecar.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv("FUNDAMENTALS_STORE_PATH", "data/fundamentals")
+        self._lock = threading.Lock()
+        self._columns = None
+        self._meta = None
+
+    def exists(self) -> bool:
+        return os.path.exists(os.path.join(self.path, "meta.json"))
+
+    def _load(self) -> tuple[dict, dict]:
+        with self._lock:
+            if self._columns is None:
+                if not self.exists():
+                    raise FileNotFoundError(f"No fundamentals store at {self.path}; run the ingest command first.")
+                with open(os.path.join(self.path, "meta.json"), encoding="utf-8") as f:
+                    meta = json.load(f)
+                names = ["symbols", "offsets", "counts", "symbol", "fiscal_year", "date"]
+                names += [f"has_{statement}" for statement in STATEMENTS]
+                columns = {name: np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r") for name in names}
+                for statement, field in STORE_FIELDS:
+                    file = os.path.join(self.path, _column_file(statement, field))
+                    if os.path.exists(file): # stores written before a field was added lack its column
+                        columns[(statement, field)] = np.load(file, mmap_mode="r")
+                self._columns, self._meta = columns, meta
+            return self._columns, self._meta
+
+    def tickers(self) -> list[str]:
+        columns, _ = self._load()
+        return columns["symbols"].tolist()
+
+    def _rows(self, ticker: str) -> range:
+        columns, _ = self._load()
+        symbols = columns["symbols"]
+        i = int(np.searchsorted(symbols, ticker.upper()))
+        if i >= len(symbols) or symbols[i] != ticker.upper():
+            return range(0)
+        start = int(columns["offsets"][i])
+        return range(start, start + int(columns["counts"][i]))
+
+    def meta(self, ticker: str) -> dict:
+        """The profile / ratios / prices sidecar entry of a ticker ({} when unknown)."""
+        _, meta = self._load()
+        return meta["tickers"].get(ticker.upper(), {})
+
+    def financials(self, ticker: str, limit: int = 5) -> dict:
+        """Statement history in the FMPAdapter.get_financials shape, newest year first."""
+        columns, _ = self._load()
+        financials = {statement: [] for statement in STATEMENTS}
+        for row in self._rows(ticker):
+            for statement in STATEMENTS:
+                if not columns[f"has_{statement}"][row] or len(financials[statement]) >= limit:
+                    continue
+                record = {
+                    "symbol": ticker.upper(),
+                    "date": str(columns["date"][row]),
+                    "calendarYear": str(int(columns["fiscal_year"][row])),
+                }
+                for column_statement, field in STORE_FIELDS:
+                    if column_statement == statement and (statement, field) in columns:
+                        value = float(columns[(statement, field)][row])
+                        if not np.isnan(value):
+                            record[field] = value
+                financials[statement].append(record)
+        return financials
+
+    def piotroski_inputs(self, tickers: list[str] = None) -> tuple[list[str], dict, dict, np.ndarray]:
+        """
+        Latest and prior year columns for ScoreService.calculate_piotroski_packed, read
+        straight from the arrays. Returns (tickers, latest, prior, valid); `valid` marks
+        tickers with two years of all three statements.
+        """
+        columns, _ = self._load()
+        symbols = np.asarray(columns["symbols"])
+        tickers = symbols.tolist() if tickers is None else [t.upper() for t in tickers]
+        valid = np.zeros(len(tickers), dtype=bool)
+        latest_row = prior_row = np.zeros(len(tickers), dtype=np.int64)
+        if len(columns["symbol"]) and tickers:
+            index = np.minimum(np.searchsorted(symbols, tickers), len(symbols) - 1)
+            found = symbols[index] == np.array(tickers, dtype=SYMBOL_DTYPE)
+            valid = found & (np.asarray(columns["counts"])[index] >= 2)
+            latest_row = np.where(valid, np.asarray(columns["offsets"])[index], 0)
+            prior_row = np.where(valid, latest_row + 1, 0)
+            for statement in STATEMENTS:
+                has = np.asarray(columns[f"has_{statement}"])
+                valid &= has[latest_row] & has[prior_row]
+
+        latest, prior = {}, {}
+        for statement, field, default in PIOTROSKI_FIELDS:
+            column = np.asarray(columns[(statement, field)])
+            for rows, packed in ((latest_row, latest), (prior_row, prior)):
+                values = column[rows] if len(column) else np.full(len(tickers), np.nan)
+                packed[field] = np.where(valid & ~np.isnan(values), values, default).astype(np.float64)
+        return tickers, latest, prior, valid
+
+    def write(self, records: dict[str, dict]):
+        """
+        Replaces the store with `records`: {ticker: {"financials": ..., "profile": ...,
+        "ratios": ..., "prices": ...}} in the FundamentalsAdapter shapes. The new store is
+        written next to the old one and swapped in, so readers never see a partial store.
+        """
+        rows = []
+        tickers = sorted(t.upper() for t in records)
+        records = {t.upper(): r for t, r in records.items()}
+        symbols, offsets, counts = [], [], []
+        for ticker in tickers:
+            by_year = {}
+            for statement in STATEMENTS:
+                for row in (records[ticker].get("financials") or {}).get(statement) or []:
+                    year = _fiscal_year(row)
+                    if year is not None:
+                        by_year.setdefault(year, {"date": str(row.get("date", ""))[:10]})[statement] = row
+            symbols.append(ticker)
+            offsets.append(len(rows))
+            counts.append(len(by_year))
+            rows.extend((ticker, year, by_year[year]) for year in sorted(by_year, reverse=True))
+
+        tmp = f"{self.path}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        arrays = {
+            "symbols": np.array(symbols, dtype=SYMBOL_DTYPE),
+            "offsets": np.array(offsets, dtype=np.int64),
+            "counts": np.array(counts, dtype=np.int64),
+            "symbol": np.array([r[0] for r in rows], dtype=SYMBOL_DTYPE),
+            "fiscal_year": np.array([r[1] for r in rows], dtype=np.int32),
+            "date": np.array([r[2]["date"] for r in rows], dtype=DATE_DTYPE),
+        }
+        for statement in STATEMENTS:
+            arrays[f"has_{statement}"] = np.array([statement in r[2] for r in rows], dtype=bool)
+        for statement, field in STORE_FIELDS:
+            values = [(r[2].get(statement) or {}).get(field) for r in rows]
+            arrays[_column_file(statement, field)[:-4]] = np.array(
+                [np.nan if v is None else v for v in values], dtype=np.float64
+            )
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), array)
+        meta = {
+            "fields": [f"{statement}.{field}" for statement, field in STORE_FIELDS],
+            "tickers": {
+                t: {key: records[t].get(key) or {} for key in ("profile", "ratios", "prices")} for t in tickers
+            },
+        }
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+        with self._lock:
+            old = f"{self.path}.old"
+            shutil.rmtree(old, ignore_errors=True)
+            if os.path.exists(self.path):
+                os.replace(self.path, old)
+            os.replace(tmp, self.path)
+            shutil.rmtree(old, ignore_errors=True)
+            self._columns = self._meta = None
+
+    def records(self) -> dict[str, dict]:
+        """Every ticker in the write() input shape; used to merge new tickers into the store."""
+        return {
+            ticker: {"financials": self.financials(ticker, limit=len(self._rows(ticker))), **self.meta(ticker)}
+            for ticker in self.tickers()
+        }
+
+class StoreAdapter(FundamentalsAdapter):
+    """FundamentalsAdapter served entirely from a FundamentalsStore: no network calls."""
+
+    def __init__(self, store: FundamentalsStore = None):
+        self.store = store or FundamentalsStore()
+
+    def get_profile(self, ticker):
+        return self.store.meta(ticker).get("profile", {})
+
+    def get_prices(self, ticker):
+        return self.store.meta(ticker).get("prices", {})
+
+    def get_financials(self, ticker):
+        return self.store.financials(ticker)
+
+    def get_ratios(self, ticker):
+        return self.store.meta(ticker).get("ratios", {})
+
+def fetch_records(adapter: FundamentalsAdapter, tickers: list[str], workers: int = 8) -> dict[str, dict]:
+    """Pulls everything the store keeps for `tickers` through an adapter (e.g. FMPAdapter)."""
+    profiles = adapter.get_profiles_many(tickers)
+    prices = adapter.get_prices_many(tickers)
+
+    def one(ticker):
+        return ticker, {
+            "profile": profiles.get(ticker) or {},
+            "prices": prices.get(ticker) or {},
+            "financials": adapter.get_financials(ticker),
+            "ratios": adapter.get_ratios(ticker),
+        }
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return {ticker: record for ticker, record in executor.map(one, tickers) if record["profile"]}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m app.services.fundamentals_store",
+        description="Fill or score the local columnar fundamentals store.",
+    )
+    parser.add_argument("--path", default=None, help="store directory (default: FUNDAMENTALS_STORE_PATH or data/fundamentals)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="add tickers from FMP or a JSON dump")
+    source = ingest.add_mutually_exclusive_group(required=True)
+    source.add_argument("--tickers", nargs="+", help="tickers to fetch from FMP (needs FMP_API_KEY)")
+    source.add_argument("--tickers-file", help="file with one ticker per line to fetch from FMP")
+    source.add_argument("--json", help='dump of {"TICKER": {"profile", "financials", "ratios", "prices"}}')
+    ingest.add_argument("--replace", action="store_true", help="drop tickers not in this ingest")
+    ingest.add_argument("--workers", type=int, default=8)
+
+    score = commands.add_parser("score", help="print the F-Score and sector-relative Value/Growth scores of every stored ticker")
+    score.add_argument("--save-stats", help="write the sector index to this .npz (serving loads SECTOR_STATS_PATH)")
+
+    args = parser.parse_args(argv)
+    store = FundamentalsStore(args.path)
+
+    if args.command == "score":
+        tickers, latest, prior, valid = store.piotroski_inputs()
+        score_service = ScoreService(SectorStats())
+        scores, _, _ = score_service.calculate_piotroski_packed(latest, prior, valid)
+        data_service = DataService(StoreAdapter(store), max_workers=1)
+        reports = [data_service.get_full_report_data(ticker) or {} for ticker in tickers]
+        matrix = np.vstack([
+            factor_values(r.get("raw_financials") or {}, r["fundamentals"]["ratios"] if r else {}, int(f) if ok else None)
+            for r, f, ok in zip(reports, scores, valid)
+        ]) if tickers else np.empty((0, len(FACTORS)))
+        sectors = [(r.get("company") or {}).get("sector") or None for r in reports]
+        years = [growth_years(r.get("raw_financials") or {}) for r in reports]
+        investor = score_service.rescore_universe(tickers, sectors, matrix, years)
+        def show(value):
+            return "n/a" if np.isnan(value) else int(value)
+        for i, (ticker, score, ok) in enumerate(zip(tickers, scores, valid)):
+            print(f"{ticker}\t{int(score) if ok else 'n/a'}\t{show(investor['value'][i])}\t{show(investor['growth'][i])}")
+        if args.save_stats:
+            score_service.sector_stats.save(args.save_stats)
+        return 0
+
+    if args.json:
+        with open(args.json, encoding="utf-8") as f:
+            records = json.load(f)
+    else:
+        from app.services.fmp_adapter import FMPAdapter
+        tickers = args.tickers
+        if args.tickers_file:
+            with open(args.tickers_file, encoding="utf-8") as f:
+                tickers = [line.strip() for line in f if line.strip()]
+        records = fetch_records(FMPAdapter(), [t.upper() for t in tickers], workers=args.workers)
+
+    if store.exists() and not args.replace:
+        merged = store.records()
+        merged.update({t.upper(): r for t, r in records.items()})
+        records = merged
+    store.write(records)
+    print(f"Stored {len(records)} tickers in {store.path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
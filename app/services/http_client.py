@@ -0,0 +1,84 @@
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from tenacity import Retrying, retry_if_exception_type, retry_if_result, stop_after_attempt, wait_random_exponential
+
+# Status codes worth another attempt: rate limiting and transient upstream failures.
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+_sessions: dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def _pool_size() -> int:
+    return int(os.getenv("HTTP_POOL_SIZE", "20"))
+
+
+def _max_attempts() -> int:
+    return int(os.getenv("HTTP_MAX_RETRIES", "2")) + 1
+
+
+def get_session(url: str) -> requests.Session:
+    """
+    Returns the shared keep-alive session for the scheme and host of url.
+    Sessions are created once per host and reused by every caller and thread.
+    """
+    parts = urlsplit(url)
+    origin = f"{parts.scheme}://{parts.netloc}"
+    session = _sessions.get(origin)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(origin)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=_pool_size())
+                session.mount(f"{parts.scheme}://", adapter)
+                _sessions[origin] = session
+    return session
+
+
+def close_sessions():
+    """Closes every pooled session, e.g. when a worker process shuts down."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def _should_retry(response: requests.Response) -> bool:
+    return response.status_code in RETRY_STATUSES
+
+
+def _last_outcome(retry_state):
+    # Once attempts are exhausted, hand back the last response (or re-raise its error).
+    return retry_state.outcome.result()
+
+
+def request(method: str, url: str, retries: int = None, **kwargs) -> requests.Response:
+    """
+    Sends a request through the pooled session for url's host.
+    Connection errors and RETRY_STATUSES responses are retried with jittered exponential
+    backoff, up to `retries` extra attempts (HTTP_MAX_RETRIES by default). Read timeouts
+    are not retried: a slow upstream would only get slower.
+    The caller is responsible for checking the status of the returned response.
+    """
+    attempts = retries + 1 if retries is not None else _max_attempts()
+    session = get_session(url)
+    retrying = Retrying(
+        stop=stop_after_attempt(attempts),
+        wait=wait_random_exponential(multiplier=0.25, max=4),
+        retry=retry_if_exception_type(requests.exceptions.ConnectionError) | retry_if_result(_should_retry),
+        retry_error_callback=_last_outcome,
+    )
+    return retrying(session.request, method, url, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
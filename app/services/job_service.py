@@ -0,0 +1,108 @@
+import datetime
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from cachetools import TTLCache
+
+class QueueFullError(RuntimeError):
+    """Raised when accepting a job would exceed the queue bound."""
+
+class Job:
+    def __init__(self, tickers: list[str], tasks: dict[str, Future]):
+        self.id = uuid.uuid4().hex
+        self.tickers = tickers
+        self.tasks = tasks
+        self.created_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+    @property
+    def status(self) -> str:
+        futures = self.tasks.values()
+        if all(f.done() for f in futures):
+            return "done"
+        if any(f.running() or f.done() for f in futures):
+            return "running"
+        return "queued"
+
+    def to_dict(self) -> dict:
+        results, errors = {}, {}
+        for ticker, future in self.tasks.items():
+            if not future.done():
+                continue
+            if future.cancelled(): # dropped from the queue by shutdown(); exception() would raise
+                errors[ticker] = "Cancelled before it ran."
+                continue
+            error = future.exception()
+            if error is not None:
+                errors[ticker] = str(error)
+            elif future.result() is None:
+                errors[ticker] = f"Data for ticker '{ticker}' not found."
+            else:
+                results[ticker] = future.result()
+        return {
+            "id": self.id,
+            "status": self.status,
+            "createdAt": self.created_at,
+            "tickers": self.tickers,
+            "completed": sum(f.done() for f in self.tasks.values()),
+            "results": results,
+            "errors": errors,
+        }
+
+class JobQueue:
+    """
+    Bounded in-process job queue for report generation.
+    Each ticker runs once on a local worker pool no matter how many queued jobs
+    ask for it; jobs are kept for `retention` seconds after submission for polling.
+    """
+
+    def __init__(self, handler: Callable[[str], dict | None], max_workers: int = None,
+                 max_pending: int = None, retention: int = None):
+        self.handler = handler
+        self.max_workers = max_workers or int(os.getenv("JOB_WORKERS", "4"))
+        self.max_pending = max_pending or int(os.getenv("JOB_MAX_PENDING", "500"))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="report-job")
+        # Re-entrant: done callbacks can fire synchronously while submit() holds the lock
+        self._lock = threading.RLock()
+        self._tasks: dict[str, Future] = {}
+        self._jobs = TTLCache(maxsize=10000, ttl=retention or int(os.getenv("JOB_RETENTION", "3600")))
+
+    def _task_done(self, ticker: str, future: Future):
+        with self._lock:
+            if self._tasks.get(ticker) is future:
+                del self._tasks[ticker]
+
+    def submit(self, tickers: list[str]) -> Job:
+        """
+        Queues report generation for tickers and returns the Job to poll.
+        Raises QueueFullError if the new, not already queued tickers would exceed max_pending.
+        """
+        tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t and t.strip()))
+        with self._lock:
+            new = [t for t in tickers if t not in self._tasks]
+            if len(self._tasks) + len(new) > self.max_pending:
+                raise QueueFullError(f"Job queue is full ({len(self._tasks)} of {self.max_pending} tickers pending).")
+            tasks = {}
+            for ticker in tickers:
+                future = self._tasks.get(ticker)
+                if future is None:
+                    future = self._tasks[ticker] = self._executor.submit(self.handler, ticker)
+                    future.add_done_callback(lambda f, t=ticker: self._task_done(t, f))
+                tasks[ticker] = future
+            job = Job(tickers, tasks)
+            self._jobs[job.id] = job
+        return job
+
+    def shutdown(self):
+        """Lets running tickers finish and cancels queued ones; called when the worker exits."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"pending": len(self._tasks), "max_pending": self.max_pending, "jobs": len(self._jobs)}
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from cachetools import LRUCache
+
+try:
+    import redis
+except ImportError: # Redis backend is optional
+    redis = None
+
+class SqliteCompletionStore:
+    """
+    Disk backend: a single SQLite table, trimmed to the `maxsize` most recently used rows.
+    Reads never write: their recency is kept in memory and written in one batch with the
+    next insert or every `touch_batch` reads. Rows are trimmed every `trim_every` inserts
+    (default maxsize / 100), so the table may exceed maxsize by that many rows.
+    """
+
+    def __init__(self, path: str, maxsize: int = 100000, touch_batch: int = 256, trim_every: int = None):
+        self.maxsize = maxsize
+        self.touch_batch = touch_batch
+        self.trim_every = trim_every or max(1, maxsize // 100)
+        self._lock = threading.Lock()
+        self._touched: dict[str, float] = {} # key -> last read, not written yet
+        self._inserts = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions (key TEXT PRIMARY KEY, value TEXT NOT NULL, used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS completions_used ON completions (used)")
+        with self._lock:
+            self._trim()
+            self._conn.commit()
+
+    def _flush_touches(self):
+        if self._touched:
+            self._conn.executemany("UPDATE completions SET used = ? WHERE key = ?",
+                                   [(used, key) for key, used in self._touched.items()])
+            self._touched.clear()
+
+    def _trim(self):
+        # The (maxsize + 1)-th most recent row and everything older, found through the index
+        self._conn.execute(
+            "DELETE FROM completions WHERE used <= (SELECT used FROM completions ORDER BY used DESC LIMIT 1 OFFSET ?)",
+            (self.maxsize,),
+        )
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._touched[key] = time.time()
+            if len(self._touched) >= self.touch_batch:
+                self._flush_touches()
+                self._conn.commit()
+            return row[0]
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._touched.pop(key, None)
+            self._flush_touches()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, value, used) VALUES (?, ?, ?)", (key, value, time.time())
+            )
+            self._inserts += 1
+            if self._inserts % self.trim_every == 0:
+                self._trim()
+            self._conn.commit()
+
+class RedisCompletionStore:
+    """Shared backend: completions stored under llm:<key> with a TTL; Redis handles eviction."""
+
+    def __init__(self, client, ttl: int = 30 * 86400):
+        self.client = client
+        self.ttl = ttl
+
+    def get(self, key: str) -> str | None:
+        value = self.client.get(f"llm:{key}")
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def set(self, key: str, value: str):
+        self.client.set(f"llm:{key}", value.encode("utf-8"), ex=self.ttl)
+
+class CompletionCache:
+    """
+    Cache of LLM completions keyed on a hash of model, whitespace-normalized prompt and
+    generation options. A bounded in-process LRU sits in front of an optional persistent
+    backend (SqliteCompletionStore or RedisCompletionStore).
+    """
+
+    def __init__(self, maxsize: int = None, backend=None):
+        self._local = LRUCache(maxsize=maxsize or int(os.getenv("LLM_CACHE_MAXSIZE", "2048")))
+        self._lock = threading.Lock()
+        self.backend = backend
+        self._stats = {"hits": 0, "misses": 0, "backend_errors": 0}
+
+    @classmethod
+    def from_env(cls) -> "CompletionCache | None":
+        """
+        LLM_CACHE_BACKEND selects the persistent tier: "memory" (default, no backend),
+        "disk" (SQLite at LLM_CACHE_PATH), "redis" (CACHE_URL) or "none" to disable caching.
+        """
+        kind = os.getenv("LLM_CACHE_BACKEND", "memory").lower()
+        if kind == "none":
+            return None
+        backend = None
+        if kind == "disk":
+            backend = SqliteCompletionStore(os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3"))
+        elif kind == "redis" and redis is not None and os.getenv("CACHE_URL"):
+            client = redis.Redis.from_url(os.getenv("CACHE_URL"), socket_timeout=0.5, socket_connect_timeout=0.5)
+            backend = RedisCompletionStore(client)
+        return cls(backend=backend)
+
+    @staticmethod
+    def key(model: str, prompt: str, options: dict) -> str:
+        normalized = " ".join(prompt.split())
+        blob = json.dumps({"model": model, "prompt": normalized, "options": options}, sort_keys=True)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            value = self._local.get(key)
+        if value is None and self.backend is not None:
+            try:
+                value = self.backend.get(key)
+            except Exception as e:
+                with self._lock:
+                    self._stats["backend_errors"] += 1
+                print(f"Error reading LLM cache backend: {e}")
+            if value is not None:
+                with self._lock:
+                    self._local[key] = value
+        with self._lock:
+            self._stats["hits" if value is not None else "misses"] += 1
+        return value
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._local[key] = value
+        if self.backend is not None:
+            try:
+                self.backend.set(key, value)
+            except Exception as e:
+                with self._lock:
+                    self._stats["backend_errors"] += 1
+                print(f"Error writing LLM cache backend: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["local_size"] = len(self._local)
+        return stats
@@ -0,0 +1,109 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable
+
+# Lower value = served first
+INTERACTIVE = 0
+BATCH = 1
+
+class SchedulerBusyError(RuntimeError):
+    """Raised when the LLM queue is over its limit and new work is refused."""
+
+class LLMScheduler:
+    """
+    Admission control in front of a single Ollama host.
+    At most `max_concurrency` calls (the model's parallel slots) run at once; waiting
+    callers are admitted by priority, then arrival order. Identical in-flight calls
+    submitted through run() share one upstream request. Callers beyond `max_queue`
+    waiting requests are refused with SchedulerBusyError.
+    """
+
+    def __init__(self, max_concurrency: int = None, max_queue: int = None):
+        self.max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", os.getenv("OLLAMA_NUM_PARALLEL", "2")))
+        self.max_queue = max_queue or int(os.getenv("LLM_MAX_QUEUE", "64"))
+        self._cond = threading.Condition()
+        self._waiting = [] # heap of (priority, seq)
+        self._seq = itertools.count()
+        self._active = 0
+        self._inflight: dict[str, Future] = {}
+        self._stats = {"served": 0, "rejected": 0, "coalesced": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+
+    @contextmanager
+    def slot(self, priority: int = INTERACTIVE):
+        """Blocks until a slot is free and this caller is next in line, then holds it."""
+        with self._cond:
+            if len(self._waiting) >= self.max_queue:
+                self._stats["rejected"] += 1
+                raise SchedulerBusyError(f"LLM queue is full ({len(self._waiting)} waiting).")
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            start = time.monotonic()
+            while self._active >= self.max_concurrency or self._waiting[0] != ticket:
+                self._cond.wait()
+            heapq.heappop(self._waiting)
+            self._active += 1
+            waited = time.monotonic() - start
+            self._stats["served"] += 1
+            self._stats["wait_seconds_total"] += waited
+            self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], waited)
+            # The next ticket may be admissible too if more slots are free
+            self._cond.notify_all()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+    def run(self, key: str, fn: Callable[[], str], priority: int = INTERACTIVE) -> str:
+        """
+        Runs fn() in a slot, unless a call with the same key is already queued or
+        running, in which case its result is shared.
+        """
+        with self._cond:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+            else:
+                self._stats["coalesced"] += 1
+        if not owner:
+            return future.result()
+
+        try:
+            with self.slot(priority):
+                result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._cond:
+                self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._cond:
+            stats = dict(self._stats)
+            stats["queue_depth"] = len(self._waiting)
+            stats["active"] = self._active
+            stats["max_concurrency"] = self.max_concurrency
+            stats["max_queue"] = self.max_queue
+        stats["wait_seconds_avg"] = stats["wait_seconds_total"] / stats["served"] if stats["served"] else 0.0
+        return stats
+
+_schedulers: dict[str, LLMScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+def get_scheduler(host: str) -> LLMScheduler:
+    """Returns the process-wide scheduler for an Ollama host, shared by every client of that host."""
+    with _schedulers_lock:
+        scheduler = _schedulers.get(host)
+        if scheduler is None:
+            scheduler = _schedulers[host] = LLMScheduler()
+        return scheduler
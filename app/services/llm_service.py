@@ -1,16 +1,38 @@
+import json
 import os
 import requests
-from typing import List, Dict, Any
+from app.services import http_client, metrics
+from app.services.llm_cache import CompletionCache
+from app.services.llm_scheduler import INTERACTIVE, LLMScheduler, get_scheduler
+from typing import List, Dict, Any, Iterator
 
 class LLMService:
-    def __init__(self, model: str = None, host: str = None):
+    BIO_PROMPT = """
+Write a neutral 80-word company bio for {ticker} using this structured data:
+{name}, {exchange}, {industry}, {sector}.
+Do not speculate. If data is missing, omit it. No adjectives. Return plain text only.
+"""
+
+    CASH_COW_PROMPT = """
+Summarize free-cash-flow strength for {ticker} using:
+FCF {fcf}, FCF Yield {fcf_yield}%, OCF {ocf}, Capex {capex},
+NI {ni}, Debt/Assets {lev}, Interest coverage {icov}.
+Use terse bullets. No hype. No forward guidance.
+"""
+
+    def __init__(self, model: str = None, host: str = None, cache: CompletionCache = None,
+                 scheduler: LLMScheduler = None):
         self.model = model or os.getenv("MODEL_NAME", "llama3")
         self.host  = host  or os.getenv("OLLAMA_HOST",  "http://localhost:11434")
+        # Completions are cached by model + prompt + options (see LLM_CACHE_BACKEND)
+        self.cache = cache if cache is not None else CompletionCache.from_env()
+        # Shared with every other client of the same Ollama host
+        self.scheduler = scheduler or get_scheduler(self.host)
 
     def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         url = f"{self.host}{path}"
         try:
-            r = requests.post(url, json=payload, timeout=20) # 2s LLM timeout + buffer
+            r = http_client.post(url, json=payload, timeout=20) # 2s LLM timeout + buffer
             r.raise_for_status()
             return r.json()
         except requests.exceptions.RequestException as e:
@@ -18,44 +40,107 @@ class LLMService:
             print(f"Error connecting to Ollama: {e}")
             raise
 
-    def generate(self, prompt: str, **gen_options) -> str:
-        """
-        Generates a response from the LLM.
-        """
+    def _post_stream(self, path: str, payload: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Yields the JSON objects of a chunked Ollama response as they arrive."""
+        url = f"{self.host}{path}"
+        try:
+            r = http_client.post(url, json=payload, timeout=20, stream=True)
+            r.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            print(f"Error connecting to Ollama: {e}")
+            raise
+        with r:
+            for line in r.iter_lines():
+                if line:
+                    yield json.loads(line)
+
+    def _payload(self, prompt: str, stream: bool, gen_options: dict) -> Dict[str, Any]:
         final_options = {"temperature": 0.2, "max_tokens": 256}
         final_options.update(gen_options)
-
-        payload = {
+        return {
             "model": self.model,
             "prompt": prompt,
-            "stream": False,
+            "stream": stream,
             "options": final_options
         }
 
-        data = self._post("/api/generate", payload)
-        return data.get("response", "").strip()
+    @staticmethod
+    def _key(payload: Dict[str, Any]) -> str:
+        return CompletionCache.key(payload["model"], payload["prompt"], payload["options"])
 
-    def get_bio(self, profile_data: dict) -> str:
+    def _cached(self, key: str) -> str | None:
+        return self.cache.get(key) if self.cache is not None else None
+
+    def _generate_uncached(self, payload: Dict[str, Any], key: str) -> str:
+        # Re-check: an identical call may have finished while this one was queued
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        with metrics.span("llm.generate"):
+            data = self._post("/api/generate", payload)
+        text = data.get("response", "").strip()
+        if self.cache is not None and text:
+            self.cache.set(key, text)
+        return text
+
+    def generate(self, prompt: str, priority: int = INTERACTIVE, **gen_options) -> str:
+        """
+        Generates a response from the LLM.
+        Calls go through the host's scheduler: identical in-flight prompts are merged and
+        `priority` (INTERACTIVE or BATCH) decides the order in which queued calls run.
+        """
+        payload = self._payload(prompt, False, gen_options)
+        key = self._key(payload)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        return self.scheduler.run(key, lambda: self._generate_uncached(payload, key), priority)
+
+    def generate_stream(self, prompt: str, priority: int = INTERACTIVE, **gen_options) -> Iterator[str]:
+        """
+        Generates a response from the LLM, yielding text fragments as Ollama produces them.
+        A cached completion is yielded as a single fragment. The scheduler slot is held
+        until the stream finishes or the consumer stops reading.
+        """
+        payload = self._payload(prompt, True, gen_options)
+        key = self._key(payload)
+        cached = self._cached(key)
+        if cached is not None:
+            yield cached
+            return
+
+        with self.scheduler.slot(priority), metrics.span("llm.stream"):
+            fragments = []
+            for chunk in self._post_stream("/api/generate", payload):
+                if chunk.get("error"):
+                    raise requests.exceptions.RequestException(f"Ollama error: {chunk['error']}")
+                if chunk.get("response"):
+                    fragments.append(chunk["response"])
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    text = "".join(fragments).strip()
+                    if self.cache is not None and text:
+                        self.cache.set(key, text)
+                    break
+
+    def get_bio(self, profile_data: dict, priority: int = INTERACTIVE) -> str:
         """
         Generates a company biography using a specific prompt.
         """
-        prompt_template = """
-Write a neutral 80-word company bio for {ticker} using this structured data:
-{name}, {exchange}, {industry}, {sector}.
-Do not speculate. If data is missing, omit it. No adjectives. Return plain text only.
-"""
-        prompt = prompt_template.format(**profile_data)
-        return self.generate(prompt)
+        prompt = self.BIO_PROMPT.format(**profile_data)
+        return self.generate(prompt, priority=priority)
 
-    def get_cash_cow_summary(self, financial_data: dict) -> str:
+    def stream_bio(self, profile_data: dict) -> Iterator[str]:
+        """Streaming variant of get_bio."""
+        return self.generate_stream(self.BIO_PROMPT.format(**profile_data))
+
+    def get_cash_cow_summary(self, financial_data: dict, priority: int = INTERACTIVE) -> str:
         """
         Generates a cash cow summary using a specific prompt.
         """
-        prompt_template = """
-Summarize free-cash-flow strength for {ticker} using:
-FCF {fcf}, FCF Yield {fcf_yield}%, OCF {ocf}, Capex {capex},
-NI {ni}, Debt/Assets {lev}, Interest coverage {icov}.
-Use terse bullets. No hype. No forward guidance.
-"""
-        prompt = prompt_template.format(**financial_data)
-        return self.generate(prompt)
\ No newline at end of file
+        prompt = self.CASH_COW_PROMPT.format(**financial_data)
+        return self.generate(prompt, priority=priority)
+
+    def stream_cash_cow_summary(self, financial_data: dict) -> Iterator[str]:
+        """Streaming variant of get_cash_cow_summary."""
+        return self.generate_stream(self.CASH_COW_PROMPT.format(**financial_data))
\ No newline at end of file
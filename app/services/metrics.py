@@ -0,0 +1,184 @@
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager
+from typing import Callable
+
+# Upper bounds in seconds; spans range from sub-millisecond cache hits to LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self._lock = threading.Lock()
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(tuple(labels.get(name, "") for name in self.labels), 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, key)} {_number(value)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series: dict[tuple, list] = {} # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            series = self._series.get(tuple(labels.get(name, "") for name in self.labels))
+            return series[-1] if series else 0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    le = f'le="{bound}"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labels, key, le)} {count}")
+                le = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{_labels(self.labels, key, le)} {series[-1]}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, key)} {_number(series[-2])}")
+                lines.append(f"{self.name}_count{_labels(self.labels, key)} {series[-1]}")
+        return lines
+
+class MetricsRegistry:
+    """
+    Process-wide counters and histograms plus collectors: callables returning a flat
+    dict of numbers (e.g. ReportCache.stats) exported as gauges named
+    <prefix>_<collector>_<key>. render() produces the Prometheus text format.
+    """
+
+    def __init__(self, prefix: str = "piotroski"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._metrics: dict[str, Counter | Histogram] = {}
+        self._collectors: dict[str, Callable[[], dict]] = {}
+
+    def _get_or_create(self, cls, name: str, *args):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args)
+            return metric
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        return self._get_or_create(Counter, f"{self.prefix}_{name}", help, labels)
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, f"{self.prefix}_{name}", help, labels, buckets)
+
+    def add_collector(self, name: str, collect: Callable[[], dict]):
+        with self._lock:
+            self._collectors[name] = collect
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors.items())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for name, collect in collectors:
+            try:
+                values = collect()
+            except Exception as e:
+                print(f"Error collecting {name} metrics: {e}")
+                continue
+            for key, value in values.items():
+                if isinstance(value, bool):
+                    value = int(value)
+                if not isinstance(value, (int, float)):
+                    continue
+                metric = f"{self.prefix}_{name}_{key}"
+                lines.append(f"# TYPE {metric} gauge")
+                lines.append(f"{metric} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+STAGE_SECONDS = REGISTRY.histogram("stage_duration_seconds", "Time spent per pipeline stage.", ("stage",))
+STAGE_ERRORS = REGISTRY.counter("stage_errors_total", "Stages that raised.", ("stage",))
+HTTP_SECONDS = REGISTRY.histogram("http_request_duration_seconds", "HTTP request latency.", ("endpoint", "method", "status"))
+
+# Per-request list of (stage, seconds), set while a request is being handled
+_request_timings: contextvars.ContextVar[list | None] = contextvars.ContextVar("request_timings", default=None)
+
+@contextmanager
+def span(stage: str):
+    """Times a block into STAGE_SECONDS and, inside a request, its Server-Timing breakdown."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+def submit(executor: Executor, fn: Callable, *args) -> Future:
+    """executor.submit that runs fn in a copy of the caller's context, so its spans land in the caller's request."""
+    return executor.submit(contextvars.copy_context().run, fn, *args)
+
+def begin_request():
+    _request_timings.set([])
+
+def end_request() -> list[tuple[str, float]]:
+    timings = _request_timings.get() or []
+    _request_timings.set(None)
+    return timings
+
+def server_timing_enabled() -> bool:
+    return os.getenv("SERVER_TIMING", "false").lower() in ("1", "true", "yes")
+
+def server_timing(timings: list[tuple[str, float]], total: float = None) -> str:
+    """
+    Server-Timing header value with one entry per stage. Repeated stages are summed,
+    so stages that ran in parallel can add up to more than the total.
+    """
+    durations: dict[str, float] = {}
+    for stage, seconds in timings:
+        durations[stage] = durations.get(stage, 0.0) + seconds
+    if total is not None:
+        durations["total"] = total
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in durations.items())
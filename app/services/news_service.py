@@ -1,7 +1,155 @@
-import requests
+import os
+import re
+import threading
+import time
 import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
 from typing import List, Dict
 
+import requests
+import urllib3
+from app.services import http_client, metrics
+
+# Words that do not identify a company on their own
+_NAME_STOPWORDS = {
+    "inc", "corp", "corporation", "co", "company", "ltd", "limited", "plc", "llc", "lp",
+    "holdings", "holding", "group", "the", "and", "of", "class", "sa", "ag", "nv", "se",
+}
+_WORD_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9&'.-]*")
+# Ticker symbols as headlines write them: "$AAPL", "(AAPL)" or "(NASDAQ: AAPL)". Bare
+# upper-case words are not symbols: "AI", "IT", "CEO" and "US" would match unrelated stories.
+_SYMBOL_RE = re.compile(r"\$([A-Z][A-Z0-9]{0,5}(?:\.[A-Z])?)\b|\((?:[A-Za-z]+:\s*)?([A-Z][A-Z0-9]{0,5}(?:\.[A-Z])?)\)")
+
+def _published_ts(published_at: str) -> float:
+    try:
+        return parsedate_to_datetime(published_at).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+def _words(text: str) -> list[str]:
+    """Lower-case words without trailing dots or possessives: "Apple's" -> "apple"."""
+    words = (w.lower().strip(".'") for w in _WORD_RE.findall(text or ""))
+    return [w[:-2] if w.endswith("'s") else w for w in words]
+
+def _name_terms(company_name: str) -> list[str]:
+    """Significant lower-case words of a company name, e.g. 'Apple Inc.' -> ['apple']."""
+    return [w for w in _words(company_name) if len(w) > 1 and w not in _NAME_STOPWORDS]
+
+class NewsStore:
+    """
+    Bounded in-memory store of feed items (oldest evicted first) with an inverted index
+    from title words and "$AAPL" / "(AAPL)" ticker symbols to items.
+    """
+
+    def __init__(self, maxsize: int = None):
+        self.maxsize = maxsize or int(os.getenv("NEWS_STORE_MAXSIZE", "5000"))
+        self._lock = threading.Lock()
+        self._items: OrderedDict[str, dict] = OrderedDict() # url -> item
+        self._published: dict[str, float] = {}
+        self._words: dict[str, set[str]] = {}
+        self._symbols: dict[str, set[str]] = {}
+
+    @staticmethod
+    def _tokens(title: str) -> tuple[set[str], set[str]]:
+        symbols = {dollar or paren for dollar, paren in _SYMBOL_RE.findall(title)}
+        return set(_words(title)), symbols
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            return url in self._items
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def add(self, item: dict) -> bool:
+        """Adds an item keyed by URL. Returns False if it was already stored."""
+        url = item["url"]
+        words, symbols = self._tokens(item["title"])
+        with self._lock:
+            if url in self._items:
+                return False
+            self._items[url] = item
+            self._published[url] = _published_ts(item["publishedAt"])
+            for index, tokens in ((self._words, words), (self._symbols, symbols)):
+                for token in tokens:
+                    index.setdefault(token, set()).add(url)
+            while len(self._items) > self.maxsize:
+                self._evict_oldest()
+        return True
+
+    def _evict_oldest(self):
+        url, item = self._items.popitem(last=False)
+        self._published.pop(url, None)
+        words, symbols = self._tokens(item["title"])
+        for index, tokens in ((self._words, words), (self._symbols, symbols)):
+            for token in tokens:
+                urls = index.get(token)
+                if urls is not None:
+                    urls.discard(url)
+                    if not urls:
+                        del index[token]
+
+    def search(self, ticker: str = None, company_name: str = None, sources: List[str] = None,
+               limit: int = 5) -> List[Dict]:
+        """
+        Items whose title cites the ticker symbol ("$AAPL", "(AAPL)") or mentions every
+        significant word of the company name, newest first.
+        """
+        with self._lock:
+            urls = set(self._symbols.get(ticker.upper(), ())) if ticker else set()
+            terms = _name_terms(company_name)
+            if terms:
+                matches = [self._words.get(term, set()) for term in terms]
+                urls |= set.intersection(*matches)
+            items = [self._items[url] for url in urls]
+            items.sort(key=lambda item: self._published[item["url"]], reverse=True)
+        if sources:
+            names = {NewsService.SOURCE_NAMES.get(s.lower(), s) for s in sources}
+            items = [item for item in items if item["source"] in names]
+        return items[:limit]
+
+class SourceBreaker:
+    """
+    Per-source circuit breaker: after `threshold` consecutive failures the source is
+    skipped for `cooldown` seconds, then a single trial fetch is let through.
+    """
+
+    def __init__(self, threshold: int = None, cooldown: float = None):
+        self.threshold = threshold or int(os.getenv("NEWS_BREAKER_THRESHOLD", "3"))
+        self.cooldown = cooldown if cooldown is not None else float(os.getenv("NEWS_BREAKER_COOLDOWN", "300"))
+        self._lock = threading.Lock()
+        self._failures: dict[str, int] = {}
+        self._open_until: dict[str, float] = {}
+
+    def allow(self, source: str) -> bool:
+        with self._lock:
+            open_until = self._open_until.get(source)
+            if open_until is None:
+                return True
+            if time.monotonic() < open_until:
+                return False
+            # Half-open: let one trial through and re-open immediately if it fails
+            del self._open_until[source]
+            self._failures[source] = self.threshold - 1
+            return True
+
+    def record(self, source: str, ok: bool):
+        with self._lock:
+            if ok:
+                self._failures.pop(source, None)
+                return
+            self._failures[source] = self._failures.get(source, 0) + 1
+            if self._failures[source] >= self.threshold:
+                self._open_until[source] = time.monotonic() + self.cooldown
+                print(f"News source '{source}' failed {self._failures[source]} times; skipping it for {self.cooldown:.0f}s")
+
+    def is_open(self, source: str) -> bool:
+        with self._lock:
+            return time.monotonic() < self._open_until.get(source, 0.0)
+
 class NewsService:
 
     SOURCE_URLS = {
@@ -9,46 +157,155 @@ class NewsService:
         "ap": "https://apnews.com/rss"
     }
 
-    def get_news(self, ticker: str, sources: List[str] = None) -> List[Dict]:
+    SOURCE_NAMES = {
+        "reuters": "Reuters",
+        "ap": "AP",
+    }
+
+    def __init__(self, sources: List[str] = None, poll_interval: float = None, store: NewsStore = None,
+                 deadline: float = None, breaker: SourceBreaker = None):
         """
-        Fetches news for a given ticker from specified RSS feeds.
-        Note: The free feeds are not ticker-specific. This service will
-        fetch general news from the sources. A more advanced implementation
-        would use a news API that allows for ticker-specific searches.
+        Feeds are ingested by refresh(), run every poll_interval seconds (NEWS_POLL_INTERVAL)
+        on a background thread started by the first get_news call; 0 disables polling.
+        Sources are fetched concurrently; refresh() waits at most `deadline` seconds
+        (NEWS_DEADLINE) and slower sources finish ingesting in the background.
         """
-        if sources is None:
-            sources = ['reuters', 'ap']
+        self.sources = sources or [s.strip() for s in os.getenv("NEWS_SOURCES", "reuters,ap").split(",") if s.strip()]
+        self.poll_interval = poll_interval if poll_interval is not None else float(os.getenv("NEWS_POLL_INTERVAL", "300"))
+        self.deadline = deadline if deadline is not None else float(os.getenv("NEWS_DEADLINE", "3"))
+        self.store = store or NewsStore()
+        self.breaker = breaker or SourceBreaker()
+        self._validators: dict[str, dict] = {} # source -> conditional GET headers
+        self._executor = ThreadPoolExecutor(max_workers=max(len(self.SOURCE_URLS), 1), thread_name_prefix="news")
+        self._inflight: dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        self._warm = threading.Event()
+        self._warm_lock = threading.Lock()
+        self._poller = None
+        self._stop = threading.Event()
+        self._poller_lock = threading.Lock()
 
-        all_news = []
-        for source in sources:
-            url = self.SOURCE_URLS.get(source.lower())
-            if not url:
-                print(f"Warning: Unknown news source '{source}'")
+    def _parse_items(self, source: str, stream) -> List[Dict]:
+        """
+        Parses RSS <item>s incrementally, stopping at the first item already stored:
+        feeds list newest first, so everything after it has been ingested before.
+        """
+        items = []
+        for _, elem in ET.iterparse(stream, events=("end",)):
+            if elem.tag != "item":
                 continue
+            title = elem.findtext("title") or "No Title"
+            link = elem.findtext("link") or ""
+            pub_date = elem.findtext("pubDate") or ""
+            elem.clear()
+            if link and link in self.store:
+                break
+            items.append({
+                "title": title,
+                "source": self.SOURCE_NAMES.get(source, source.capitalize()),
+                "publishedAt": pub_date,
+                "url": link
+            })
+        return items
 
-            try:
-                response = requests.get(url, timeout=10)
-                response.raise_for_status()
+    def fetch_source(self, source: str) -> int:
+        """Polls one feed with If-None-Match/If-Modified-Since and stores new items. Returns how many."""
+        url = self.SOURCE_URLS.get(source.lower())
+        if not url:
+            print(f"Warning: Unknown news source '{source}'")
+            return 0
 
-                root = ET.fromstring(response.content)
+        ok = False
+        try:
+            with metrics.span("news.fetch"):
+                response = http_client.get(url, headers=self._validators.get(source, {}), timeout=10, stream=True)
+                with response:
+                    if response.status_code == 304:
+                        ok = True
+                        return 0
+                    response.raise_for_status()
+                    response.raw.decode_content = True
+                    items = self._parse_items(source, response.raw)
+                    self._validators[source] = {
+                        header: response.headers[key]
+                        for header, key in (("If-None-Match", "ETag"), ("If-Modified-Since", "Last-Modified"))
+                        if response.headers.get(key)
+                    }
+                    ok = True
+        except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError) as e:
+            # Reading response.raw raises urllib3's errors (ProtocolError, ReadTimeoutError) directly
+            print(f"Error fetching news from {source}: {e}")
+            return 0
+        except ET.ParseError as e:
+            print(f"Error parsing XML from {source}: {e}")
+            return 0
+        finally:
+            self.breaker.record(source, ok)
 
-                for item in root.findall('.//item'):
-                    title = item.find('title').text if item.find('title') is not None else 'No Title'
-                    link = item.find('link').text if item.find('link') is not None else ''
-                    pub_date = item.find('pubDate').text if item.find('pubDate') is not None else ''
+        # Oldest first, so the store's insertion order follows publication order
+        return sum(self.store.add(item) for item in reversed(items))
 
-                    news_item = {
-                        "title": title,
-                        "source": source.capitalize(),
-                        "publishedAt": pub_date,
-                        "url": link
-                    }
-                    all_news.append(news_item)
+    def _submit(self, source: str) -> Future | None:
+        """Starts a fetch unless the source's breaker is open or a fetch is still running."""
+        with self._inflight_lock:
+            future = self._inflight.get(source)
+            if future is not None and not future.done():
+                return future
+            if not self.breaker.allow(source):
+                return None
+            future = self._inflight[source] = self._executor.submit(self.fetch_source, source)
+            return future
 
-            except requests.exceptions.RequestException as e:
-                print(f"Error fetching news from {source}: {e}")
-            except ET.ParseError as e:
-                print(f"Error parsing XML from {source}: {e}")
+    def refresh(self, sources: List[str] = None, deadline: float = None) -> int:
+        """
+        Ingests every configured source concurrently, waiting at most `deadline` seconds.
+        Returns the number of new items from the sources that finished in time; the rest
+        keep running and add their items to the store when they complete.
+        """
+        futures = [f for f in (self._submit(source) for source in (sources or self.sources)) if f is not None]
+        done, _ = wait(futures, timeout=self.deadline if deadline is None else deadline)
+        self._warm.set()
+        return sum(f.result() for f in done if f.exception() is None)
+
+    def _poll(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.refresh()
+            self._stop.wait(max(0.0, self.poll_interval - (time.monotonic() - started)))
+
+    def start_polling(self):
+        """Starts the background ingestion thread if polling is enabled and not running yet."""
+        if self.poll_interval <= 0:
+            return
+        with self._poller_lock:
+            if self._poller is None or not self._poller.is_alive():
+                self._stop.clear()
+                self._poller = threading.Thread(target=self._poll, name="news-poller", daemon=True)
+                self._poller.start()
+
+    def stop_polling(self):
+        self._stop.set()
 
-        # Limit to top 5 for now as per TRD
-        return all_news[:5]
\ No newline at end of file
+    def shutdown(self):
+        self.stop_polling()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _ensure_warm(self):
+        # Until the first refresh has run, do one bounded by the deadline so the very
+        # first reports are not empty; afterwards the poller keeps the store current.
+        if self._warm.is_set():
+            return
+        with self._warm_lock:
+            if not self._warm.is_set():
+                self.refresh()
+
+    def get_news(self, ticker: str, sources: List[str] = None, company_name: str = None, limit: int = 5) -> List[Dict]:
+        """
+        Returns up to `limit` ingested items (5 as per TRD) mentioning the ticker or the
+        company name, newest first. Once the store is warm this is an index lookup with
+        no network call.
+        """
+        with metrics.span("news.lookup"):
+            self._ensure_warm()
+            self.start_polling()
+            return self.store.search(ticker, company_name, sources, limit)
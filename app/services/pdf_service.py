@@ -0,0 +1,172 @@
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from importlib import metadata
+from typing import Callable
+
+from cachetools import TTLCache
+
+# WeasyPrint (and pango/cairo behind it) takes long to import, so it is loaded on first use
+_weasyprint = None
+_weasyprint_lock = threading.Lock()
+
+def load_weasyprint():
+    """The weasyprint module, or None when it (or its system libraries, see Dockerfile) is missing."""
+    global _weasyprint
+    with _weasyprint_lock:
+        if _weasyprint is None:
+            try:
+                import weasyprint
+            except (ImportError, OSError):
+                weasyprint = False
+            _weasyprint = weasyprint
+    return _weasyprint or None
+
+APP_DIR = os.path.join(os.path.dirname(__file__), "..")
+PDF_TEMPLATE = os.path.join(APP_DIR, "templates", "report_pdf.html")
+PDF_STYLESHEET = os.path.join(APP_DIR, "static", "report_pdf.css")
+
+# Set once per worker process by _init_worker
+_stylesheet = None
+_fonts = None
+
+def _init_worker(stylesheet: str):
+    """Parses the print stylesheet and its fonts once, so renders only lay out the HTML."""
+    global _stylesheet, _fonts
+    weasyprint = load_weasyprint()
+    try:
+        from weasyprint.text.fonts import FontConfiguration
+    except ImportError: # WeasyPrint < 53
+        from weasyprint.fonts import FontConfiguration
+    _fonts = FontConfiguration()
+    _stylesheet = weasyprint.CSS(filename=stylesheet, font_config=_fonts)
+
+def _render(html: str, base_url: str) -> bytes:
+    return load_weasyprint().HTML(string=html, base_url=base_url).write_pdf(stylesheets=[_stylesheet], font_config=_fonts)
+
+def template_hash(*paths: str) -> str:
+    """Short hash of the files a PDF depends on, so edited templates never serve stale PDFs."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    try:
+        digest.update(metadata.version("weasyprint").encode())
+    except metadata.PackageNotFoundError:
+        pass
+    return digest.hexdigest()[:12]
+
+def _copy_outcome(source: Future, target: Future):
+    if source.cancelled():
+        target.cancel()
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+class PdfUnavailableError(Exception):
+    """Raised when WeasyPrint is not installed."""
+
+class PdfService:
+    """
+    Renders report_pdf.html to PDF on a pool of worker processes (PDF_WORKERS), so
+    WeasyPrint's CPU-bound layout never blocks the web threads. Each worker parses the
+    stylesheet and fonts once at startup.
+
+    Rendered PDFs are cached by ticker, asOf and the template hash in a TTL cache
+    bounded in bytes (PDF_CACHE_MB, PDF_CACHE_TTL). Concurrent requests for the same
+    PDF share one render.
+    """
+
+    def __init__(self, workers: int = None, cache_mb: int = None, ttl: int = None, timeout: float = None,
+                 executor: Executor = None):
+        self.workers = workers or int(os.getenv("PDF_WORKERS", "2"))
+        self.timeout = timeout or float(os.getenv("PDF_TIMEOUT", "30"))
+        cache_bytes = (cache_mb or int(os.getenv("PDF_CACHE_MB", "64"))) * 1024 * 1024
+        self._cache = TTLCache(maxsize=cache_bytes, ttl=ttl or int(os.getenv("PDF_CACHE_TTL", "86400")), getsizeof=len)
+        self._executor = executor
+        self._pool_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._inflight: dict[str, Future] = {}
+        self._stats = {"hits": 0, "renders": 0, "coalesced": 0, "errors": 0}
+        self.base_url = os.path.abspath(os.path.join(APP_DIR, "static"))
+        self.template_hash = template_hash(PDF_TEMPLATE, PDF_STYLESHEET)
+
+    @staticmethod
+    def available() -> bool:
+        return load_weasyprint() is not None
+
+    def _pool(self) -> Executor:
+        # Spawned (not forked) workers: the web process has threads
+        with self._pool_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(PDF_STYLESHEET,),
+                )
+            return self._executor
+
+    def key(self, ticker: str, as_of: str) -> str:
+        return f"pdf:{ticker.upper()}:{as_of}:{self.template_hash}"
+
+    def _finish(self, key: str, future: Future):
+        with self._lock:
+            self._inflight.pop(key, None)
+            if future.cancelled() or future.exception() is not None:
+                self._stats["errors"] += 1
+                return
+            try:
+                self._cache[key] = future.result()
+            except ValueError: # larger than the whole cache
+                pass
+
+    def submit(self, ticker: str, as_of: str, html: Callable[[], str]) -> Future:
+        """
+        Future of the PDF bytes for a report. `html` renders report_pdf.html and is
+        only called on a cache miss; it runs on the calling thread (e.g. inside the
+        Flask request context).
+        """
+        if not self.available():
+            raise PdfUnavailableError("PDF export needs WeasyPrint, which is not installed.")
+        key = self.key(ticker, as_of)
+        with self._lock:
+            pdf = self._cache.get(key)
+            if pdf is not None:
+                self._stats["hits"] += 1
+                done = Future()
+                done.set_result(pdf)
+                return done
+            future = self._inflight.get(key)
+            if future is not None:
+                self._stats["coalesced"] += 1
+                return future
+            # Reserved here so concurrent requests wait on it; the template renders outside the lock
+            future = self._inflight[key] = Future()
+            self._stats["renders"] += 1
+        future.add_done_callback(lambda f: self._finish(key, f))
+        try:
+            rendering = self._pool().submit(_render, html(), self.base_url)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        rendering.add_done_callback(lambda f: _copy_outcome(f, future))
+        return future
+
+    def render(self, ticker: str, as_of: str, html: Callable[[], str]) -> bytes:
+        """PDF bytes for a report, from the cache or a worker render (at most self.timeout seconds)."""
+        return self.submit(ticker, as_of, html).result(timeout=self.timeout)
+
+    def shutdown(self):
+        """Waits for running renders and stops the worker processes."""
+        with self._pool_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, cached=len(self._cache), cached_bytes=self._cache.currsize, inflight=len(self._inflight))
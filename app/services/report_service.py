@@ -0,0 +1,154 @@
+import datetime
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterator
+import requests
+from app.services import metrics
+from app.services.cache_service import ReportCache
+from app.services.data_service import DataService
+from app.services.llm_scheduler import BATCH, INTERACTIVE, SchedulerBusyError
+from app.services.llm_service import LLMService
+from app.services.news_service import NewsService
+from app.services.score_service import ScoreService
+
+class ReportService:
+    """
+    Report pipeline shared by the web routes and background workers:
+    DataService fetch -> ScoreService scoring (cached by ticker+asOf) -> news lookup
+    -> optional LLM explanations.
+    """
+
+    def __init__(self, data_service: DataService, score_service: ScoreService = None,
+                 llm_service: LLMService = None, cache: ReportCache = None, batch_workers: int = None,
+                 news_service: NewsService = None):
+        self.data_service = data_service
+        self.score_service = score_service or ScoreService()
+        self.llm_service = llm_service
+        self.cache = cache
+        self.news_service = news_service
+        self.batch_workers = batch_workers or int(os.getenv("BATCH_WORKERS", "8"))
+        self._batch_executor = ThreadPoolExecutor(max_workers=self.batch_workers, thread_name_prefix="report-batch")
+
+    def shutdown(self):
+        """Finishes the batch reports in flight; called when the worker exits."""
+        self._batch_executor.shutdown(wait=True, cancel_futures=True)
+
+    def _build(self, ticker: str) -> dict | None:
+        report = self.data_service.get_full_report_data(ticker)
+        if report is None:
+            return None
+        with metrics.span("score.piotroski"):
+            score, _ = self.score_service.calculate_piotroski_f_score(report.get("raw_financials") or {})
+        report["scores"]["piotroskiF"] = score
+        with metrics.span("score.investor"):
+            investor = self.score_service.calculate_investor_scores(report, piotroski=score)
+        report["scores"]["valueInvestor"] = investor["value"]["score"]
+        report["scores"]["growthInvestor"] = investor["growth"]["score"]
+        report["explain"]["value"] = investor["value"]["summary"]
+        report["explain"]["growth"] = investor["growth"]["summary"]
+        return report
+
+    def get_report(self, ticker: str) -> dict | None:
+        """
+        Returns the numeric report (data and scores, no LLM text), from cache when possible.
+        News is looked up after the cache so cached reports still show the latest items.
+        """
+        if self.cache is None:
+            report = self._build(ticker)
+        else:
+            as_of = datetime.date.today().isoformat()
+            report = self.cache.get_or_compute(ticker, as_of, lambda: self._build(ticker))
+        if report is not None and self.news_service is not None:
+            report["news"] = self.news_service.get_news(report["ticker"], company_name=report["company"].get("name"))
+        return report
+
+    @staticmethod
+    def bio_inputs(report: dict) -> dict:
+        company = report["company"]
+        return {
+            "ticker": report["ticker"],
+            "name": company.get("name") or "",
+            "exchange": company.get("exchange") or "",
+            "industry": company.get("industry") or "",
+            "sector": company.get("sector") or "",
+        }
+
+    @staticmethod
+    def cash_cow_inputs(report: dict) -> dict:
+        ttm = report["fundamentals"]["ttm"]
+        ratios = report["fundamentals"]["ratios"]
+        income = (report.get("raw_financials") or {}).get("income_statement") or [{}]
+        interest = income[0].get("interestExpense", 0)
+        total_assets = ttm["totalAssets"]
+        return {
+            "ticker": report["ticker"],
+            "fcf": ttm["freeCashFlow"],
+            "fcf_yield": round(ratios["fcfYield"], 2),
+            "ocf": ttm["operatingCashFlow"],
+            "capex": ttm["capex"],
+            "ni": ttm["netIncome"],
+            "lev": round(ttm["longTermDebt"] / total_assets, 2) if total_assets else "n/a",
+            "icov": round(income[0].get("operatingIncome", 0) / interest, 1) if interest else "n/a",
+        }
+
+    def explain(self, report: dict, priority: int = INTERACTIVE) -> dict:
+        """
+        Fills the bio and cash-cow explanations from the LLM. LLM failures (including
+        a full LLM queue) leave the text empty rather than failing the report.
+        """
+        if self.llm_service is None:
+            return report
+        try:
+            report["explain"]["piotroski"] = self.llm_service.get_bio(self.bio_inputs(report), priority=priority)
+            report["explain"]["cashCow"] = self.llm_service.get_cash_cow_summary(self.cash_cow_inputs(report), priority=priority)
+        except (requests.exceptions.RequestException, SchedulerBusyError) as e:
+            print(f"Error generating explanations for {report['ticker']}: {e}")
+        return report
+
+    def stream_explanations(self, report: dict) -> Iterator[tuple[str, str]]:
+        """
+        Yields (explain field, text fragment) pairs as the LLM generates the bio
+        ("piotroski", shown as the company bio) and then the cash-cow summary.
+        """
+        if self.llm_service is None:
+            return
+        yield from (("piotroski", token) for token in self.llm_service.stream_bio(self.bio_inputs(report)))
+        yield from (("cashCow", token) for token in self.llm_service.stream_cash_cow_summary(self.cash_cow_inputs(report)))
+
+    def get_full_report(self, ticker: str) -> dict | None:
+        """Numeric report plus LLM explanations; used by background jobs, so queued at BATCH priority."""
+        report = self.get_report(ticker)
+        if report is None:
+            return None
+        return self.explain(report, priority=BATCH)
+
+    def iter_reports(self, tickers: list[str]) -> Iterator[tuple[str, dict | None, Exception | None]]:
+        """
+        Builds numeric reports for many tickers on the batch worker pool and yields
+        (ticker, report, error) in completion order. At most 2 * batch_workers tickers
+        are in flight, so memory stays bounded however long the list is. Closing the
+        generator early cancels the tickers not yet started.
+        """
+        remaining = iter(tickers)
+        window = self.batch_workers * 2
+        pending = {}
+
+        def fill():
+            while len(pending) < window:
+                ticker = next(remaining, None)
+                if ticker is None:
+                    return
+                pending[self._batch_executor.submit(self.get_report, ticker)] = ticker
+
+        try:
+            fill()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    ticker = pending.pop(future)
+                    error = future.exception()
+                    yield ticker, (None if error else future.result()), error
+                fill()
+        finally:
+            for future in pending:
+                future.cancel()
\ No newline at end of file
@@ -0,0 +1,64 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from cachetools import LRUCache
+
+@dataclass
+class CachedResponse:
+    data: Any
+    expires_at: float
+    etag: str | None = None
+    last_modified: str | None = None
+
+    @property
+    def fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+    def validators(self) -> dict:
+        """Conditional request headers for revalidating a stale entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+class ResponseCache:
+    """
+    Size-bounded LRU store of decoded response bodies with a TTL per entry.
+    Stale entries are kept (until evicted) so they can be revalidated with their
+    ETag/Last-Modified validators instead of being downloaded again.
+    """
+
+    def __init__(self, maxsize: int = None):
+        maxsize = maxsize or int(os.getenv("RESPONSE_CACHE_MAXSIZE", "4096"))
+        self._entries = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    def lookup(self, key) -> CachedResponse | None:
+        """Returns the entry for key, fresh or stale, or None."""
+        with self._lock:
+            return self._entries.get(key)
+
+    def store(self, key, data, ttl: float, etag: str = None, last_modified: str = None):
+        entry = CachedResponse(data, time.monotonic() + ttl, etag, last_modified)
+        with self._lock:
+            self._entries[key] = entry
+
+    def refresh(self, key, ttl: float):
+        """Extends a revalidated entry by another ttl seconds."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.expires_at = time.monotonic() + ttl
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -1,4 +1,184 @@
+import os
+import threading
+import time
+import zipfile
+from contextlib import contextmanager
+from operator import itemgetter
+
+import numpy as np
+
+from app.services.sector_stats import FACTOR_INDEX, SectorStats, factor_values, growth_years
+
+# Column order of the signal matrix returned by calculate_piotroski_batch.
+PIOTROSKI_SIGNALS = (
+    'positive_roa',
+    'positive_cfo',
+    'delta_roa',
+    'accruals',
+    'delta_leverage',
+    'delta_current_ratio',
+    'no_new_shares',
+    'delta_gross_margin',
+    'delta_asset_turnover',
+)
+
+# Every statement field the F-Score reads, with the default used when it is missing.
+PIOTROSKI_FIELDS = (
+    ('income_statement', 'netIncome', 0),
+    ('income_statement', 'grossProfitRatio', 0),
+    ('income_statement', 'revenue', 0),
+    ('balance_sheet', 'totalAssets', 0),
+    ('balance_sheet', 'longTermDebt', 0),
+    ('balance_sheet', 'totalCurrentAssets', 0),
+    ('balance_sheet', 'totalCurrentLiabilities', 1),
+    ('balance_sheet', 'commonStock', 0),
+    ('cash_flow_statement', 'operatingCashFlow', 0),
+)
+
+# Statements in the order their fields appear in PIOTROSKI_FIELDS
+PIOTROSKI_STATEMENTS = ('income_statement', 'balance_sheet', 'cash_flow_statement')
+
+def _fields_getter(statement: str):
+    """Reads one statement's PIOTROSKI_FIELDS as a tuple in a single call; KeyError if any is missing."""
+    fields = [field for name, field, _ in PIOTROSKI_FIELDS if name == statement]
+    if len(fields) == 1:
+        return lambda row: (row[fields[0]],)
+    return itemgetter(*fields)
+
+_PIOTROSKI_GETTERS = tuple(_fields_getter(statement) for statement in PIOTROSKI_STATEMENTS)
+_PIOTROSKI_DEFAULTS = tuple(default for _, _, default in PIOTROSKI_FIELDS) * 2
+
+# TRD weights of the investor scores: group -> (weight, ((factor, direction), ...)).
+# Direction -1 means a lower value is better, e.g. leverage or share dilution.
+VALUE_MODEL = {
+    'valuation': (0.55, (('earningsYield', 1), ('bookToPrice', 1), ('ebitToEv', 1), ('fcfYield', 1))),
+    'quality': (0.25, (('roe', 1), ('roa', 1), ('grossMarginVolatility', -1), ('piotroskiF', 1))),
+    'risk': (0.20, (('leverage', -1), ('interestCoverage', 1), ('shareIssuance', -1))),
+}
+GROWTH_MODEL = {
+    'growth': (0.60, (('revenueCagr', 1), ('epsCagr', 1), ('ocfCagr', 1))),
+    'quality': (0.25, (('grossMarginExpansion', 1), ('operatingMarginExpansion', 1), ('roicTrend', 1))),
+    'durability': (0.15, (('revenueDispersion', -1), ('shareIssuance', -1))),
+}
+
+FACTOR_LABELS = {
+    'earningsYield': 'P/E', 'bookToPrice': 'P/B', 'ebitToEv': 'EV/EBIT', 'fcfYield': 'FCF yield',
+    'roe': 'ROE', 'roa': 'ROA', 'grossMarginVolatility': 'gross margin stability', 'piotroskiF': 'F-Score',
+    'leverage': 'debt/assets', 'interestCoverage': 'interest coverage', 'shareIssuance': 'share count trend',
+    'revenueCagr': 'revenue CAGR', 'epsCagr': 'EPS CAGR', 'ocfCagr': 'operating cash flow CAGR',
+    'grossMarginExpansion': 'gross margin expansion', 'operatingMarginExpansion': 'operating margin expansion',
+    'roicTrend': 'ROIC trend', 'revenueDispersion': 'revenue consistency',
+}
+
+CONFIDENCE = ('low', 'medium', 'high')
+
+
+def _confidence(coverage: float, downgrade: bool = False) -> str:
+    """high with >= 80% of the weighted factors available, medium with >= 50%, else low."""
+    level = 2 if coverage >= 0.8 else 1 if coverage >= 0.5 else 0
+    return CONFIDENCE[max(level - downgrade, 0)]
+
+
+def _composite(scaled: np.ndarray, model: dict) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Weighted investor score of N normalized factor rows (0..1, NaN for missing).
+    Returns (scores 0-100, coverage 0-1, oriented factors): each group is the mean of
+    its available factors and groups with none are dropped from the weighting.
+    """
+    n = len(scaled)
+    total, weights, coverage = np.zeros(n), np.zeros(n), np.zeros(n)
+    oriented = np.full_like(scaled, np.nan)
+    for weight, factors in model.values():
+        columns = [FACTOR_INDEX[name] for name, _ in factors]
+        directions = np.array([direction for _, direction in factors])
+        values = np.where(directions > 0, scaled[:, columns], 1 - scaled[:, columns])
+        oriented[:, columns] = values
+        available = ~np.isnan(values)
+        count = available.sum(axis=1)
+        mean = np.divide(np.nansum(values, axis=1), count, out=np.zeros(n), where=count > 0)
+        total += np.where(count > 0, weight * mean, 0)
+        weights += np.where(count > 0, weight, 0)
+        coverage += weight * count / len(columns)
+    scores = np.divide(total, weights, out=np.zeros(n), where=weights > 0) * 100
+    return np.rint(scores).astype(np.int64), coverage, oriented
+
+
+def _safe_div(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Element-wise division that yields 0 where the denominator is 0, like the scalar path."""
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator != 0)
+
+
 class ScoreService:
+    """
+    F-Score plus the sector-relative Value and Growth scores.
+
+    Value and Growth rank a company against a precomputed sector index of the whole
+    universe, built by the nightly universe refresh (or `fundamentals_store score
+    --save-stats`) and saved at SECTOR_STATS_PATH. Serving never adds to the index, so
+    a score does not depend on which reports a process happened to build before. The
+    file is reloaded when it changes (checked every SECTOR_STATS_REFRESH seconds).
+    With an explicit `sector_stats` no file is read.
+    """
+
+    def __init__(self, sector_stats: SectorStats = None, stats_path: str = None):
+        self.stats_path = None if sector_stats is not None else (
+            stats_path or os.getenv("SECTOR_STATS_PATH", "data/sector_stats.npz"))
+        self.sector_stats = sector_stats if sector_stats is not None else SectorStats()
+        self._stats_mtime = None
+        self._stats_checked = -np.inf
+        self._stats_lock = threading.Lock()
+        self._frozen = 0
+        if self.stats_path is not None:
+            self._reload_index()
+            if not len(self.sector_stats):
+                print(f"No sector index at {self.stats_path}; Value and Growth scores need the universe refresh to build it")
+
+    def _reload_index(self):
+        """Swaps in the saved index if its file changed; at most once per refresh interval."""
+        if self.stats_path is None:
+            return
+        now = time.monotonic()
+        with self._stats_lock:
+            if self._frozen or now - self._stats_checked < self.sector_stats.refresh_interval:
+                return
+            self._stats_checked = now
+            try:
+                mtime = os.path.getmtime(self.stats_path)
+            except OSError:
+                return
+            if mtime == self._stats_mtime:
+                return
+            stats = SectorStats()
+            try:
+                stats.load(self.stats_path)
+            except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as e:
+                print(f"Error loading sector index from {self.stats_path}: {e}")
+                return
+            self.sector_stats, self._stats_mtime = stats, mtime
+
+    @contextmanager
+    def frozen_index(self):
+        """
+        Keeps the index in memory from being swapped for the saved file while the block
+        runs, e.g. while the universe refresh rebuilds and saves it.
+        """
+        with self._stats_lock:
+            self._frozen += 1
+        try:
+            yield self.sector_stats
+        finally:
+            with self._stats_lock:
+                self._frozen -= 1
+
+    def save_index(self):
+        """Writes the sector index to SECTOR_STATS_PATH (atomically), for the serving processes to load."""
+        if self.stats_path is None:
+            return
+        directory = os.path.dirname(self.stats_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.sector_stats.save(self.stats_path)
+
     def calculate_piotroski_f_score(self, financials: dict) -> tuple[int, dict]:
         """
         Calculates the Piotroski F-Score based on the provided financial statements.
@@ -84,12 +264,186 @@ class ScoreService:
 
         return score, metrics
 
-    def calculate_value_investor_score(self, financials, ratios):
-        # Placeholder
-        print("Calculating Value Investor Score")
-        return 0, {}
+    def pack_piotroski_inputs(self, universe) -> tuple[dict, dict, np.ndarray]:
+        """
+        Packs the latest and prior statement fields of N companies into NumPy columns.
+        Returns (latest, prior, valid): two dicts of float64 arrays keyed by field name,
+        and a boolean mask of the companies with at least two years of every statement.
+        """
+        # One pass over the universe: a row of len(PIOTROSKI_FIELDS) latest then prior
+        # values per company, converted to an (N, 18) matrix at once
+        get_income, get_balance, get_cash_flow = _PIOTROSKI_GETTERS
+        rows, valid = [], []
+        for financials in universe:
+            statements = [financials.get(name) or () for name in PIOTROSKI_STATEMENTS]
+            income, balance, cash_flow = statements
+            ok = len(income) >= 2 and len(balance) >= 2 and len(cash_flow) >= 2
+            valid.append(ok)
+            if not ok:
+                rows.append(_PIOTROSKI_DEFAULTS)
+                continue
+            try:
+                rows.append(get_income(income[0]) + get_balance(balance[0]) + get_cash_flow(cash_flow[0]) +
+                            get_income(income[1]) + get_balance(balance[1]) + get_cash_flow(cash_flow[1]))
+            except KeyError: # a field is missing somewhere: fall back to per-field defaults
+                by_name = dict(zip(PIOTROSKI_STATEMENTS, statements))
+                rows.append(tuple(by_name[statement][year].get(field, default)
+                                  for year in (0, 1) for statement, field, default in PIOTROSKI_FIELDS))
+
+        width = len(PIOTROSKI_FIELDS)
+        matrix = np.array(rows, dtype=np.float64).reshape(len(rows), 2 * width)
+        latest = {field: matrix[:, i] for i, (_, field, _) in enumerate(PIOTROSKI_FIELDS)}
+        prior = {field: matrix[:, width + i] for i, (_, field, _) in enumerate(PIOTROSKI_FIELDS)}
+        return latest, prior, np.array(valid, dtype=bool)
 
-    def calculate_growth_investor_score(self, financials, ratios):
-        # Placeholder
-        print("Calculating Growth Investor Score")
-        return 0, {}
\ No newline at end of file
+    def piotroski_signals(self, latest: dict, prior: dict) -> np.ndarray:
+        """
+        Computes the nine Piotroski signals from packed columns.
+        Returns an (N, 9) int8 matrix with columns ordered as PIOTROSKI_SIGNALS.
+        """
+        roa = _safe_div(latest['netIncome'], latest['totalAssets'])
+        prior_roa = _safe_div(prior['netIncome'], prior['totalAssets'])
+        cfo = latest['operatingCashFlow']
+
+        leverage = _safe_div(latest['longTermDebt'], latest['totalAssets'])
+        prior_leverage = _safe_div(prior['longTermDebt'], prior['totalAssets'])
+        current_ratio = _safe_div(latest['totalCurrentAssets'], latest['totalCurrentLiabilities'])
+        prior_current_ratio = _safe_div(prior['totalCurrentAssets'], prior['totalCurrentLiabilities'])
+        asset_turnover = _safe_div(latest['revenue'], latest['totalAssets'])
+        prior_asset_turnover = _safe_div(prior['revenue'], prior['totalAssets'])
+
+        signals = np.column_stack((
+            roa > 0,
+            cfo > 0,
+            roa > prior_roa,
+            cfo > latest['netIncome'],
+            leverage <= prior_leverage,
+            current_ratio > prior_current_ratio,
+            latest['commonStock'] <= prior['commonStock'],
+            latest['grossProfitRatio'] > prior['grossProfitRatio'],
+            asset_turnover > prior_asset_turnover,
+        ))
+        return signals.astype(np.int8)
+
+    def calculate_piotroski_batch(self, universe) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        F-Score for a whole universe of financials dicts (same shape as the input of
+        calculate_piotroski_f_score). Reading the dicts costs about as much as the scalar
+        loop; the vectorized signals pay off on pre-packed columns (calculate_piotroski_packed).
+        Returns (scores, signals, valid): an (N,) score vector, the (N, 9) signal matrix
+        and the data-sufficiency mask. Companies with insufficient data score 0 with all
+        signals 0, matching the scalar function.
+        """
+        return self.calculate_piotroski_packed(*self.pack_piotroski_inputs(universe))
+
+    def calculate_piotroski_packed(self, latest: dict, prior: dict, valid: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        F-Score from already packed columns, e.g. read from a FundamentalsStore.
+        Returns (scores, signals, valid) like calculate_piotroski_batch.
+        """
+        signals = self.piotroski_signals(latest, prior)
+        signals[~valid] = 0
+        scores = signals.sum(axis=1, dtype=np.int64)
+        return scores, signals, valid
+
+    def _insufficient_peers(self, stats: SectorStats) -> bool:
+        return len(stats) < stats.min_size
+
+    def _investor_details(self, stats: SectorStats, model: dict, sector: str | None, score: int, coverage: float,
+                          oriented: np.ndarray, downgrade: bool = False) -> dict:
+        factors = {
+            name: round(float(oriented[FACTOR_INDEX[name]]), 2)
+            for _, group in model.values() for name, _ in group
+            if not np.isnan(oriented[FACTOR_INDEX[name]])
+        }
+        confidence = _confidence(coverage, downgrade)
+        if self._insufficient_peers(stats) or not factors:
+            reason = "insufficient peers" if self._insufficient_peers(stats) else "insufficient data"
+            return {"score": None, "confidence": confidence, "coverage": round(float(coverage), 2),
+                    "factors": factors, "summary": f"Not scored: {reason}."}
+        ranked = sorted(factors, key=factors.get)
+        peer_group = stats.peer_group(sector)
+        peers = f"{peer_group} peers" if peer_group else "the universe"
+        summary = f"{score}/100 relative to {peers} ({confidence} confidence)."
+        if len(ranked) >= 4:
+            summary += (f" Strongest: {', '.join(FACTOR_LABELS[f] for f in ranked[:-3:-1])}."
+                        f" Weakest: {', '.join(FACTOR_LABELS[f] for f in ranked[:2])}.")
+        return {"score": score, "confidence": confidence, "coverage": round(float(coverage), 2),
+                "factors": factors, "summary": summary}
+
+    def score_factors(self, sector: str | None, factors: np.ndarray, years: int) -> dict:
+        """
+        Value and Growth details of a factor vector against the current sector index.
+        A score is None (summary "Not scored: ...") while the index holds fewer than
+        SECTOR_MIN_SIZE companies or when none of the model's factors could be ranked.
+        """
+        self._reload_index()
+        stats = self.sector_stats
+        scaled = stats.normalize(sector, factors)[None, :]
+        return self._score_details(stats, sector, _composite(scaled, VALUE_MODEL), _composite(scaled, GROWTH_MODEL),
+                                   0, years)
+
+    def _score_details(self, stats: SectorStats, sector: str | None, value: tuple, growth: tuple, i: int,
+                       years: int) -> dict:
+        """score_factors' result for row i of the _composite outputs `value` and `growth`."""
+        value_details = self._investor_details(stats, VALUE_MODEL, sector, int(value[0][i]), value[1][i], value[2][i])
+        growth_details = self._investor_details(stats, GROWTH_MODEL, sector, int(growth[0][i]), growth[1][i],
+                                                growth[2][i], downgrade=years < 3)
+        growth_details["years"] = years
+        return {"value": value_details, "growth": growth_details}
+
+    def calculate_investor_scores(self, report: dict, piotroski: int = None) -> dict:
+        """
+        Value and Growth scores of a report, each relative to the company's sector in
+        the precomputed index (which serving never changes).
+        Returns {"value": details, "growth": details} with score (None when it cannot
+        be ranked), confidence, coverage, the oriented 0..1 factors and a one-line summary.
+        """
+        financials = report.get("raw_financials") or {}
+        sector = report["company"].get("sector") or None
+        factors = factor_values(financials, report["fundamentals"]["ratios"], piotroski)
+        return self.score_factors(sector, factors, growth_years(financials))
+
+    def calculate_value_investor_score(self, financials: dict, ratios: dict, sector: str = None,
+                                       piotroski: int = None) -> tuple[int | None, dict]:
+        """
+        Value score (0-100, or None when it cannot be ranked) of a company against the
+        current sector index. Returns the score and its details.
+        """
+        details = self.score_factors(sector, factor_values(financials, ratios, piotroski), growth_years(financials))["value"]
+        return details["score"], details
+
+    def calculate_growth_investor_score(self, financials: dict, ratios: dict, sector: str = None) -> tuple[int | None, dict]:
+        """
+        Growth score (0-100, or None when it cannot be ranked) of a company against the
+        current sector index. Returns the score and its details.
+        """
+        details = self.score_factors(sector, factor_values(financials, ratios), growth_years(financials))["growth"]
+        return details["score"], details
+
+    def rescore_universe(self, tickers: list[str], sectors: list[str | None], factors: np.ndarray,
+                         years: np.ndarray = None, details: bool = False) -> dict:
+        """
+        Scores N companies in one vectorized pass from their (N, len(FACTORS)) matrix,
+        after replacing their rows in the sector index (this is how the index is built).
+        Returns arrays keyed value, growth, value_confidence and growth_confidence; the
+        scores are floats with NaN where score_factors would return None. With details
+        (which needs years) there is also "details": score_factors' result per company.
+        """
+        stats = self.sector_stats
+        stats.update_many(tickers, sectors, factors)
+        scaled = stats.normalize_many(sectors, factors)
+        value_composite = value, value_coverage, _ = _composite(scaled, VALUE_MODEL)
+        growth_composite = growth, growth_coverage, _ = _composite(scaled, GROWTH_MODEL)
+        downgrade = np.zeros(len(tickers), dtype=bool) if years is None else np.asarray(years) < 3
+        enough_peers = not self._insufficient_peers(stats)
+        result = {
+            "value": np.where(enough_peers & (value_coverage > 0), value, np.nan),
+            "growth": np.where(enough_peers & (growth_coverage > 0), growth, np.nan),
+            "value_confidence": np.array([_confidence(c) for c in value_coverage]),
+            "growth_confidence": np.array([_confidence(c, d) for c, d in zip(growth_coverage, downgrade)]),
+        }
+        if details:
+            result["details"] = [self._score_details(stats, sector, value_composite, growth_composite, i, int(years[i]))
+                                 for i, sector in enumerate(sectors)]
+        return result
@@ -0,0 +1,280 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+# Raw inputs of the Value and Growth scores, in column order. Valuation multiples are
+# stored inverted (earnings yield, book-to-price, EBIT/EV) so a loss-maker ranks as the
+# most expensive rather than the cheapest company in its sector.
+FACTORS = (
+    "earningsYield",
+    "bookToPrice",
+    "ebitToEv",
+    "fcfYield",
+    "roe",
+    "roa",
+    "grossMarginVolatility",
+    "piotroskiF",
+    "leverage",
+    "interestCoverage",
+    "shareIssuance",
+    "revenueCagr",
+    "epsCagr",
+    "ocfCagr",
+    "grossMarginExpansion",
+    "operatingMarginExpansion",
+    "roicTrend",
+    "revenueDispersion",
+)
+FACTOR_INDEX = {name: i for i, name in enumerate(FACTORS)}
+
+# The factors that move with the share price; everything else only changes with new statements
+PRICE_FACTORS = ("earningsYield", "bookToPrice", "ebitToEv", "fcfYield")
+PRICE_COLUMNS = tuple(FACTOR_INDEX[name] for name in PRICE_FACTORS)
+
+# Percentiles kept per sector and factor; 10 and 90 are the winsorization bounds
+DECILES = np.arange(0, 101, 10)
+
+UNIVERSE = "*"
+
+def _column(rows: list, field: str) -> np.ndarray:
+    return np.array([row.get(field, np.nan) if row.get(field) is not None else np.nan for row in rows], dtype=np.float64)
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator != 0, numerator / denominator, np.nan)
+
+def _inverse(multiple) -> float:
+    # 0 is how DataService reports a missing ratio
+    return 1.0 / multiple if multiple else np.nan
+
+def _cagr(series: np.ndarray, years: int) -> float:
+    """Compound annual growth from series[years] to series[0] (newest first); needs both positive."""
+    if years < 1 or len(series) <= years:
+        return np.nan
+    start, end = series[years], series[0]
+    if not (start > 0 and end > 0):
+        return np.nan
+    return (end / start) ** (1 / years) - 1
+
+def growth_years(financials: dict) -> int:
+    """Years spanned by the growth window: 3 when four annual statements exist, else 2, else 0."""
+    n = min(len(financials.get(s) or []) for s in ("income_statement", "balance_sheet", "cash_flow_statement"))
+    return 3 if n >= 4 else 2 if n >= 3 else 0
+
+def price_factor_values(ratios: dict) -> np.ndarray:
+    """The PRICE_FACTORS of a report's ratios, for repricing a company without its statements."""
+    return np.array([
+        _inverse(ratios.get("pe")),
+        _inverse(ratios.get("pb")),
+        _inverse(ratios.get("evEbit")),
+        ratios.get("fcfYield") if ratios.get("fcfYield") else np.nan,
+    ])
+
+def factor_values(financials: dict, ratios: dict, piotroski: int | None = None) -> np.ndarray:
+    """
+    The FACTORS vector of one company from its annual statements (newest first, as
+    returned by the adapters) and the report's ratios. Unavailable factors are NaN.
+    """
+    income = financials.get("income_statement") or []
+    balance = financials.get("balance_sheet") or []
+    cash_flow = financials.get("cash_flow_statement") or []
+    n = min(len(income), len(balance), len(cash_flow))
+    income, balance, cash_flow = income[:n], balance[:n], cash_flow[:n]
+    years = growth_years(financials)
+    values = np.full(len(FACTORS), np.nan)
+
+    def put(name, value):
+        values[FACTOR_INDEX[name]] = value
+
+    values[list(PRICE_COLUMNS)] = price_factor_values(ratios)
+    put("roe", ratios.get("roe") if ratios.get("roe") else np.nan)
+    put("roa", ratios.get("roa") if ratios.get("roa") else np.nan)
+    put("piotroskiF", np.nan if piotroski is None else piotroski)
+    if n == 0:
+        return values
+
+    revenue = _column(income, "revenue")
+    gross_margin = _column(income, "grossProfitRatio")
+    operating_margin = _ratio(_column(income, "operatingIncome"), revenue)
+    total_assets = _column(balance, "totalAssets")
+    shares = _column(income, "weightedAverageShsOutDil")
+    if np.isnan(shares).all():
+        shares = _column(balance, "commonStock")
+    eps = _column(income, "eps")
+    if np.isnan(eps).all():
+        eps = _ratio(_column(income, "netIncome"), shares)
+    invested = total_assets - _column(balance, "totalCurrentLiabilities")
+    roic = _ratio(_column(income, "operatingIncome") * (1 - 0.21), invested)
+
+    put("leverage", _ratio(_column(balance, "longTermDebt"), total_assets)[0])
+    put("interestCoverage", _ratio(_column(income, "operatingIncome"), _column(income, "interestExpense"))[0])
+    if n >= 2:
+        put("grossMarginVolatility", np.nanstd(gross_margin) if np.isfinite(gross_margin).sum() >= 2 else np.nan)
+    if years:
+        put("shareIssuance", _cagr(shares, years))
+        put("revenueCagr", _cagr(revenue, years))
+        put("epsCagr", _cagr(eps, years))
+        put("ocfCagr", _cagr(_column(cash_flow, "operatingCashFlow"), years))
+        put("grossMarginExpansion", gross_margin[0] - gross_margin[years])
+        put("operatingMarginExpansion", operating_margin[0] - operating_margin[years])
+        put("roicTrend", roic[0] - roic[years])
+        growth = _ratio(revenue[:-1], revenue[1:]) - 1
+        put("revenueDispersion", np.nanstd(growth[:years]) if np.isfinite(growth[:years]).sum() >= 2 else np.nan)
+    return values
+
+class SectorStats:
+    """
+    Per-sector distribution index of the FACTORS over the scored universe.
+
+    Each ticker's latest factor vector is kept; per sector (and for the universe as a
+    whole) the decile table of every factor is computed lazily and cached. A changed
+    sector is recomputed once its membership has moved by 10%, or otherwise at most
+    every `refresh_interval` seconds (SECTOR_STATS_REFRESH). Normalizing one company
+    is then a lookup of its sector's 10th/90th percentiles; normalize_many does a
+    whole universe in one vectorized pass.
+
+    Factors with fewer than `min_size` (SECTOR_MIN_SIZE) values in a sector fall back
+    to the universe bounds. With `by_sector` off (SECTOR_NORMALIZATION=false) every
+    company is compared against the whole universe.
+    """
+
+    def __init__(self, by_sector: bool = None, min_size: int = None, refresh_interval: float = None):
+        self.by_sector = by_sector if by_sector is not None else os.getenv("SECTOR_NORMALIZATION", "true").lower() == "true"
+        self.min_size = min_size or int(os.getenv("SECTOR_MIN_SIZE", "5"))
+        self.refresh_interval = refresh_interval if refresh_interval is not None else float(os.getenv("SECTOR_STATS_REFRESH", "60"))
+        self._lock = threading.RLock()
+        self._rows: dict[str, tuple[str, np.ndarray]] = {} # ticker -> (sector, factors)
+        self._members: dict[str, set[str]] = {UNIVERSE: set()}
+        self._tables: dict[str, np.ndarray] = {} # sector -> (len(DECILES), len(FACTORS))
+        self._computed_at: dict[str, float] = {}
+        self._computed_size: dict[str, int] = {}
+        self._dirty: set[str] = set()
+        self.recomputes = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._rows)
+
+    def _key(self, sector: str | None) -> str:
+        return (sector or "Unknown") if self.by_sector else UNIVERSE
+
+    def update(self, ticker: str, sector: str | None, factors: np.ndarray):
+        """Adds or replaces a company's factors; the affected tables are refreshed lazily."""
+        key = self._key(sector)
+        ticker = ticker.upper()
+        with self._lock:
+            previous = self._rows.get(ticker)
+            if previous is not None:
+                if previous[0] == key and np.array_equal(previous[1], factors, equal_nan=True):
+                    return
+                self._members[previous[0]].discard(ticker)
+                self._dirty.add(previous[0])
+            self._rows[ticker] = (key, np.asarray(factors, dtype=np.float64))
+            self._members.setdefault(key, set()).add(ticker)
+            self._members[UNIVERSE].add(ticker)
+            self._dirty.update((key, UNIVERSE))
+
+    def update_many(self, tickers: list[str], sectors: list[str | None], matrix: np.ndarray):
+        with self._lock:
+            for ticker, sector, factors in zip(tickers, sectors, matrix):
+                self.update(ticker, sector, factors)
+
+    def remove(self, ticker: str):
+        """Drops a company that left the universe."""
+        with self._lock:
+            previous = self._rows.pop(ticker.upper(), None)
+            if previous is not None:
+                self._members[previous[0]].discard(ticker.upper())
+                self._members[UNIVERSE].discard(ticker.upper())
+                self._dirty.update((previous[0], UNIVERSE))
+
+    def peer_group(self, sector: str | None) -> str | None:
+        """The sector whose own deciles normalize a company, or None when it is ranked against the universe."""
+        key = self._key(sector)
+        with self._lock:
+            return key if key != UNIVERSE and len(self._members.get(key) or ()) >= self.min_size else None
+
+    def _table(self, key: str) -> np.ndarray:
+        table = self._tables.get(key)
+        members = self._members.get(key) or ()
+        if key in self._dirty:
+            # Membership moved by 10% or more: refresh now; changed rows alone wait for the interval
+            size = self._computed_size.get(key, 0)
+            grown = abs(len(members) - size) >= max(1, size // 10)
+            stale = grown or time.monotonic() - self._computed_at.get(key, -np.inf) >= self.refresh_interval
+        else:
+            stale = False
+        if table is None or stale:
+            if members:
+                matrix = np.vstack([self._rows[t][1] for t in members])
+                counts = np.isfinite(matrix).sum(axis=0)
+                with np.errstate(all="ignore"):
+                    table = np.full((len(DECILES), len(FACTORS)), np.nan)
+                    has = counts > 0
+                    table[:, has] = np.nanpercentile(matrix[:, has], DECILES, axis=0)
+                table[:, counts < (self.min_size if key != UNIVERSE else 2)] = np.nan
+            else:
+                table = np.full((len(DECILES), len(FACTORS)), np.nan)
+            self._tables[key] = table
+            self._computed_at[key] = time.monotonic()
+            self._computed_size[key] = len(members)
+            self._dirty.discard(key)
+            self.recomputes += 1
+        return table
+
+    def quantiles(self, sector: str | None) -> np.ndarray:
+        """Decile table (rows 0, 10, ..., 100th percentile; columns FACTORS) used for a sector."""
+        with self._lock:
+            table = self._table(self._key(sector))
+            universe = self._table(UNIVERSE)
+        return np.where(np.isnan(table), universe, table)
+
+    def bounds(self, sector: str | None) -> tuple[np.ndarray, np.ndarray]:
+        """Winsorization bounds (10th and 90th percentile) per factor for a sector."""
+        table = self.quantiles(sector)
+        return table[1], table[-2]
+
+    def normalize_many(self, sectors: list[str | None], matrix: np.ndarray) -> np.ndarray:
+        """
+        Winsorizes each row at its sector's deciles and min-max scales it to 0..1.
+        NaN stays NaN (factor missing or no distribution to compare against); a factor
+        with no spread in its sector scales to 0.5.
+        """
+        keys = [self._key(s) for s in sectors]
+        unique = {key: i for i, key in enumerate(dict.fromkeys(keys))}
+        inverse = np.array([unique[key] for key in keys], dtype=np.int64)
+        bounds = [self.bounds(key) for key in unique]
+        low = np.vstack([b[0] for b in bounds] or [np.empty((0, len(FACTORS)))])[inverse]
+        high = np.vstack([b[1] for b in bounds] or [np.empty((0, len(FACTORS)))])[inverse]
+        span = high - low
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scaled = np.where(span > 0, (np.clip(matrix, low, high) - low) / span, 0.5)
+        return np.where(np.isnan(matrix) | np.isnan(span), np.nan, scaled)
+
+    def normalize(self, sector: str | None, factors: np.ndarray) -> np.ndarray:
+        return self.normalize_many([sector], np.asarray(factors)[None, :])[0]
+
+    def save(self, path: str):
+        """
+        Writes the index to path (an .npz archive) through a temporary file and a rename,
+        so processes reloading it never read a half-written file.
+        """
+        with self._lock:
+            tickers = list(self._rows)
+            sectors = [self._rows[t][0] for t in tickers]
+            matrix = np.vstack([self._rows[t][1] for t in tickers]) if tickers else np.empty((0, len(FACTORS)))
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, tickers=np.array(tickers, dtype=str), sectors=np.array(sectors, dtype=str), factors=matrix,
+                     names=np.array(FACTORS, dtype=str))
+        os.replace(tmp, path)
+
+    def load(self, path: str):
+        """Adds the companies saved by save(); files written with a different FACTORS list are ignored."""
+        with np.load(path) as data:
+            if tuple(data["names"].tolist()) != FACTORS:
+                print(f"Ignoring sector stats at {path}: saved with different factors")
+                return
+            self.update_many(data["tickers"].tolist(), data["sectors"].tolist(), data["factors"])
@@ -0,0 +1,224 @@
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.services.cache_service import ReportCache
+from app.services.data_adapter import create_adapter
+from app.services.data_service import DataService
+from app.services.fmp_adapter import FMPAdapter
+from app.services.report_service import ReportService
+from app.services.score_service import ScoreService
+from app.services.sector_stats import PRICE_COLUMNS, factor_values, growth_years, price_factor_values
+
+# Report keys that are rebuilt on every refresh rather than kept in the state file
+TRANSIENT_KEYS = ("raw_financials", "timings")
+
+STATEMENTS = tuple(FMPAdapter.STATEMENTS)
+
+def statement_fingerprint(financials: dict) -> str:
+    """Stable hash of a get_financials result: changes only when a statement does."""
+    payload = json.dumps(financials, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def statements_status(financials: dict) -> str:
+    """
+    "ok" when every statement came back as a non-empty list, "missing" when all came back
+    as empty lists (the provider's answer for an unknown symbol), "partial" when some are
+    empty and "error" when any is not a list at all (adapters return {} on a failed call).
+    """
+    statements = [financials.get(name) for name in STATEMENTS]
+    if any(not isinstance(rows, list) for rows in statements):
+        return "error"
+    if not any(statements):
+        return "missing"
+    return "ok" if all(statements) else "partial"
+
+def _encode_factors(factors: np.ndarray) -> list:
+    return [None if np.isnan(v) else float(v) for v in factors]
+
+def _decode_factors(values: list) -> np.ndarray:
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+class UniverseRefresher:
+    """
+    Refreshes the reports of a whole ticker universe, e.g. nightly.
+
+    For every ticker the statements are fetched and fingerprinted. Companies whose
+    statements changed since the last run (or that are new) get a full rebuild:
+    every adapter call, Piotroski and factor extraction. The rest, usually almost
+    all of them, are only repriced from one bulk quote request (DataService.reprice)
+    and keep their stored F-Score and statement factors. Value and Growth scores are
+    then recomputed for everyone against the updated sector index, since prices move
+    every company's valuation rank.
+
+    Fingerprints, quotes and reports are kept in a JSON state file (UNIVERSE_STATE_PATH)
+    between runs; refreshed reports are also written to the report cache, and the
+    sector index to SECTOR_STATS_PATH, which the web processes rank reports against.
+    """
+
+    def __init__(self, report_service: ReportService, state_path: str = None, workers: int = None):
+        self.report_service = report_service
+        self.data_service = report_service.data_service
+        self.score_service = report_service.score_service
+        self.state_path = state_path or os.getenv("UNIVERSE_STATE_PATH", "data/universe_state.json")
+        self.workers = workers or int(os.getenv("REFRESH_WORKERS", "16"))
+        self.state: dict[str, dict] = self._load_state()
+
+    def _load_state(self) -> dict[str, dict]:
+        if not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                return json.load(f).get("tickers", {})
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable universe state at {self.state_path}: {e}")
+            return {}
+
+    def _save_state(self):
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.state_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"tickers": self.state}, f, separators=(",", ":"))
+        os.replace(tmp, self.state_path)
+
+    def _refresh_one(self, ticker: str, quote: dict) -> tuple[str, dict | None]:
+        """
+        Returns ("rescored" | "repriced" | "missing" | "failed", state entry). Only a
+        definitive not-found is "missing"; on a failed or incomplete fetch a ticker keeps
+        its previous entry rather than being rebuilt from empty statements.
+        """
+        financials = self.data_service.adapter.get_financials(ticker)
+        status = statements_status(financials)
+        entry = self.state.get(ticker)
+        if status == "missing":
+            return "missing", None
+        if status == "error" or (status == "partial" and entry is not None):
+            print(f"Incomplete statements for {ticker} ({status}); keeping its previous report")
+            return "failed", entry
+        fingerprint = statement_fingerprint(financials)
+
+        if entry is not None and entry["fingerprint"] == fingerprint and quote:
+            report = DataService.reprice(entry["report"], quote, entry["quote"])
+            factors = _decode_factors(entry["factors"])
+            factors[list(PRICE_COLUMNS)] = price_factor_values(report["fundamentals"]["ratios"])
+            report["raw_financials"] = financials
+            return "repriced", dict(entry, quote=quote, report=report, factors=_encode_factors(factors))
+
+        report = self.data_service.get_full_report_data(ticker, financials=financials)
+        # The statements exist, so no profile or a fetch past the deadline is an upstream failure
+        if report is None or report["partial"]:
+            print(f"Incomplete report for {ticker}; keeping its previous report")
+            return "failed", entry
+        piotroski, _ = self.score_service.calculate_piotroski_f_score(report.get("raw_financials") or {})
+        report["scores"]["piotroskiF"] = piotroski
+        factors = factor_values(report.get("raw_financials") or {}, report["fundamentals"]["ratios"], piotroski)
+        return "rescored", {
+            "fingerprint": fingerprint,
+            "quote": quote,
+            "report": report,
+            "factors": _encode_factors(factors),
+            "years": growth_years(report.get("raw_financials") or {}),
+        }
+
+    def refresh(self, tickers: list[str] = None) -> dict:
+        """
+        Refreshes `tickers` (default: every ticker in the state file) and returns a
+        summary with the rescored, repriced, missing and failed counts and the seconds taken.
+        """
+        started = time.perf_counter()
+        # This process writes the index: never swap in the saved file halfway through the run
+        with self.score_service.frozen_index():
+            summary = self._refresh(tickers)
+        summary["seconds"] = round(time.perf_counter() - started, 2)
+        return summary
+
+    def _refresh(self, tickers: list[str] = None) -> dict:
+        tickers = list(dict.fromkeys(t.upper() for t in (tickers if tickers is not None else self.state)))
+        quotes = self.data_service.adapter.get_prices_many(tickers) if tickers else {}
+        summary = {"tickers": len(tickers), "rescored": 0, "repriced": 0, "missing": 0, "failed": 0}
+        entries, kept = {}, set()
+
+        def one(ticker):
+            try:
+                return ticker, *self._refresh_one(ticker, quotes.get(ticker) or {})
+            except Exception as e:
+                print(f"Error refreshing {ticker}: {e}")
+                return ticker, "failed", self.state.get(ticker)
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="universe-refresh") as executor:
+            for ticker, outcome, entry in executor.map(one, tickers):
+                summary[outcome] += 1
+                if outcome == "missing":
+                    self.state.pop(ticker, None)
+                    self.score_service.sector_stats.remove(ticker)
+                if entry is not None:
+                    entries[ticker] = entry
+                if outcome == "failed":
+                    kept.add(ticker)
+
+        # One vectorized pass updates the index for the whole universe and ranks every company
+        # against it. Failed tickers stay in the index with their last good factors but keep
+        # their stored report.
+        indexed = list(entries)
+        details = []
+        if indexed:
+            details = self.score_service.rescore_universe(
+                indexed,
+                [entries[t]["report"]["company"].get("sector") or None for t in indexed],
+                np.vstack([_decode_factors(entries[t]["factors"]) for t in indexed]),
+                np.array([entries[t]["years"] for t in indexed]),
+                details=True,
+            )["details"]
+
+        as_of = datetime.date.today().isoformat()
+        for ticker, investor in zip(indexed, details):
+            if ticker in kept:
+                continue
+            entry = entries[ticker]
+            report = entry["report"]
+            report["scores"]["valueInvestor"] = investor["value"]["score"]
+            report["scores"]["growthInvestor"] = investor["growth"]["score"]
+            report["explain"]["value"] = investor["value"]["summary"]
+            report["explain"]["growth"] = investor["growth"]["summary"]
+            if self.report_service.cache is not None:
+                self.report_service.cache.set(ticker, as_of, report)
+            entry["report"] = {key: value for key, value in report.items() if key not in TRANSIENT_KEYS}
+            self.state[ticker] = entry
+
+        self._save_state()
+        self.score_service.save_index()
+        return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m app.services.universe_refresh",
+        description="Refresh a ticker universe, rescoring only companies whose statements changed.",
+    )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--tickers", nargs="+", help="tickers to refresh")
+    source.add_argument("--tickers-file", help="file with one ticker per line")
+    parser.add_argument("--state", default=None, help="state file (default: UNIVERSE_STATE_PATH or data/universe_state.json)")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    tickers = args.tickers
+    if args.tickers_file:
+        with open(args.tickers_file, encoding="utf-8") as f:
+            tickers = [line.strip() for line in f if line.strip()]
+
+    report_service = ReportService(DataService(create_adapter()), ScoreService(), cache=ReportCache())
+    refresher = UniverseRefresher(report_service, state_path=args.state, workers=args.workers)
+    print(json.dumps(refresher.refresh(tickers)))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+"""
+Regression gate for ./run_benchmarks.sh: compares a run's pytest-benchmark JSON with
+the committed baseline. Each benchmark is compared by its extra_info["calibrated"]
+ratio (see the `calibrated` fixture in conftest.py), not by its absolute time, so the
+gate holds on a busy runner and tolerates a different machine within the threshold.
+
+    python -m benchmarks.compare benchmarks/baseline.json run.json --max-regression 50
+
+Exits 1 when a benchmark's ratio grew by more than --max-regression percent, or when a
+benchmark in the run has no baseline entry (record a new one with ./run_benchmarks.sh save).
+"""
+import argparse
+import json
+import sys
+
+def load_ratios(path: str) -> dict[str, float]:
+    """{benchmark fullname: calibrated ratio} from a --benchmark-json file."""
+    with open(path) as f:
+        benchmarks = json.load(f)["benchmarks"]
+    return {b["fullname"]: b["extra_info"]["calibrated"] for b in benchmarks if "calibrated" in b["extra_info"]}
+
+def compare(baseline: dict[str, float], current: dict[str, float], max_regression: float) -> list[str]:
+    """One line per benchmark that regressed or has no baseline; empty when the run passes."""
+    failures = []
+    for name, ratio in sorted(current.items()):
+        if name not in baseline:
+            failures.append(f"{name}: no baseline")
+            continue
+        change = (ratio / baseline[name] - 1) * 100
+        print(f"{name}: {baseline[name]:.4g} -> {ratio:.4g} ({change:+.0f}%)")
+        if change > max_regression:
+            failures.append(f"{name}: {change:+.0f}% (limit +{max_regression:g}%)")
+    return failures
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Fails when benchmarks regressed against the baseline.")
+    parser.add_argument("baseline", help="Baseline --benchmark-json file")
+    parser.add_argument("current", help="--benchmark-json file of the run to check")
+    parser.add_argument("--max-regression", type=float, default=50.0,
+                        help="Allowed growth of a benchmark's calibrated ratio, in percent")
+    args = parser.parse_args(argv)
+
+    failures = compare(load_ratios(args.baseline), load_ratios(args.current), args.max_regression)
+    if failures:
+        print("\nPerformance regressed:\n  " + "\n  ".join(failures), file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
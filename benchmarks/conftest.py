@@ -0,0 +1,112 @@
+"""
+Shared synthetic data for the benchmark suite. Sizes come from BENCH_SIZES
+(comma-separated, default 1,100,1000,10000); everything is seeded so runs are
+comparable with the saved baseline.
+
+Benchmarks time through the `calibrated` fixture, which also records how each one
+compares to a fixed reference workload timed moments apart; that ratio is what the
+regression gate (benchmarks/compare.py) checks.
+"""
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+# The app is imported for the API and template benchmarks; keep it offline.
+os.environ.setdefault("DATA_PROVIDER", "fixture")
+os.environ.setdefault("NEWS_POLL_INTERVAL", "0")
+# ...and away from a sector index saved by a local universe refresh (inherited by the startup subprocesses)
+_SECTOR_STATS_DIR = tempfile.TemporaryDirectory()
+os.environ["SECTOR_STATS_PATH"] = os.path.join(_SECTOR_STATS_DIR.name, "sector_stats.npz")
+
+SIZES = [int(n) for n in os.getenv("BENCH_SIZES", "1,100,1000,10000").split(",") if n.strip()]
+
+# The reference workload: plain dict and list work plus a small NumPy sort, no app code
+REFERENCE_KEYS = [f"k{i}" for i in range(10_000)]
+REFERENCE_TABLE = {k: float(i) for i, k in enumerate(REFERENCE_KEYS)}
+REFERENCE_VALUES = np.random.default_rng(42).random(10_000)
+MIN_ROUNDS = 5
+ROUND_TIME = 0.005
+MAX_ROUNDS = 200
+
+def reference_workload() -> float:
+    total = sum(REFERENCE_TABLE[k] for k in REFERENCE_KEYS)
+    rows = sorted((v, k) for k, v in REFERENCE_TABLE.items() if v % 3)
+    return total + len(rows) + float(np.sort(REFERENCE_VALUES)[0])
+
+def time_reference() -> float:
+    start = time.perf_counter()
+    reference_workload()
+    return time.perf_counter() - start
+
+@pytest.fixture
+def calibrated(benchmark):
+    """
+    calibrated(target, *args, rounds=None, **kwargs) benchmarks target(*args, **kwargs)
+    with the reference workload timed right after every round, and stores the median
+    of the per-round ratios in extra_info["calibrated"]. Absolute times on a shared
+    runner swing by 2x as its load changes; a ratio of two timings taken moments apart
+    barely moves. Fast targets are repeated so a round takes at least ROUND_TIME, and
+    without rounds as many run as fit in about a second.
+    """
+    def run(target, *args, rounds: int = None, **kwargs):
+        start = time.perf_counter()
+        target(*args, **kwargs)
+        elapsed = max(time.perf_counter() - start, 1e-7)
+        iterations = max(1, int(ROUND_TIME / elapsed))
+        if rounds is None:
+            rounds = max(MIN_ROUNDS, min(MAX_ROUNDS, int(1.0 / (elapsed * iterations))))
+        references = []
+        result = benchmark.pedantic(target, args=args, kwargs=kwargs, rounds=rounds, iterations=iterations,
+                                    teardown=lambda *_, **__: references.append(time_reference()))
+        if benchmark.stats:  # None with --benchmark-disable
+            ratios = [t / r for t, r in zip(benchmark.stats.stats.data, references)]
+            benchmark.extra_info["calibrated"] = statistics.median(ratios)
+        return result
+    return run
+
+def make_financials(rng: random.Random, years: int = 5) -> dict:
+    """FMP-shaped statements for one company, newest year first."""
+    income, balance, cash_flow = [], [], []
+    revenue = rng.uniform(1e8, 1e11)
+    for _ in range(years):
+        assets = revenue * rng.uniform(0.8, 2.0)
+        net_income = revenue * rng.uniform(-0.1, 0.25)
+        income.append({
+            "revenue": revenue, "netIncome": net_income, "grossProfitRatio": rng.uniform(0.1, 0.7),
+            "ebitda": revenue * 0.2, "depreciationAndAmortization": revenue * 0.04,
+            "operatingIncome": revenue * 0.15, "interestExpense": revenue * rng.uniform(0, 0.03),
+        })
+        balance.append({
+            "totalAssets": assets, "longTermDebt": assets * rng.uniform(0, 0.5),
+            "totalCurrentAssets": assets * rng.uniform(0.2, 0.5),
+            "totalCurrentLiabilities": assets * rng.uniform(0.1, 0.4),
+            "commonStock": rng.choice((1e6, 1.1e6)),
+        })
+        cash_flow.append({
+            "operatingCashFlow": net_income * rng.uniform(0.5, 1.6), "capitalExpenditure": revenue * 0.05,
+        })
+        revenue /= rng.uniform(0.9, 1.2)
+    return {"income_statement": income, "balance_sheet": balance, "cash_flow_statement": cash_flow}
+
+def make_universe(n: int, seed: int = 42) -> list[dict]:
+    """n companies; about 5% have a single year, so they take the insufficient-data path."""
+    rng = random.Random(seed)
+    return [make_financials(rng, 1 if rng.random() < 0.05 else 5) for _ in range(n)]
+
+def make_tickers(n: int) -> list[str]:
+    return [f"T{i:05d}" for i in range(n)]
+
+@pytest.fixture(params=SIZES, ids=lambda n: f"n={n}")
+def universe(request) -> list[dict]:
+    return make_universe(request.param)
+
+@pytest.fixture(params=SIZES, ids=lambda n: f"n={n}")
+def tickers(request) -> list[str]:
+    return make_tickers(request.param)
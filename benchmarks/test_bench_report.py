@@ -0,0 +1,55 @@
+from unittest.mock import patch
+
+import pytest
+
+from app import create_app
+from app.models.report import Report
+from app.services.data_service import DataService
+from flask import render_template
+from tests.test_data_service import StubAdapter
+
+NEWS = [
+    {"title": f"Test Inc headline {i}", "source": "AP", "publishedAt": "Tue, 03 Sep 2024 10:00:00 GMT",
+     "url": f"https://example.com/news/{i}"}
+    for i in range(5)
+]
+
+def build_report(data_service: DataService, ticker: str) -> dict:
+    report = data_service.get_full_report_data(ticker)
+    report["news"] = NEWS
+    return report
+
+@pytest.fixture(scope="module")
+def app():
+    return create_app()
+
+@pytest.fixture(scope="module")
+def report():
+    return build_report(DataService(StubAdapter(), max_workers=1), "TEST")
+
+def test_get_full_report_data_sequential(calibrated, tickers):
+    data_service = DataService(StubAdapter(), max_workers=1)
+    reports = calibrated(lambda: [data_service.get_full_report_data(t) for t in tickers])
+    assert len(reports) == len(tickers)
+
+def test_get_full_report_data_concurrent(calibrated, tickers):
+    data_service = DataService(StubAdapter(), max_workers=4)
+    reports = calibrated(lambda: [data_service.get_full_report_data(t) for t in tickers])
+    assert all(reports)
+
+def test_report_model_validation(calibrated, tickers):
+    data_service = DataService(StubAdapter(), max_workers=1)
+    reports = [build_report(data_service, t) for t in tickers]
+    models = calibrated(lambda: [Report.model_validate(r) for r in reports])
+    assert models[0].ticker == tickers[0]
+
+def test_api_report_json(calibrated, app, report):
+    client = app.test_client()
+    with patch("app.routes._generate_report_data", return_value=report):
+        response = calibrated(client.get, "/api/report/TEST")
+    assert response.status_code == 200
+
+def test_render_report_html(calibrated, app, report):
+    with app.test_request_context("/report/TEST"):
+        html = calibrated(render_template, "report.html", report=report)
+    assert "Test Inc" in html
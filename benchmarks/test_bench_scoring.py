@@ -0,0 +1,28 @@
+from app.services.score_service import ScoreService
+from app.services.sector_stats import SectorStats
+from benchmarks.conftest import make_universe
+
+score_service = ScoreService(SectorStats())
+
+def test_piotroski_single(calibrated):
+    financials = make_universe(1)[0]
+    score, _ = calibrated(score_service.calculate_piotroski_f_score, financials)
+    assert 0 <= score <= 9
+
+def test_piotroski_loop(calibrated, universe):
+    scores = calibrated(lambda: [score_service.calculate_piotroski_f_score(f)[0] for f in universe])
+    assert len(scores) == len(universe)
+
+def test_piotroski_batch(calibrated, universe):
+    scores, _, _ = calibrated(score_service.calculate_piotroski_batch, universe)
+    assert scores.tolist() == [score_service.calculate_piotroski_f_score(f)[0] for f in universe]
+
+def test_piotroski_pack(calibrated, universe):
+    latest, _, valid = calibrated(score_service.pack_piotroski_inputs, universe)
+    assert len(valid) == len(latest["revenue"]) == len(universe)
+
+def test_piotroski_packed(calibrated, universe):
+    """Signals and scores only, from columns packed ahead of time (as the fundamentals store does)."""
+    packed = score_service.pack_piotroski_inputs(universe)
+    scores, _, _ = calibrated(score_service.calculate_piotroski_packed, *packed)
+    assert len(scores) == len(universe)
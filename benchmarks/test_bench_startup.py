@@ -0,0 +1,33 @@
+"""
+Cold start: what a fresh gunicorn worker, test process or CLI pays before its first
+request. Each round runs a new interpreter, so these include interpreter startup.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_python(code: str):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    env.pop("FMP_API_KEY", None)
+    subprocess.run([sys.executable, "-c", code], env=env, cwd=ROOT, check=True)
+
+def test_interpreter_baseline(calibrated):
+    calibrated(run_python, "pass", rounds=10)
+
+@pytest.mark.parametrize("code", [
+    "import app",
+    "from app import create_app; create_app()",
+    "from app import create_app; create_app().test_client().get('/health')",
+], ids=["import", "create_app", "first_request"])
+def test_startup(calibrated, code):
+    calibrated(run_python, code, rounds=10)
+
+def test_first_report_request(calibrated):
+    """Startup plus building the whole service graph for one report."""
+    code = ("from app import create_app; "
+            "create_app({'DATA_PROVIDER': 'fixture'}).test_client().get('/api/report/ACME')")
+    calibrated(run_python, code, rounds=5)
@@ -0,0 +1,74 @@
+"""
+Production serving: gunicorn with threaded workers (gunicorn picks this file up from
+the working directory). Every route is I/O-bound (FMP, Ollama, Redis, news feeds), so
+each worker process runs WEB_THREADS request threads.
+
+    gunicorn "app:create_app()"
+
+Each worker has its own in-process caches, news store and PDF_WORKERS render
+processes; Redis (CACHE_URL) is what they share.
+"""
+import multiprocessing
+import os
+import signal
+import threading
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "gthread"
+threads = int(os.getenv("WEB_THREADS", "8"))
+
+# Seconds a silent worker may hang before it is restarted. gthread workers keep
+# heartbeating while requests run, so long SSE streams are not cut off by this.
+timeout = int(os.getenv("WEB_TIMEOUT", "60"))
+# On SIGTERM, seconds in-flight requests get to finish before workers are killed
+graceful_timeout = int(os.getenv("WEB_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("WEB_KEEPALIVE", "5"))
+
+# Recycling drops the in-process caches, so it is off unless asked for
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+# Seconds a worker keeps accepting requests after SIGTERM while /ready answers 503, so
+# load balancers take it out of rotation before its listener closes. Spent out of
+# graceful_timeout, so keep it well below WEB_GRACEFUL_TIMEOUT.
+DRAIN_SECONDS = float(os.getenv("WEB_DRAIN_SECONDS", "5"))
+
+# Services are built lazily after the fork (see app.container), never in the master
+preload_app = False
+accesslog = os.getenv("WEB_ACCESS_LOG", "-") or None
+
+def _services(worker):
+    return getattr(worker.wsgi, "extensions", {}).get("services")
+
+def post_worker_init(worker):
+    """Hooks SIGTERM for draining and builds the report pipeline before the worker accepts requests."""
+    services = _services(worker)
+
+    def drain(sig, frame):
+        # gunicorn's own handler stops the accept loop at once; /ready must turn 503 first
+        if services is not None:
+            services.draining = True
+        timer = threading.Timer(DRAIN_SECONDS, worker.handle_exit, args=(sig, frame))
+        timer.daemon = True
+        timer.start()
+    signal.signal(signal.SIGTERM, drain)
+
+    if os.getenv("WEB_WARMUP", "true").lower() not in ("true", "1", "yes"):
+        return
+    try:
+        services.report_service
+    except Exception as e:
+        worker.log.warning("Warm-up failed, /ready will report it: %s", e)
+
+def worker_int(worker):
+    """Quick stop (SIGINT/SIGQUIT): whatever is still served sees /ready draining."""
+    services = _services(worker)
+    if services is not None:
+        services.draining = True
+
+def worker_exit(server, worker):
+    """Graceful stop: runs after the worker has drained its in-flight requests."""
+    services = _services(worker)
+    if services is not None:
+        services.shutdown()
@@ -1,22 +1,52 @@
+import json
 import os
 import requests
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
+from app.services import http_client, metrics
+from app.services.llm_cache import CompletionCache
+from app.services.llm_scheduler import INTERACTIVE, LLMScheduler, get_scheduler
 
 class OllamaLLM:
-    def __init__(self, model: str = None, host: str = None):
+    def __init__(self, model: str = None, host: str = None, scheduler: LLMScheduler = None):
         self.model = model or os.getenv("OLLAMA_MODEL", "gpt-oss:20b")
         self.host  = host  or os.getenv("OLLAMA_HOST",  "http://localhost:11434")
+        self.scheduler = scheduler or get_scheduler(self.host)
 
     def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         url = f"{self.host}{path}"
-        r = requests.post(url, json=payload, timeout=600)
+        r = http_client.post(url, json=payload, timeout=600)
         if r.status_code >= 400:
             raise requests.HTTPError(f"{r.status_code} {r.reason} for {url}\n{r.text}", response=r)
         return r.json()
 
-    def call(self, messages: List[Dict[str, str]], **gen_options) -> Dict[str, str]:
+    @staticmethod
+    def _prompt(messages: List[Dict[str, str]]) -> str:
         prompt = "\n".join(m.get("content", "") for m in messages if m.get("content"))
-        prompt = prompt.encode("utf-8", "replace").decode("utf-8")
-        payload = {"model": self.model, "prompt": prompt, "stream": False, "options": gen_options or {}}
-        data = self._post("/api/generate", payload)
+        return prompt.encode("utf-8", "replace").decode("utf-8")
+
+    def call(self, messages: List[Dict[str, str]], priority: int = INTERACTIVE, **gen_options) -> Dict[str, str]:
+        payload = {"model": self.model, "prompt": self._prompt(messages), "stream": False, "options": gen_options or {}}
+        key = CompletionCache.key(payload["model"], payload["prompt"], payload["options"])
+        def generate():
+            with metrics.span("llm.generate"):
+                return self._post("/api/generate", payload)
+        data = self.scheduler.run(key, generate, priority)
         return {"content": data.get("response", "")}
+
+    def call_stream(self, messages: List[Dict[str, str]], priority: int = INTERACTIVE, **gen_options) -> Iterator[str]:
+        """Like call, but yields the completion incrementally from Ollama's chunked JSON lines."""
+        url = f"{self.host}/api/generate"
+        payload = {"model": self.model, "prompt": self._prompt(messages), "stream": True, "options": gen_options or {}}
+        with self.scheduler.slot(priority):
+            r = http_client.post(url, json=payload, timeout=600, stream=True)
+            if r.status_code >= 400:
+                raise requests.HTTPError(f"{r.status_code} {r.reason} for {url}\n{r.text}", response=r)
+            with r:
+                for line in r.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("response"):
+                        yield chunk["response"]
+                    if chunk.get("done"):
+                        break
@@ -0,0 +1,28 @@
+#!/bin/bash
+# Runs the benchmark suite against the committed baseline.
+#   ./run_benchmarks.sh          run and compare with BENCH_BASELINE; fails if a benchmark regressed by more
+#                                than BENCH_MAX_REGRESSION percent (see benchmarks/compare.py)
+#   ./run_benchmarks.sh save     record a new baseline from a clean checkout (commit the file it writes)
+# Extra arguments are passed to pytest, e.g. ./run_benchmarks.sh -k piotroski
+export PYTHONPATH=.
+BASELINE="${BENCH_BASELINE:-benchmarks/baseline.json}"
+REGRESSION="${BENCH_MAX_REGRESSION:-50}"
+
+if [ "$1" = "save" ]; then
+    shift
+    if [ -n "$(git status --porcelain --untracked-files=no)" ]; then
+        echo "The worktree has uncommitted changes; record the baseline from a clean commit." >&2
+        exit 1
+    fi
+    exec python -m pytest benchmarks --benchmark-only --benchmark-json="$BASELINE" "$@"
+fi
+
+if [ ! -f "$BASELINE" ]; then
+    echo "No baseline at $BASELINE. Record one with './run_benchmarks.sh save' and commit it." >&2
+    exit 1
+fi
+
+RUN=$(mktemp)
+trap 'rm -f "$RUN"' EXIT
+python -m pytest benchmarks --benchmark-only --benchmark-json="$RUN" "$@" || exit $?
+python -m benchmarks.compare "$BASELINE" "$RUN" --max-regression "${REGRESSION%\%}"
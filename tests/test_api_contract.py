@@ -1,5 +1,7 @@
+import gzip
 import unittest
-from unittest.mock import patch
+import zlib
+from unittest.mock import MagicMock, patch
 from app.main import create_app
 from app.models.report import Report
 import json
@@ -64,6 +66,37 @@ class TestApiContract(unittest.TestCase):
         except Exception as e:
             self.fail(f"API response did not match the Report model contract: {e}")
 
+    @patch('app.routes._generate_report_data')
+    def test_api_report_is_slim_and_projectable(self, mock_generate_data):
+        """Test that internal inputs are never serialized and ?fields= limits the payload."""
+        mock_generate_data.return_value = dict(self.mock_report_data, raw_financials={"income_statement": [{}] * 5},
+                                               timings={"total": 1.0})
+        full = self.client.get('/api/report/TEST').get_json()
+        self.assertNotIn("raw_financials", full)
+        self.assertNotIn("timings", full)
+
+        response = self.client.get('/api/report/TEST?fields=scores,fundamentals.ratios.pe,fundamentals.ratios')
+        self.assertEqual(response.get_json(), {
+            "ticker": "TEST",
+            "scores": self.mock_report_data["scores"],
+            "fundamentals": {"ratios": self.mock_report_data["fundamentals"]["ratios"]},
+        })
+        self.assertEqual(self.client.get('/api/report/TEST?fields=raw_financials').status_code, 400)
+        self.assertEqual(self.client.get('/api/report/TEST?fields=scores.nope').status_code, 400)
+
+    @patch('app.routes._generate_report_data')
+    def test_api_report_compression(self, mock_generate_data):
+        """Test that large responses are gzipped for clients that accept it."""
+        mock_generate_data.return_value = self.mock_report_data
+        plain = self.client.get('/api/report/TEST?fields=ticker')
+        self.assertNotIn("Content-Encoding", plain.headers)
+
+        with patch('app.serialization.COMPRESS_MIN_BYTES', 100):
+            response = self.client.get('/api/report/TEST', headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+        Report(**json.loads(gzip.decompress(response.data)))
+
     @patch('app.routes._generate_report_data')
     def test_api_report_not_found(self, mock_generate_data):
         """Test the API's 404 response for an unknown ticker."""
@@ -74,5 +107,68 @@ class TestApiContract(unittest.TestCase):
         response_json = json.loads(response.data)
         self.assertIn('error', response_json)
 
+    def test_batch_reports_stream_ndjson(self):
+        """Test that /api/reports streams one valid record per ticker, with errors inline."""
+        def iter_reports(tickers):
+            yield "TEST", dict(self.mock_report_data), None
+            yield "NOPE", None, None
+            yield "BOOM", None, RuntimeError("upstream failed")
+
+        mock_service = MagicMock()
+        with patch.dict(self.app.extensions["services"].__dict__, report_service=mock_service):
+            mock_service.iter_reports.side_effect = iter_reports
+            response = self.client.post('/api/reports', json={"tickers": ["test", "nope", "boom"]})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.mimetype, 'application/x-ndjson')
+            lines = [json.loads(line) for line in response.data.decode().splitlines()]
+
+        mock_service.iter_reports.assert_called_once_with(["TEST", "NOPE", "BOOM"])
+        self.assertEqual(len(lines), 3)
+        Report(**lines[0])
+        self.assertEqual(lines[1]["ticker"], "NOPE")
+        self.assertIn("error", lines[1])
+        self.assertIn("error", lines[2])
+
+    def test_batch_reports_gzip_stream(self):
+        """Test that batch NDJSON is compressed incrementally and honours fields."""
+        def iter_reports(tickers):
+            for ticker in tickers:
+                yield ticker, dict(self.mock_report_data, ticker=ticker, raw_financials={}), None
+
+        mock_service = MagicMock()
+        with patch.dict(self.app.extensions["services"].__dict__, report_service=mock_service):
+            mock_service.iter_reports.side_effect = iter_reports
+            response = self.client.post('/api/reports', json={"tickers": ["A", "B"], "fields": "scores"},
+                                        headers={"Accept-Encoding": "gzip"})
+            self.assertEqual(response.headers["Content-Encoding"], "gzip")
+            chunks = list(response.response)
+
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        first = decompressor.decompress(chunks[0])
+        self.assertEqual(json.loads(first), {"ticker": "A", "scores": self.mock_report_data["scores"]})
+        lines = (first + b"".join(decompressor.decompress(c) for c in chunks[1:])).decode().splitlines()
+        self.assertEqual([json.loads(line)["ticker"] for line in lines], ["A", "B"])
+        self.assertEqual(self.client.post('/api/reports', json={"tickers": ["A"], "fields": "nope"}).status_code, 400)
+
+    def test_batch_reports_rejects_bad_input(self):
+        """Test that the batch endpoint validates the ticker list."""
+        self.assertEqual(self.client.post('/api/reports', json={"tickers": []}).status_code, 400)
+        self.assertEqual(self.client.post('/api/reports', json={"tickers": ["A"] * 1001}).status_code, 400)
+
+    @patch('app.routes._generate_report_data')
+    def test_explain_stream_sse(self, mock_generate_data):
+        """Test that the explanation endpoint streams SSE events ending with done."""
+        mock_generate_data.return_value = self.mock_report_data
+        mock_service = MagicMock()
+        with patch.dict(self.app.extensions["services"].__dict__, report_service=mock_service):
+            mock_service.stream_explanations.return_value = iter([("piotroski", "Bio "), ("piotroski", "text."), ("cashCow", "- FCF\n")])
+            response = self.client.get('/api/report/TEST/explain')
+            self.assertEqual(response.mimetype, 'text/event-stream')
+            body = response.data.decode()
+
+        events = [block.split("\n") for block in body.strip().split("\n\n")]
+        self.assertEqual([e[0] for e in events], ["event: piotroski", "event: piotroski", "event: cashCow", "event: done"])
+        self.assertEqual(json.loads(events[2][1][len("data: "):]), {"text": "- FCF\n"})
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
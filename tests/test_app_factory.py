@@ -0,0 +1,98 @@
+import json
+import os
+import runpy
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+from app import create_app
+
+# Modules that must only be imported once a request needs them
+HEAVY_MODULES = ("numpy", "redis", "weasyprint", "crewai", "pydantic", "requests")
+
+STARTUP_SCRIPT = f"""
+import json, sys
+from app import create_app
+app = create_app()
+status = app.test_client().get("/health").status_code
+print(json.dumps({{"status": status, "loaded": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+class TestAppFactory(unittest.TestCase):
+
+    def setUp(self):
+        # The default ScoreService loads SECTOR_STATS_PATH; point it at an empty temp dir
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        env = patch.dict(os.environ, {"SECTOR_STATS_PATH": os.path.join(tmp.name, "sector_stats.npz")})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def test_startup_is_lazy_and_needs_no_api_key(self):
+        """Test that create_app in a fresh interpreter builds no services and imports no heavy dependency."""
+        env = {k: v for k, v in os.environ.items() if k not in ("FMP_API_KEY", "DATA_PROVIDER")}
+        env["PYTHONPATH"] = os.getcwd()
+        result = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], env=env, capture_output=True, text=True,
+                                timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        outcome = json.loads(result.stdout.strip().splitlines()[-1])
+        self.assertEqual(outcome, {"status": 200, "loaded": []})
+
+    def test_services_are_built_once_and_can_be_replaced(self):
+        """Test that services are built on first access, shared, and overridable per app."""
+        stub = MagicMock()
+        app = create_app({"DATA_PROVIDER": "fixture"}, report_service=stub)
+        services = app.extensions["services"]
+        self.assertIs(services.report_service, stub)
+        self.assertFalse(services.built("data_service"))
+        self.assertIs(services.data_service, services.data_service)
+        self.assertEqual(type(services.adapter).__name__, "FixtureAdapter")
+        self.assertIsNot(create_app().extensions["services"], services)
+
+    def test_metrics_scrape_builds_no_service(self):
+        """Test that a /metrics scrape leaves every service unbuilt."""
+        app = create_app({"DATA_PROVIDER": "fixture"})
+        services = app.extensions["services"]
+        self.assertEqual(app.test_client().get('/metrics').status_code, 200)
+        self.assertEqual([name for name in ("report_cache", "llm_service", "job_queue", "news_service", "pdf_service")
+                          if services.built(name)], [])
+
+    def test_readiness_and_graceful_shutdown(self):
+        """Test that /ready builds the pipeline, reports failures and turns 503 once the worker drains."""
+        app = create_app({"DATA_PROVIDER": "fixture"}, news_service=MagicMock())
+        client = app.test_client()
+        self.assertEqual(client.get('/ready').get_json(), {"status": "ready"})
+        services = app.extensions["services"]
+        self.assertTrue(services.built("report_service"))
+
+        services.job_queue.submit(["ACME"])
+        services.shutdown()
+        self.assertEqual(client.get('/ready').status_code, 503)
+        self.assertEqual(client.get('/health').status_code, 200)
+        services.news_service.shutdown.assert_called_once()
+        self.assertFalse(services.built("pdf_service"))
+
+        with patch.dict(os.environ, {"FMP_API_KEY": ""}):
+            broken = create_app({"DATA_PROVIDER": "fmp"}).test_client().get('/ready')
+        self.assertEqual(broken.status_code, 503)
+
+    def test_sigterm_turns_ready_503_before_the_worker_stops(self):
+        """Test that the gunicorn SIGTERM hook marks the worker draining and only stops it after WEB_DRAIN_SECONDS."""
+        with patch.dict(os.environ, {"WEB_DRAIN_SECONDS": "0.2", "WEB_WARMUP": "false"}):
+            config = runpy.run_path("gunicorn.conf.py")
+        self.addCleanup(signal.signal, signal.SIGTERM, signal.getsignal(signal.SIGTERM))
+        app = create_app({"DATA_PROVIDER": "fixture"})
+        worker = MagicMock(wsgi=app)
+        config["post_worker_init"](worker)
+
+        signal.getsignal(signal.SIGTERM)(signal.SIGTERM, None)
+        self.assertEqual(app.test_client().get('/ready').get_json(), {"status": "draining"})
+        worker.handle_exit.assert_not_called()
+        time.sleep(0.5)
+        worker.handle_exit.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+from unittest.mock import DEFAULT, patch
+from app.services.data_service import DataService
+from app.services.score_service import ScoreService
+from app.services.sector_stats import SectorStats
+from tests.test_data_service import StubAdapter
+
+AGENTS = ('ResearchAgent', 'DataAgent', 'ScoringAgent', 'WriterAgent')
+
+class TestTickerCrewParallel(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.multiple('app.agents.crew', OllamaLLM=DEFAULT, Crew=DEFAULT, Task=DEFAULT,
+                                 **{name: DEFAULT for name in AGENTS})
+        self.mocks = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mocks['Crew'].return_value.kickoff.return_value = "Summary text"
+        from app.agents.crew import TickerCrew
+        self.TickerCrew = TickerCrew
+
+    def test_graph_runs_services_then_writer(self):
+        """Test that only the writing stage goes through an agent and every stage is timed."""
+        crew = self.TickerCrew("test", mode="parallel", data_service=DataService(StubAdapter(delay=0.05), max_workers=4),
+                               score_service=ScoreService(SectorStats()))
+        result = crew.run()
+
+        self.assertEqual(result["summary"], "Summary text")
+        self.assertEqual(result["report"]["ticker"], "TEST")
+        _, kwargs = self.mocks['Crew'].call_args
+        self.assertEqual(kwargs["agents"], [crew.writer_agent])
+        for stage in ("collect_profile", "collect_financials", "compute_scores", "write_summary", "total"):
+            self.assertIsNotNone(result["timings"][stage])
+        # Profile and financials were fetched side by side, not back to back
+        self.assertLess(result["timings"]["collect"], result["timings"]["collect_profile"] + result["timings"]["collect_financials"])
+        for name in ('ResearchAgent', 'DataAgent', 'ScoringAgent'):
+            self.mocks[name].assert_not_called()
+
+    def test_writer_gets_investor_scores_not_placeholders(self):
+        """Test that Value and Growth are scored before the writer prompt is built."""
+        crew = self.TickerCrew("test", mode="parallel", data_service=DataService(StubAdapter(), max_workers=4),
+                               score_service=ScoreService(SectorStats()))
+        result = crew.run()
+
+        # An empty sector index cannot rank anyone: the writer sees null and why, never 0
+        self.assertIsNone(result["report"]["scores"]["valueInvestor"])
+        self.assertIsNone(result["report"]["scores"]["growthInvestor"])
+        _, kwargs = self.mocks['Task'].call_args
+        self.assertIn('"valueInvestor": null', kwargs["description"])
+        self.assertIn("Not scored: insufficient peers.", kwargs["description"])
+
+    def test_default_data_service_uses_configured_provider(self):
+        """Test that without a data service the crew reads DATA_PROVIDER instead of calling FMP."""
+        with patch.dict('os.environ', {"DATA_PROVIDER": "fixture"}):
+            crew = self.TickerCrew("ACME", mode="parallel", score_service=ScoreService(SectorStats()))
+            result = crew.run()
+        self.assertEqual(type(crew.data_service.adapter).__name__, "FixtureAdapter")
+        self.assertEqual(result["ticker"], "ACME")
+
+    def test_unknown_ticker_skips_writer(self):
+        """Test that a missing profile stops the graph before any LLM work."""
+        crew = self.TickerCrew("nope", mode="parallel", data_service=DataService(StubAdapter(profile=False), max_workers=4),
+                               score_service=ScoreService(SectorStats()))
+        result = crew.run()
+        self.assertIn("error", result)
+        self.mocks['Crew'].return_value.kickoff.assert_not_called()
+
+class TestCrewRuntime(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.multiple('app.agents.crew', OllamaLLM=DEFAULT, Crew=DEFAULT, Task=DEFAULT,
+                                 **{name: DEFAULT for name in AGENTS})
+        self.mocks = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mocks['Crew'].return_value.kickoff.return_value = "Summary text"
+        from app.agents.crew import CrewRuntime
+        self.runtime = CrewRuntime(size=2, mode="parallel", data_service=DataService(StubAdapter(), max_workers=4),
+                                   score_service=ScoreService(SectorStats()))
+
+    def test_agents_built_once(self):
+        """Test that a batch reuses the warm agents instead of rebuilding them per ticker."""
+        results = self.runtime.run_many([f"T{i}" for i in range(6)])
+        self.assertEqual([r["ticker"] for r in results], [f"T{i}" for i in range(6)])
+        self.assertEqual(self.mocks['OllamaLLM'].call_count, 1)
+        self.assertEqual(self.mocks['WriterAgent'].call_count, 2)
+        self.mocks['ResearchAgent'].assert_not_called()
+
+        stats = self.runtime.stats()
+        self.assertEqual(stats["runs"], 6)
+        self.assertIsNotNone(stats["setup_seconds"])
+        self.assertGreater(stats["run_seconds_avg"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
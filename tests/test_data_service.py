@@ -0,0 +1,178 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+import requests
+from app.services.cache_service import ReportCache
+from app.services.data_adapter import FundamentalsAdapter
+from app.services.data_service import DataService
+from app.services.report_service import ReportService
+
+class StubAdapter(FundamentalsAdapter):
+    """Adapter returning canned data after a fixed delay per call."""
+
+    def __init__(self, delay=0.0, profile=True, slow=None):
+        self.delay = delay
+        self.profile = profile
+        self.slow = slow or {}
+
+    def _sleep(self, name):
+        time.sleep(self.slow.get(name, self.delay))
+
+    def get_profile(self, ticker):
+        self._sleep("profile")
+        if not self.profile:
+            return {}
+        return {"name": "Test Inc", "exchange": "NYSE", "industry": "Tech", "sector": "Software", "homepage": "http://test.com"}
+
+    def get_financials(self, ticker):
+        self._sleep("financials")
+        return {
+            "income_statement": [{"revenue": 1000, "netIncome": 100}],
+            "balance_sheet": [{"totalAssets": 2000}],
+            "cash_flow_statement": [{"operatingCashFlow": 150, "capitalExpenditure": 50}],
+        }
+
+    def get_ratios(self, ticker):
+        self._sleep("ratios")
+        return {"peRatioTTM": 20.0}
+
+    def get_prices(self, ticker):
+        self._sleep("prices")
+        return {"marketCap": 10000, "sharesOutstanding": 100}
+
+class TestDataService(unittest.TestCase):
+
+    def test_concurrent_matches_sequential(self):
+        """Test that the concurrent fetch builds the same report as the sequential one."""
+        sequential = DataService(StubAdapter(), max_workers=1).get_full_report_data("test")
+        concurrent = DataService(StubAdapter(), max_workers=4).get_full_report_data("test")
+        for report in (sequential, concurrent):
+            report.pop("timings")
+        self.assertEqual(sequential, concurrent)
+        self.assertEqual(concurrent["fundamentals"]["ratios"]["fcfYield"], 1.0)
+
+    def test_concurrent_fetch_runs_in_parallel(self):
+        """Test that the report costs the slowest call rather than the sum of all calls."""
+        service = DataService(StubAdapter(delay=0.2), max_workers=4)
+        start = time.perf_counter()
+        report = service.get_full_report_data("test")
+        elapsed = time.perf_counter() - start
+        self.assertLess(elapsed, 0.6)
+        for name in DataService.FETCHES:
+            self.assertGreaterEqual(report["timings"][name], 200)
+        self.assertIn("total", report["timings"])
+
+    def test_profile_not_found(self):
+        """Test that a missing profile still short-circuits to None."""
+        for workers in (1, 4):
+            service = DataService(StubAdapter(profile=False), max_workers=workers)
+            self.assertIsNone(service.get_full_report_data("unknown"))
+
+    def test_deadline_returns_partial_report(self):
+        """Test that calls missing the deadline are dropped instead of stalling the report."""
+        service = DataService(StubAdapter(slow={"ratios": 1.0}), max_workers=4, deadline=0.2)
+        start = time.perf_counter()
+        report = service.get_full_report_data("test")
+        self.assertLess(time.perf_counter() - start, 0.8)
+        self.assertIsNone(report["timings"]["ratios"])
+        self.assertEqual(report["fundamentals"]["ratios"]["pe"], 0)
+        self.assertEqual(report["fundamentals"]["ttm"]["revenue"], 1000)
+        self.assertTrue(report["partial"])
+
+    def test_call_finishing_after_the_deadline_keeps_the_report_partial(self):
+        """Test that a call completing after it was counted as missed leaves the report partial."""
+        release = threading.Event()
+        finished = threading.Event()
+
+        class LateAdapter(StubAdapter):
+            def get_ratios(self, ticker):
+                release.wait(2)
+                finished.set()
+                return super().get_ratios(ticker)
+
+        def finish_late_call(*args):
+            # Runs right after the miss is recorded: let the call complete before the report is built
+            release.set()
+            finished.wait(2)
+            time.sleep(0.05)
+
+        service = DataService(LateAdapter(), max_workers=4, deadline=0.1)
+        with patch("builtins.print", side_effect=finish_late_call):
+            report = service.get_full_report_data("test")
+        self.assertTrue(report["partial"])
+        self.assertIsNone(report["timings"]["ratios"])
+        self.assertEqual(report["fundamentals"]["ratios"]["pe"], 0)
+
+    def test_bulk_fallback_loops_over_single_calls(self):
+        """Test that adapters without a bulk endpoint still answer the bulk methods."""
+        adapter = StubAdapter()
+        prices = adapter.get_prices_many(["A", "B"])
+        self.assertEqual(set(prices), {"A", "B"})
+        self.assertEqual(adapter.get_profiles_many(["A"])["A"]["name"], "Test Inc")
+
+class TestReportService(unittest.TestCase):
+
+    def setUp(self):
+        # The default ScoreService loads SECTOR_STATS_PATH; point it at an empty temp dir
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        env = patch.dict(os.environ, {"SECTOR_STATS_PATH": os.path.join(tmp.name, "sector_stats.npz")})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def test_report_includes_piotroski_score(self):
+        """Test that the pipeline scores the fetched statements."""
+        service = ReportService(DataService(StubAdapter(), max_workers=1))
+        report = service.get_report("test")
+        # One year of statements is not enough for the F-Score
+        self.assertEqual(report["scores"]["piotroskiF"], 0)
+
+    def test_deadline_miss_marks_report_partial(self):
+        """Test that a report missing a section is flagged partial and kept out of the cache."""
+        cache = ReportCache(ttl=60)
+        slow = ReportService(DataService(StubAdapter(slow={"ratios": 1.0}), max_workers=4, deadline=0.2), cache=cache)
+        self.assertTrue(slow.get_report("test")["partial"])
+        self.assertEqual(cache.stats()["local_size"], 0)
+        full = ReportService(DataService(StubAdapter(), max_workers=4), cache=cache)
+        self.assertFalse(full.get_report("test")["partial"])
+        self.assertEqual(cache.stats()["local_size"], 1)
+
+    def test_llm_failure_leaves_explanations_empty(self):
+        """Test that an unreachable LLM does not fail the report."""
+        class DownLLM:
+            def get_bio(self, data, priority=None):
+                raise requests.exceptions.ConnectionError("ollama down")
+
+        service = ReportService(DataService(StubAdapter(), max_workers=1), llm_service=DownLLM())
+        report = service.get_full_report("test")
+        self.assertEqual(report["explain"]["piotroski"], "")
+
+    def test_cash_cow_inputs(self):
+        """Test the derived inputs of the cash-cow prompt."""
+        report = ReportService(DataService(StubAdapter(), max_workers=1)).get_report("test")
+        inputs = ReportService.cash_cow_inputs(report)
+        self.assertEqual(inputs["fcf"], 100)
+        self.assertEqual(inputs["icov"], "n/a")
+        self.assertEqual(inputs["lev"], 0.0)
+
+    def test_iter_reports_streams_results_and_errors(self):
+        """Test that the batch iterator yields every ticker, including failures."""
+        class FlakyAdapter(StubAdapter):
+            def get_profile(self, ticker):
+                if ticker == "BOOM":
+                    raise RuntimeError("upstream failed")
+                return super().get_profile(ticker) if ticker != "NOPE" else {}
+
+        service = ReportService(DataService(FlakyAdapter(), max_workers=1), batch_workers=2)
+        tickers = [f"T{i}" for i in range(10)] + ["BOOM", "NOPE"]
+        results = {ticker: (report, error) for ticker, report, error in service.iter_reports(tickers)}
+        self.assertEqual(set(results), set(tickers))
+        self.assertIsInstance(results["BOOM"][1], RuntimeError)
+        self.assertEqual(results["NOPE"], (None, None))
+        self.assertEqual(results["T3"][0]["ticker"], "T3")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from app.services.data_service import DataService
+from app.services.fixture_adapter import FixtureAdapter, RecordingAdapter
+from tests.test_fmp_adapter import fake_fmp
+from tools.loadtest import run_load, summarize
+
+class TestFixtureAdapter(unittest.TestCase):
+
+    @patch('app.services.fmp_adapter.http_client.get')
+    def test_replays_recorded_responses(self, mock_get):
+        """Test that a full report is built from fixtures without any HTTP call."""
+        adapter = FixtureAdapter()
+        self.assertIn("ACME", adapter.tickers())
+        report = DataService(adapter, max_workers=4).get_full_report_data("acme")
+        self.assertEqual(report["company"]["name"], "Acme Corporation")
+        self.assertEqual(len(adapter.get_financials("ACME")["income_statement"]), 5)
+        self.assertEqual(set(adapter.get_prices_many(["ACME", "GLOBEX", "NOPE"])), {"ACME", "GLOBEX", "NOPE"})
+        self.assertEqual(adapter.get_profile("NOPE"), {})
+        mock_get.assert_not_called()
+
+    def test_latency_and_error_injection(self):
+        """Test that configured latency delays calls and error_rate=1 fails every call."""
+        slow = FixtureAdapter(latency=50)
+        start = time.perf_counter()
+        slow.get_ratios("ACME")
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05)
+
+        failing = FixtureAdapter(error_rate=1.0, seed=1)
+        self.assertEqual(failing.get_profile("ACME"), {})
+        self.assertIsNone(DataService(failing, max_workers=1).get_full_report_data("ACME"))
+
+    @patch('app.services.fmp_adapter.http_client.get', side_effect=fake_fmp)
+    def test_recorded_fixtures_replay(self, mock_get):
+        """Test that responses saved by the recorder are served back by the fixture adapter."""
+        with tempfile.TemporaryDirectory() as path:
+            recorder = RecordingAdapter(path, api_key="test")
+            recorder.get_profile("XYZ")
+            recorder.get_prices("XYZ")
+            self.assertEqual(os.listdir(path), ["XYZ.json"])
+
+            replay = FixtureAdapter(path=path)
+            self.assertEqual(replay.get_prices("XYZ"), {"path": "/quote/XYZ", "symbol": "XYZ"})
+
+class TestLoadHarness(unittest.TestCase):
+
+    def test_open_loop_schedule_and_summary(self):
+        """Test that the harness keeps the target rate and reports percentiles and errors."""
+        def send(ticker):
+            time.sleep(0.01)
+            return 500 if ticker == "BAD" else 200
+
+        summary = summarize(*run_load(send, ["A", "B", "C", "BAD"], rate=100, duration=0.4))
+        self.assertEqual(summary["requests"], 40)
+        self.assertEqual(summary["errors"], 10)
+        self.assertGreaterEqual(summary["p50_ms"], 10)
+        self.assertLessEqual(summary["p50_ms"], summary["p95_ms"])
+        self.assertLessEqual(summary["p95_ms"], summary["p99_ms"])
+        self.assertGreater(summary["throughput_rps"], 50)
+
+if __name__ == '__main__':
+    unittest.main()
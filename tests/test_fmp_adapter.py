@@ -0,0 +1,129 @@
+import unittest
+from unittest.mock import patch
+from app.services.fmp_adapter import FMPAdapter
+
+class FakeResponse:
+    def __init__(self, data=None, status_code=200, headers=None):
+        self._data = data
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._data
+
+def fake_fmp(url, params=None, headers=None, timeout=None):
+    """Answers every FMP path with a one-row list naming the endpoint."""
+    path = url.split("/api/v3", 1)[1]
+    return FakeResponse([{"path": path, "symbol": path.rsplit("/", 1)[-1]}], headers={"ETag": '"v1"'})
+
+class TestFMPAdapterCache(unittest.TestCase):
+
+    def setUp(self):
+        self.adapter = FMPAdapter(api_key="test")
+
+    @patch('app.services.fmp_adapter.http_client.get', side_effect=fake_fmp)
+    def test_repeat_report_only_refetches_quote(self, mock_get):
+        """Test that a second report inside the quote TTL makes no calls and after it only one."""
+        for call in (self.adapter.get_profile, self.adapter.get_financials, self.adapter.get_ratios, self.adapter.get_prices):
+            call("AAPL")
+        self.assertEqual(mock_get.call_count, 6)
+
+        self.adapter.get_financials("AAPL")
+        self.adapter.get_prices("AAPL")
+        self.assertEqual(mock_get.call_count, 6)
+
+        # Expire only the quote entry
+        key = ("/quote/AAPL", ())
+        self.adapter._cache.lookup(key).expires_at = 0
+        for call in (self.adapter.get_profile, self.adapter.get_financials, self.adapter.get_ratios, self.adapter.get_prices):
+            call("AAPL")
+        self.assertEqual(mock_get.call_count, 7)
+        self.assertEqual(mock_get.call_args.kwargs["headers"], {"If-None-Match": '"v1"'})
+
+    @patch('app.services.fmp_adapter.http_client.get')
+    def test_not_modified_reuses_cached_body(self, mock_get):
+        """Test that a 304 on revalidation serves and re-freshens the stored body."""
+        mock_get.side_effect = fake_fmp
+        self.adapter.get_prices("AAPL")
+        key = ("/quote/AAPL", ())
+        self.adapter._cache.lookup(key).expires_at = 0
+
+        mock_get.side_effect = lambda *args, **kwargs: FakeResponse(status_code=304)
+        self.assertEqual(self.adapter.get_prices("AAPL")["symbol"], "AAPL")
+        self.assertTrue(self.adapter._cache.lookup(key).fresh)
+
+    @patch('app.services.fmp_adapter.http_client.get')
+    def test_error_payloads_not_cached(self, mock_get):
+        """Test that FMP error bodies are returned but never cached."""
+        mock_get.return_value = FakeResponse({"Error Message": "Invalid API KEY."})
+        self.adapter.get_profile("AAPL")
+        self.adapter.get_profile("AAPL")
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch('app.services.fmp_adapter.http_client.get', side_effect=fake_fmp)
+    def test_api_key_not_part_of_cache_key(self, mock_get):
+        """Test that the API key is sent but kept out of the cache key."""
+        self.adapter.get_ratios("AAPL")
+        self.assertEqual(mock_get.call_args.kwargs["params"], {"apikey": "test"})
+        self.assertIsNotNone(self.adapter._cache.lookup(("/ratios-ttm/AAPL", ())))
+
+class TestFMPAdapterBulk(unittest.TestCase):
+
+    def setUp(self):
+        self.adapter = FMPAdapter(api_key="test")
+
+    @staticmethod
+    def fake_bulk(url, params=None, headers=None, timeout=None):
+        """Returns one row per requested symbol, except for UNKNOWN."""
+        endpoint, symbols = url.split("/api/v3/", 1)[1].split("/", 1)
+        return FakeResponse([
+            {"symbol": symbol, "price": 1.0, "companyName": f"{symbol} Inc"}
+            for symbol in symbols.split(",") if symbol != "UNKNOWN"
+        ])
+
+    @patch('app.services.fmp_adapter.http_client.get')
+    def test_prices_many_chunks_requests(self, mock_get):
+        """Test that a 250-name watchlist costs three quote requests and seeds per-ticker entries."""
+        mock_get.side_effect = self.fake_bulk
+        tickers = [f"T{i}" for i in range(249)] + ["UNKNOWN"]
+        prices = self.adapter.get_prices_many(tickers)
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(len(prices), 250)
+        self.assertEqual(prices["T7"]["symbol"], "T7")
+        self.assertEqual(prices["UNKNOWN"], {})
+
+        self.assertEqual(self.adapter.get_prices("T7")["price"], 1.0)
+        self.assertEqual(mock_get.call_count, 3)
+
+    @patch('app.services.fmp_adapter.http_client.get')
+    def test_profiles_many_maps_profiles(self, mock_get):
+        """Test that bulk profiles are mapped like get_profile and keyed by the requested ticker."""
+        mock_get.side_effect = self.fake_bulk
+        profiles = self.adapter.get_profiles_many(["aapl", "MSFT"])
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(profiles["aapl"]["name"], "AAPL Inc")
+        self.assertEqual(profiles["MSFT"]["name"], "MSFT Inc")
+
+    @patch('app.services.fmp_adapter.http_client.get')
+    def test_only_per_symbol_entries_are_cached(self, mock_get):
+        """Test that chunk responses are not cached and a lower-case lookup hits the bulk entry."""
+        mock_get.side_effect = self.fake_bulk
+        self.adapter.get_prices_many(["AAPL", "MSFT"])
+        self.assertEqual(len(self.adapter._cache), 2)
+
+        self.assertEqual(self.adapter.get_prices("aapl")["symbol"], "AAPL")
+        self.adapter.get_prices_many(["msft", "AAPL"])
+        self.assertEqual(mock_get.call_count, 1)
+
+        # Only the expired symbol is requested again
+        self.adapter._cache.lookup(("/quote/MSFT", ())).expires_at = 0
+        self.adapter.get_prices_many(["AAPL", "MSFT"])
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertTrue(mock_get.call_args.args[0].endswith("/quote/MSFT"))
+        self.assertEqual(len(self.adapter._cache), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from app.services.data_service import DataService
+from app.services.fundamentals_store import FundamentalsStore, StoreAdapter, main
+from app.services.score_service import ScoreService
+from app.services.sector_stats import SectorStats
+from tests import test_piotroski
+
+def statements(financials, first_year=2024):
+    """Adds the date/calendarYear keys FMP returns to a test financials dict."""
+    return {
+        statement: [dict(row, date=f"{first_year - i}-12-31", calendarYear=str(first_year - i)) for i, row in enumerate(rows)]
+        for statement, rows in financials.items()
+    }
+
+class TestFundamentalsStore(unittest.TestCase):
+
+    def setUp(self):
+        fixtures = test_piotroski.TestPiotroskiScore()
+        fixtures.setUp()
+        self.records = {
+            "GOOD": {"financials": statements(fixtures.mock_financials_good),
+                     "profile": {"name": "Good Co", "sector": "Tech"}, "ratios": {"peRatioTTM": 12}, "prices": {"marketCap": 5000}},
+            "BAD": {"financials": statements(fixtures.mock_financials_bad),
+                    "profile": {"name": "Bad Co"}, "ratios": {}, "prices": {}},
+            "NEW": {"financials": statements({k: v[:1] for k, v in fixtures.mock_financials_good.items()}),
+                    "profile": {"name": "New Co"}, "ratios": {}, "prices": {}},
+        }
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "fundamentals")
+        self.store = FundamentalsStore(self.path)
+        self.store.write(self.records)
+
+    def test_round_trip(self):
+        """Test that stored statements come back in the FMPAdapter shape, newest first."""
+        self.assertEqual(self.store.tickers(), ["BAD", "GOOD", "NEW"])
+        financials = self.store.financials("good")
+        self.assertEqual(financials["income_statement"][0]["netIncome"], 100)
+        self.assertEqual(financials["income_statement"][1]["calendarYear"], "2023")
+        self.assertNotIn("capitalExpenditure", financials["cash_flow_statement"][0])
+        self.assertEqual(self.store.financials("MISSING"), {"income_statement": [], "balance_sheet": [], "cash_flow_statement": []})
+
+    def test_offline_scores_match_json_path(self):
+        """Test that scoring from the arrays matches scoring the JSON financials."""
+        score_service = ScoreService(SectorStats())
+        tickers, latest, prior, valid = self.store.piotroski_inputs(["GOOD", "BAD", "NEW", "MISSING"])
+        scores, _, _ = score_service.calculate_piotroski_packed(latest, prior, valid)
+        expected = [score_service.calculate_piotroski_f_score(self.records.get(t, {}).get("financials", {}))[0] for t in tickers]
+        self.assertEqual(scores.tolist(), expected)
+        self.assertEqual(valid.tolist(), [True, True, False, False])
+
+    def test_store_adapter_feeds_data_service(self):
+        """Test that a report can be assembled from the store alone."""
+        report = DataService(StoreAdapter(self.store), max_workers=1).get_full_report_data("GOOD")
+        self.assertEqual(report["company"]["name"], "Good Co")
+        self.assertEqual(report["fundamentals"]["ttm"]["netIncome"], 100)
+        self.assertEqual(report["fundamentals"]["ratios"]["pe"], 12)
+        self.assertIsNone(DataService(StoreAdapter(self.store), max_workers=1).get_full_report_data("MISSING"))
+
+    def test_ingest_json_merges_into_store(self):
+        """Test that the ingest command adds tickers from a JSON dump and keeps existing ones."""
+        dump = os.path.join(self.tmp.name, "dump.json")
+        with open(dump, "w") as f:
+            json.dump({"msft": self.records["GOOD"]}, f)
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            main(["--path", self.path, "ingest", "--json", dump])
+            main(["--path", self.path, "score"])
+        self.assertEqual(FundamentalsStore(self.path).tickers(), ["BAD", "GOOD", "MSFT", "NEW"])
+        self.assertIn("MSFT\t9", out.getvalue())
+        self.assertIn("NEW\tn/a", out.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from unittest.mock import patch
+import requests
+from app.services import http_client
+
+def _response(status):
+    r = requests.Response()
+    r.status_code = status
+    return r
+
+@patch('app.services.http_client.wait_random_exponential', lambda **kwargs: (lambda retry_state: 0))
+class TestHttpClient(unittest.TestCase):
+
+    def tearDown(self):
+        http_client.close_sessions()
+
+    def test_session_shared_per_host(self):
+        """Test that calls to one host reuse a single pooled session."""
+        a = http_client.get_session("https://example.com/a")
+        b = http_client.get_session("https://example.com/b?x=1")
+        c = http_client.get_session("https://other.example.com/")
+        self.assertIs(a, b)
+        self.assertIsNot(a, c)
+
+    def test_retries_transient_status(self):
+        """Test that a 503 is retried and the eventual success is returned."""
+        with patch.object(requests.Session, 'request', side_effect=[_response(503), _response(200)]) as mock_request:
+            r = http_client.get("https://example.com/quote", retries=2)
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(mock_request.call_count, 2)
+
+    def test_returns_last_response_when_retries_exhausted(self):
+        """Test that the final retryable response is handed back to the caller."""
+        with patch.object(requests.Session, 'request', return_value=_response(429)) as mock_request:
+            r = http_client.get("https://example.com/quote", retries=2)
+        self.assertEqual(r.status_code, 429)
+        self.assertEqual(mock_request.call_count, 3)
+
+    def test_connection_error_retried_then_raised(self):
+        """Test that connection errors are retried and re-raised once attempts run out."""
+        error = requests.exceptions.ConnectionError("refused")
+        with patch.object(requests.Session, 'request', side_effect=error) as mock_request:
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                http_client.post("http://localhost:11434/api/generate", retries=1)
+        self.assertEqual(mock_request.call_count, 2)
+
+    def test_read_timeout_not_retried(self):
+        """Test that a read timeout fails fast instead of being retried."""
+        error = requests.exceptions.ReadTimeout("slow")
+        with patch.object(requests.Session, 'request', side_effect=error) as mock_request:
+            with self.assertRaises(requests.exceptions.ReadTimeout):
+                http_client.get("https://example.com/quote", retries=3)
+        self.assertEqual(mock_request.call_count, 1)
+
+    def test_client_error_not_retried(self):
+        """Test that non-transient errors are returned immediately."""
+        with patch.object(requests.Session, 'request', return_value=_response(404)) as mock_request:
+            r = http_client.get("https://example.com/missing", retries=3)
+        self.assertEqual(r.status_code, 404)
+        self.assertEqual(mock_request.call_count, 1)
+
+if __name__ == '__main__':
+    unittest.main()
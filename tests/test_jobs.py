@@ -0,0 +1,104 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from app.main import create_app
+from app.services.job_service import JobQueue, QueueFullError
+
+def wait_done(queue, job_id, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id).to_dict()
+        if job["status"] == "done":
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+class TestJobQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+        self.release = threading.Event()
+
+    def handler(self, ticker):
+        self.calls.append(ticker)
+        self.release.wait(2)
+        if ticker == "BOOM":
+            raise RuntimeError("upstream failed")
+        if ticker == "NOPE":
+            return None
+        return {"ticker": ticker}
+
+    def test_job_lifecycle(self):
+        """Test that a job reports progress and collects results and per-ticker errors."""
+        queue = JobQueue(self.handler, max_workers=2)
+        job = queue.submit(["aapl", "BOOM", "NOPE"])
+        self.assertIn(job.to_dict()["status"], ("queued", "running"))
+        self.release.set()
+        result = wait_done(queue, job.id)
+        self.assertEqual(result["results"], {"AAPL": {"ticker": "AAPL"}})
+        self.assertIn("upstream failed", result["errors"]["BOOM"])
+        self.assertIn("not found", result["errors"]["NOPE"])
+
+    def test_duplicate_tickers_share_work(self):
+        """Test that a ticker already queued is not computed a second time."""
+        queue = JobQueue(self.handler, max_workers=1)
+        first = queue.submit(["MSFT", "MSFT"])
+        second = queue.submit(["msft"])
+        self.release.set()
+        wait_done(queue, first.id)
+        wait_done(queue, second.id)
+        self.assertEqual(self.calls, ["MSFT"])
+
+    def test_cancelled_tickers_are_reported(self):
+        """Test that tickers dropped by shutdown show up as errors instead of breaking the job."""
+        queue = JobQueue(self.handler, max_workers=1)
+        job = queue.submit(["AAPL", "MSFT"])
+        while not self.calls:
+            time.sleep(0.01)
+        stopping = threading.Thread(target=queue.shutdown)
+        stopping.start()
+        while not job.tasks["MSFT"].cancelled():
+            time.sleep(0.01)
+        self.release.set()
+        stopping.join(2)
+        result = job.to_dict()
+        self.assertEqual(result["status"], "done")
+        self.assertEqual(result["results"], {"AAPL": {"ticker": "AAPL"}})
+        self.assertEqual(result["errors"], {"MSFT": "Cancelled before it ran."})
+
+    def test_queue_bound(self):
+        """Test that submissions beyond max_pending are refused."""
+        queue = JobQueue(self.handler, max_workers=1, max_pending=2)
+        queue.submit(["A", "B"])
+        with self.assertRaises(QueueFullError):
+            queue.submit(["C"])
+        queue.submit(["A"]) # already pending, so it fits
+        self.release.set()
+
+class TestJobRoutes(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app()
+        self.client = self.app.test_client()
+
+    def test_submit_and_poll(self):
+        """Test that POST /api/jobs returns a job id that can be polled to completion."""
+        queue = JobQueue(lambda ticker: {"ticker": ticker}, max_workers=1)
+        with patch.dict(self.app.extensions["services"].__dict__, job_queue=queue):
+            response = self.client.post('/api/jobs', json={"tickers": ["AAPL", "MSFT"]})
+            self.assertEqual(response.status_code, 202)
+            job_id = response.get_json()["id"]
+            wait_done(queue, job_id)
+            body = self.client.get(f'/api/jobs/{job_id}').get_json()
+        self.assertEqual(body["status"], "done")
+        self.assertEqual(set(body["results"]), {"AAPL", "MSFT"})
+
+    def test_invalid_requests(self):
+        """Test that malformed tickers and unknown jobs are rejected."""
+        self.assertEqual(self.client.post('/api/jobs', json={}).status_code, 400)
+        self.assertEqual(self.client.post('/api/jobs', json={"tickers": ["<script>"]}).status_code, 400)
+        self.assertEqual(self.client.get('/api/jobs/missing').status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,218 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+import requests
+from app.services.llm_cache import CompletionCache, SqliteCompletionStore
+from app.services.llm_scheduler import BATCH, INTERACTIVE, LLMScheduler, SchedulerBusyError
+from app.services.llm_service import LLMService
+
+class FakeStreamResponse:
+    def __init__(self, chunks, status_code=200):
+        self.lines = [json.dumps(c).encode() for c in chunks]
+        self.status_code = status_code
+        self.closed = False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code}")
+
+    def iter_lines(self):
+        for line in self.lines:
+            yield line
+            yield b""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.closed = True
+
+class TestLLMService(unittest.TestCase):
+
+    def setUp(self):
+        self.llm = LLMService(model="llama3", host="http://ollama:11434")
+
+    @patch('app.services.llm_service.http_client.post')
+    def test_generate_stream_yields_fragments(self, mock_post):
+        """Test that the streaming path yields Ollama's chunks in order and stops at done."""
+        response = FakeStreamResponse([
+            {"response": "Apple ", "done": False},
+            {"response": "designs phones.", "done": False},
+            {"response": "", "done": True},
+            {"response": "ignored", "done": False},
+        ])
+        mock_post.return_value = response
+        fragments = list(self.llm.generate_stream("prompt", seed=1))
+        self.assertEqual(fragments, ["Apple ", "designs phones."])
+        self.assertTrue(response.closed)
+        payload = mock_post.call_args.kwargs["json"]
+        self.assertTrue(payload["stream"])
+        self.assertEqual(payload["options"], {"temperature": 0.2, "max_tokens": 256, "seed": 1})
+        self.assertTrue(mock_post.call_args.kwargs["stream"])
+
+    @patch('app.services.llm_service.http_client.post')
+    def test_generate_stream_surfaces_errors(self, mock_post):
+        """Test that an error chunk from Ollama is raised to the caller."""
+        mock_post.return_value = FakeStreamResponse([{"error": "model not found"}])
+        with self.assertRaises(requests.exceptions.RequestException):
+            list(self.llm.generate_stream("prompt"))
+
+    @patch('app.services.llm_service.http_client.post')
+    def test_stream_bio_uses_bio_prompt(self, mock_post):
+        """Test that the streaming bio renders the same prompt as get_bio."""
+        mock_post.return_value = FakeStreamResponse([{"response": "Bio", "done": True}])
+        data = {"ticker": "AAPL", "name": "Apple", "exchange": "NASDAQ", "industry": "Hardware", "sector": "Tech"}
+        self.assertEqual("".join(self.llm.stream_bio(data)), "Bio")
+        self.assertEqual(mock_post.call_args.kwargs["json"]["prompt"], LLMService.BIO_PROMPT.format(**data))
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"response": self.text}
+
+class TestCompletionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.llm = LLMService(model="llama3", host="http://ollama:11434", cache=CompletionCache(maxsize=8))
+
+    @patch('app.services.llm_service.http_client.post', return_value=FakeResponse(" Bio text. "))
+    def test_identical_prompt_hits_cache(self, mock_post):
+        """Test that the same model, prompt (modulo whitespace) and options call Ollama once."""
+        self.assertEqual(self.llm.generate("Write a  bio\nfor AAPL"), "Bio text.")
+        self.assertEqual(self.llm.generate("Write a bio for AAPL "), "Bio text.")
+        self.assertEqual(mock_post.call_count, 1)
+
+        self.llm.generate("Write a bio for AAPL", temperature=0.7)
+        LLMService(model="mistral", cache=self.llm.cache).generate("Write a bio for AAPL")
+        self.assertEqual(mock_post.call_count, 3)
+
+    @patch('app.services.llm_service.http_client.post')
+    def test_stream_and_generate_share_entries(self, mock_post):
+        """Test that a completed stream is cached for both paths."""
+        mock_post.return_value = FakeStreamResponse([{"response": "Cash "}, {"response": "cow.", "done": True}])
+        self.assertEqual("".join(self.llm.generate_stream("summary")), "Cash cow.")
+        self.assertEqual(self.llm.generate("summary"), "Cash cow.")
+        self.assertEqual(list(self.llm.generate_stream("summary")), ["Cash cow."])
+        self.assertEqual(mock_post.call_count, 1)
+
+    def test_disk_backend_persists_and_is_bounded(self):
+        """Test that the SQLite backend survives a new cache instance and evicts old rows."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "llm.sqlite3")
+            cache = CompletionCache(backend=SqliteCompletionStore(path, maxsize=2))
+            for i in range(3):
+                cache.set(f"k{i}", f"v{i}")
+
+            reopened = CompletionCache(backend=SqliteCompletionStore(path, maxsize=2))
+            self.assertIsNone(reopened.get("k0"))
+            self.assertEqual(reopened.get("k2"), "v2")
+            self.assertEqual(reopened.stats()["hits"], 1)
+
+    def test_disk_backend_reads_do_not_write(self):
+        """Test that cache hits only record recency in memory, and it still decides eviction."""
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SqliteCompletionStore(os.path.join(tmp, "llm.sqlite3"), maxsize=2)
+            store.set("k0", "v0")
+            store.set("k1", "v1")
+            changes = store._conn.total_changes
+            self.assertEqual(store.get("k0"), "v0")
+            self.assertEqual(store._conn.total_changes, changes)
+
+            store.set("k2", "v2") # writes k0's read, then trims the least recently used row
+            self.assertEqual(store.get("k0"), "v0")
+            self.assertIsNone(store.get("k1"))
+
+class TestLLMScheduler(unittest.TestCase):
+
+    def test_concurrency_limit(self):
+        """Test that no more than max_concurrency calls run at once."""
+        scheduler = LLMScheduler(max_concurrency=2, max_queue=16)
+        running, peak, lock = [0], [0], threading.Lock()
+
+        def work():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            return "ok"
+
+        threads = [threading.Thread(target=scheduler.run, args=(f"k{i}", work)) for i in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(peak[0], 2)
+        self.assertEqual(scheduler.stats()["served"], 6)
+
+    def test_interactive_before_batch(self):
+        """Test that queued interactive calls are admitted ahead of earlier batch calls."""
+        scheduler = LLMScheduler(max_concurrency=1, max_queue=16)
+        order, gate = [], threading.Event()
+
+        def hold():
+            gate.wait(2)
+
+        blocker = threading.Thread(target=scheduler.run, args=("block", hold))
+        blocker.start()
+        time.sleep(0.05)
+        threads = []
+        for name, priority in (("batch-1", BATCH), ("batch-2", BATCH), ("interactive", INTERACTIVE)):
+            t = threading.Thread(target=scheduler.run, args=(name, lambda n=name: order.append(n), priority))
+            t.start()
+            threads.append(t)
+            time.sleep(0.05)
+        self.assertEqual(scheduler.stats()["queue_depth"], 3)
+        gate.set()
+        for t in [blocker] + threads:
+            t.join()
+        self.assertEqual(order, ["interactive", "batch-1", "batch-2"])
+
+    def test_identical_calls_coalesce(self):
+        """Test that concurrent calls with one key share a single execution."""
+        scheduler = LLMScheduler(max_concurrency=1, max_queue=16)
+        calls, results = [], []
+
+        def work():
+            calls.append(1)
+            time.sleep(0.1)
+            return "bio"
+
+        threads = [threading.Thread(target=lambda: results.append(scheduler.run("same", work))) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["bio"] * 5)
+        self.assertEqual(scheduler.stats()["coalesced"], 4)
+
+    def test_rejects_when_queue_full(self):
+        """Test that work beyond the queue limit is refused."""
+        scheduler = LLMScheduler(max_concurrency=1, max_queue=1)
+        gate = threading.Event()
+        threads = [threading.Thread(target=scheduler.run, args=(f"k{i}", lambda: gate.wait(2))) for i in range(2)]
+        for t in threads:
+            t.start()
+            time.sleep(0.05)
+        with self.assertRaises(SchedulerBusyError):
+            scheduler.run("overflow", lambda: "x")
+        gate.set()
+        for t in threads:
+            t.join()
+        stats = scheduler.stats()
+        self.assertEqual(stats["rejected"], 1)
+        self.assertGreater(stats["wait_seconds_max"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from app.main import create_app
+from app.services import metrics
+from app.services.data_service import DataService
+from tests.test_data_service import StubAdapter
+
+class TestMetrics(unittest.TestCase):
+
+    def test_span_records_histogram_and_errors(self):
+        """Test that spans feed the stage histogram and count stages that raise."""
+        registry = metrics.MetricsRegistry(prefix="test")
+        before = metrics.STAGE_SECONDS.count(stage="test.stage")
+        with metrics.span("test.stage"):
+            pass
+        with self.assertRaises(ValueError), metrics.span("test.stage"):
+            raise ValueError("boom")
+        self.assertEqual(metrics.STAGE_SECONDS.count(stage="test.stage"), before + 2)
+        self.assertGreaterEqual(metrics.STAGE_ERRORS.value(stage="test.stage"), 1)
+
+        histogram = registry.histogram("latency_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+        histogram.observe(0.5, stage='a"b')
+        registry.add_collector("cache", lambda: {"hits": 3, "redis_enabled": False, "name": "skipped"})
+        text = registry.render()
+        self.assertIn('test_latency_seconds_bucket{stage="a\\"b",le="0.1"} 0', text)
+        self.assertIn('test_latency_seconds_bucket{stage="a\\"b",le="+Inf"} 1', text)
+        self.assertIn("test_cache_hits 3", text)
+        self.assertIn("test_cache_redis_enabled 0", text)
+        self.assertNotIn("test_cache_name", text)
+
+    def test_request_timings_follow_pool_threads(self):
+        """Test that spans run on executor threads are attributed to the submitting request."""
+        metrics.begin_request()
+        DataService(StubAdapter(), max_workers=4).get_full_report_data("test")
+        def outside():
+            with metrics.span("outside"):
+                pass
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(outside).result() # plain submit: not part of the request
+        stages = [stage for stage, _ in metrics.end_request()]
+        self.assertCountEqual(stages, ["adapter.profile", "adapter.financials", "adapter.ratios", "adapter.prices"])
+
+        header = metrics.server_timing([("a", 0.001), ("b", 0.002), ("a", 0.003)], total=0.01)
+        self.assertEqual(header, "a;dur=4.0, b;dur=2.0, total;dur=10.0")
+
+class TestMetricsRoutes(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app()
+        self.client = self.app.test_client()
+
+    def test_health(self):
+        response = self.client.get('/health')
+        self.assertEqual(response.get_json(), {"status": "ok"})
+
+    @patch('app.routes._generate_report_data')
+    def test_metrics_and_server_timing(self, mock_generate):
+        """Test that requests are exported on /metrics and broken down in Server-Timing when enabled."""
+        mock_generate.return_value = {"ticker": "TEST"}
+        response = self.client.get('/api/report/TEST')
+        self.assertNotIn("Server-Timing", response.headers)
+
+        with patch.dict(os.environ, {"SERVER_TIMING": "true"}):
+            response = self.client.get('/api/report/TEST')
+        self.assertRegex(response.headers["Server-Timing"], r"^render\.json;dur=[\d.]+, total;dur=[\d.]+$")
+
+        text = self.client.get('/metrics').get_data(as_text=True)
+        self.assertNotIn("piotroski_jobs_pending", text) # the scrape builds no service
+        services = self.app.extensions["services"]
+        services.report_cache, services.llm_service, services.job_queue
+        text = self.client.get('/metrics').get_data(as_text=True)
+        self.assertIn('piotroski_http_request_duration_seconds_count{endpoint="/api/report/<ticker>",method="GET",status="200"}', text)
+        self.assertIn('piotroski_stage_duration_seconds_count{stage="render.json"}', text)
+        self.assertIn("piotroski_report_cache_local_hits", text)
+        self.assertIn("piotroski_llm_scheduler_queue_depth", text)
+        self.assertIn("piotroski_jobs_pending", text)
+
+if __name__ == '__main__':
+    unittest.main()
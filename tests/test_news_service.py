@@ -0,0 +1,155 @@
+import io
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+import requests
+import urllib3
+from app.services.news_service import NewsService, NewsStore, SourceBreaker
+
+def rss(*items):
+    body = "".join(
+        f"<item><title>{title}</title><link>{link}</link><pubDate>{date}</pubDate></item>"
+        for title, link, date in items
+    )
+    return f'<?xml version="1.0"?><rss><channel><title>Feed</title>{body}</channel></rss>'.encode()
+
+class FakeFeedResponse:
+    def __init__(self, content=b"", status_code=200, headers=None):
+        self.raw = io.BytesIO(content)
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+FEED = rss(
+    ("Apple unveils new iPhone lineup", "http://ap/3", "Tue, 03 Sep 2024 10:00:00 GMT"),
+    ("Markets rally as $MSFT beats estimates", "http://ap/2", "Mon, 02 Sep 2024 10:00:00 GMT"),
+    ("Bank of America raises dividend", "http://ap/1", "Sun, 01 Sep 2024 10:00:00 GMT"),
+)
+
+class TestNewsService(unittest.TestCase):
+
+    def setUp(self):
+        self.news = NewsService(sources=["ap"], poll_interval=0)
+
+    @patch('app.services.news_service.http_client.get')
+    def test_get_news_is_an_index_lookup(self, mock_get):
+        """Test that ingested items are found by ticker or company name without network calls."""
+        mock_get.return_value = FakeFeedResponse(FEED, headers={"ETag": '"abc"'})
+        self.assertEqual(self.news.refresh(), 3)
+        mock_get.reset_mock()
+
+        msft = self.news.get_news("MSFT", company_name="Microsoft Corporation")
+        self.assertEqual([n["url"] for n in msft], ["http://ap/2"])
+        self.assertEqual(msft[0]["source"], "AP")
+        self.assertEqual(self.news.get_news("AAPL", company_name="Apple Inc.")[0]["url"], "http://ap/3")
+        self.assertEqual(len(self.news.get_news("BAC", company_name="Bank of America Corporation")), 1)
+        self.assertEqual(self.news.get_news("ZZZ", company_name="Nothing Ltd"), [])
+        mock_get.assert_not_called()
+
+    @patch('app.services.news_service.http_client.get')
+    def test_conditional_get_and_incremental_parse(self, mock_get):
+        """Test that polls revalidate with the stored ETag and only ingest new items."""
+        mock_get.return_value = FakeFeedResponse(FEED, headers={"ETag": '"abc"'})
+        self.news.refresh()
+
+        mock_get.return_value = FakeFeedResponse(status_code=304)
+        self.assertEqual(self.news.refresh(), 0)
+        self.assertEqual(mock_get.call_args.kwargs["headers"], {"If-None-Match": '"abc"'})
+
+        newer = rss(("Apple supplier expands", "http://ap/4", "Wed, 04 Sep 2024 10:00:00 GMT"),
+                    ("Apple unveils new iPhone lineup", "http://ap/3", "Tue, 03 Sep 2024 10:00:00 GMT"),
+                    ("<broken", "", "")) # never parsed: ingestion stops at the first known item
+        mock_get.return_value = FakeFeedResponse(newer)
+        self.assertEqual(self.news.refresh(), 1)
+        self.assertEqual([n["url"] for n in self.news.get_news("AAPL", company_name="Apple Inc.")],
+                         ["http://ap/4", "http://ap/3"])
+
+    def test_symbols_need_a_ticker_form(self):
+        """Test that only $TICKER / (TICKER) count as symbols and possessive names still match."""
+        store = NewsStore()
+        for i, title in enumerate(("AI and IT budgets: US CEO says NOW is the time for ALL",
+                                   "Apple's (NASDAQ: AAPL) supplier expands",
+                                   "$TSLA's delivery miss")):
+            store.add({"title": title, "source": "AP", "publishedAt": "", "url": f"http://ap/{i}"})
+        for ticker in ("A", "AI", "IT", "US", "CEO", "NOW", "ALL"):
+            self.assertEqual(store.search(ticker), [], ticker)
+        self.assertEqual([n["url"] for n in store.search("AAPL")], ["http://ap/1"])
+        self.assertEqual([n["url"] for n in store.search(company_name="Apple Inc.")], ["http://ap/1"])
+        self.assertEqual([n["url"] for n in store.search("tsla")], ["http://ap/2"])
+
+    def test_store_is_bounded(self):
+        """Test that the oldest items are evicted from the store and its index."""
+        store = NewsStore(maxsize=2)
+        for i in range(3):
+            store.add({"title": f"$IBM update {i}", "source": "AP", "publishedAt": "", "url": f"http://ap/{i}"})
+        self.assertEqual(len(store), 2)
+        self.assertNotIn("http://ap/0", store)
+        self.assertEqual(len(store.search("IBM")), 2)
+
+class TestNewsSources(unittest.TestCase):
+
+    @patch('app.services.news_service.http_client.get')
+    def test_slow_source_does_not_hold_refresh(self, mock_get):
+        """Test that refresh returns at the deadline and a late source is ingested when it arrives."""
+        release = threading.Event()
+
+        def get(url, **kwargs):
+            if "reuters" in url:
+                release.wait(2)
+                return FakeFeedResponse(rss(("International Business Machines (IBM) wins contract", "http://reuters/1", "")))
+            return FakeFeedResponse(FEED)
+
+        mock_get.side_effect = get
+        news = NewsService(sources=["reuters", "ap"], poll_interval=0, deadline=0.2)
+        start = time.monotonic()
+        self.assertEqual(news.refresh(), 3)
+        self.assertLess(time.monotonic() - start, 1)
+
+        release.set()
+        news._inflight["reuters"].result(timeout=2)
+        self.assertEqual(news.get_news("IBM")[0]["source"], "Reuters")
+
+    @patch('app.services.news_service.http_client.get')
+    def test_failing_source_is_skipped_during_cooldown(self, mock_get):
+        """Test that a source is not fetched again once its breaker opens."""
+        mock_get.side_effect = requests.exceptions.ConnectionError("dead feed")
+        news = NewsService(sources=["reuters"], poll_interval=0, breaker=SourceBreaker(threshold=2, cooldown=60))
+        news.refresh()
+        news.refresh()
+        self.assertTrue(news.breaker.is_open("reuters"))
+
+        self.assertEqual(news.get_news("IBM"), [])
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch('app.services.news_service.http_client.get')
+    def test_broken_stream_counts_as_a_failed_fetch(self, mock_get):
+        """Test that urllib3 errors raised while reading the body are handled like request errors."""
+        response = FakeFeedResponse()
+        response.raw = Mock(read=Mock(side_effect=urllib3.exceptions.ProtocolError("reset")))
+        mock_get.return_value = response
+        news = NewsService(sources=["ap"], poll_interval=0, breaker=SourceBreaker(threshold=1, cooldown=60))
+        self.assertEqual(news.fetch_source("ap"), 0)
+        self.assertTrue(news.breaker.is_open("ap"))
+
+    def test_breaker_half_open_after_cooldown(self):
+        """Test that one trial is allowed after the cooldown and a success closes the breaker."""
+        breaker = SourceBreaker(threshold=1, cooldown=0.05)
+        breaker.record("ap", False)
+        self.assertFalse(breaker.allow("ap"))
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow("ap"))
+        breaker.record("ap", True)
+        self.assertTrue(breaker.allow("ap"))
+        self.assertFalse(breaker.is_open("ap"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+import io
+import threading
+import time
+import unittest
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+from app.main import create_app
+from app.services import pdf_service as pdf_module
+from app.services.pdf_service import PdfService, PdfUnavailableError
+from app.services.data_service import DataService
+from app.services.fixture_adapter import FixtureAdapter
+
+REPORT = DataService(FixtureAdapter(), max_workers=1).get_full_report_data("ACME")
+
+def fake_render(html: str, base_url: str) -> bytes:
+    return b"%PDF-1.7 " + html.encode()
+
+@patch.object(PdfService, "available", return_value=True)
+@patch('app.services.pdf_service._render', side_effect=fake_render)
+class TestPdfService(unittest.TestCase):
+
+    def setUp(self):
+        self.service = PdfService(executor=ThreadPoolExecutor(max_workers=2))
+
+    def test_renders_once_per_ticker_and_as_of(self, mock_render, _):
+        """Test that a rendered PDF is served from the cache and the HTML is only built on a miss."""
+        html_calls = []
+        def html():
+            html_calls.append(1)
+            return "<p>ACME</p>"
+        first = self.service.render("acme", "2024-01-01", html)
+        second = self.service.render("ACME", "2024-01-01", html)
+        self.assertEqual(first, b"%PDF-1.7 <p>ACME</p>")
+        self.assertEqual(second, first)
+        self.assertEqual((len(html_calls), mock_render.call_count), (1, 1))
+
+        self.service.render("ACME", "2024-01-02", html)
+        self.assertEqual(mock_render.call_count, 2)
+        self.assertEqual(self.service.stats()["hits"], 1)
+        self.assertIn(self.service.template_hash, self.service.key("ACME", "2024-01-01"))
+
+    def test_concurrent_requests_share_a_render(self, mock_render, _):
+        """Test that requests arriving while a PDF renders wait for that render."""
+        release = threading.Event()
+        def slow_render(html, base_url):
+            release.wait(5)
+            return b"%PDF"
+        mock_render.side_effect = slow_render
+        futures = [self.service.submit("ACME", "2024-01-01", lambda: "<p></p>") for _ in range(3)]
+        release.set()
+        self.assertEqual([f.result(5) for f in futures], [b"%PDF"] * 3)
+        self.assertEqual(mock_render.call_count, 1)
+        self.assertEqual(self.service.stats()["coalesced"], 2)
+
+    def test_failed_renders_are_not_cached(self, mock_render, _):
+        mock_render.side_effect = RuntimeError("layout failed")
+        with self.assertRaises(RuntimeError):
+            self.service.render("ACME", "2024-01-01", lambda: "")
+        mock_render.side_effect = fake_render
+        self.assertTrue(self.service.render("ACME", "2024-01-01", lambda: "").startswith(b"%PDF"))
+        self.assertEqual(self.service.stats()["errors"], 1)
+
+    def test_template_renders_outside_the_lock(self, mock_render, _):
+        """Test that a slow report_pdf.html render blocks neither other PDFs nor stats()."""
+        started, release = threading.Event(), threading.Event()
+        def slow_html():
+            started.set()
+            release.wait(5)
+            return "<p>slow</p>"
+        with ThreadPoolExecutor(max_workers=1) as caller:
+            slow = caller.submit(self.service.render, "ACME", "2024-01-01", slow_html)
+            started.wait(5)
+            self.assertEqual(self.service.stats()["inflight"], 1)
+            self.assertTrue(self.service.render("GLOBEX", "2024-01-01", lambda: "<p></p>").startswith(b"%PDF"))
+            waiter = self.service.submit("ACME", "2024-01-01", lambda: "unused")
+            release.set()
+            self.assertEqual(slow.result(5), waiter.result(5))
+        self.assertEqual(mock_render.call_count, 2)
+
+class TestPdfRoutes(unittest.TestCase):
+
+    def setUp(self):
+        app = create_app(pdf_service=PdfService(executor=ThreadPoolExecutor(max_workers=2)))
+        self.services = app.extensions["services"]
+        self.client = app.test_client()
+
+    @patch('app.routes._generate_report_data')
+    def test_pdf_download(self, mock_generate):
+        """Test that the PDF is served as an attachment, rendered from report_pdf.html without inline styles."""
+        mock_generate.return_value = REPORT
+        with patch.object(self.services.pdf_service, "render",
+                          side_effect=lambda ticker, as_of, html: fake_render(html(), "")):
+            response = self.client.get('/report/ACME.pdf')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/pdf")
+        self.assertIn('attachment; filename="ACME-', response.headers["Content-Disposition"])
+        self.assertTrue(response.data.startswith(b"%PDF-1.7"))
+        self.assertIn(b"Acme Corporation (ACME)", response.data)
+        self.assertNotIn(b"<style>", response.data)
+
+    @patch('app.routes._generate_report_data')
+    def test_pdf_errors(self, mock_generate):
+        mock_generate.return_value = None
+        self.assertEqual(self.client.get('/report/NOPE.pdf').status_code, 404)
+        mock_generate.return_value = REPORT
+        with patch.object(self.services.pdf_service, "render", side_effect=PdfUnavailableError("no weasyprint")):
+            self.assertEqual(self.client.get('/report/ACME.pdf').status_code, 503)
+
+    @patch.object(PdfService, "available", return_value=True)
+    @patch('app.services.pdf_service._render', side_effect=fake_render)
+    def test_batch_zip(self, mock_render, _):
+        """Test that the batch endpoint zips one PDF per ticker and lists failures."""
+        mock_service = MagicMock()
+        with patch.dict(self.services.__dict__, report_service=mock_service):
+            mock_service.iter_reports.return_value = iter([
+                ("ACME", dict(REPORT), None),
+                ("NOPE", None, None),
+            ])
+            response = self.client.post('/api/reports/pdf', json={"tickers": ["acme", "nope"]})
+        self.assertEqual(response.mimetype, "application/zip")
+        archive = zipfile.ZipFile(io.BytesIO(response.data))
+        names = archive.namelist()
+        self.assertEqual(names, [f"ACME-{REPORT['asOf']}.pdf", "errors.txt"])
+        self.assertTrue(archive.read(names[0]).startswith(b"%PDF"))
+        self.assertIn("NOPE", archive.read("errors.txt").decode())
+
+        too_many = self.client.post('/api/reports/pdf', json={"tickers": ["A"] * 51})
+        self.assertEqual(too_many.status_code, 400)
+
+    @patch.object(PdfService, "available", return_value=True)
+    def test_batch_zip_shares_one_deadline(self, _):
+        """Test that slow renders share one PDF_TIMEOUT and are listed in errors.txt, not waited on in turn."""
+        finished = Future()
+        finished.set_result(b"%PDF-1.7 done")
+        stuck = ["GLOBEX", "INITECH", "UMBRELLA", "HOOLI"]
+        mock_service = MagicMock()
+        mock_service.iter_reports.return_value = iter(
+            [("ACME", dict(REPORT), None)] + [(ticker, dict(REPORT), None) for ticker in stuck])
+        pdf_service = self.services.pdf_service
+        with patch.dict(self.services.__dict__, report_service=mock_service), \
+                patch.object(pdf_service, "timeout", 0.5), \
+                patch.object(pdf_service, "submit",
+                             side_effect=lambda ticker, as_of, html: finished if ticker == "ACME" else Future()):
+            started = time.perf_counter()
+            response = self.client.post('/api/reports/pdf', json={"tickers": ["ACME"] + stuck})
+            elapsed = time.perf_counter() - started
+        self.assertLess(elapsed, 1.5) # four timeouts in turn would take 2s
+        archive = zipfile.ZipFile(io.BytesIO(response.data))
+        self.assertEqual(archive.namelist(), [f"ACME-{REPORT['asOf']}.pdf", "errors.txt"])
+        errors = archive.read("errors.txt").decode()
+        for ticker in stuck:
+            self.assertIn(f"{ticker}: PDF rendering timed out", errors)
+
+@unittest.skipIf(pdf_module.load_weasyprint() is None, "WeasyPrint is not installed")
+class TestPdfRendering(unittest.TestCase):
+
+    def test_worker_pool_renders_a_report(self):
+        """Test a real render on the spawned worker pool."""
+        client = create_app().test_client()
+        with patch('app.routes._generate_report_data', return_value=REPORT):
+            response = client.get('/report/ACME.pdf')
+        self.assertTrue(response.data.startswith(b"%PDF"))
+
+if __name__ == '__main__':
+    unittest.main()
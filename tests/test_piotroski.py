@@ -1,10 +1,12 @@
+import random
 import unittest
-from app.services.score_service import ScoreService
+from app.services.score_service import ScoreService, PIOTROSKI_SIGNALS
+from app.services.sector_stats import SectorStats
 
 class TestPiotroskiScore(unittest.TestCase):
 
     def setUp(self):
-        self.score_service = ScoreService()
+        self.score_service = ScoreService(SectorStats()) # never the saved index
         self.mock_financials_good = {
             'income_statement': [
                 {'netIncome': 100, 'grossProfitRatio': 0.5, 'revenue': 1000}, # latest
@@ -70,5 +72,42 @@ class TestPiotroskiScore(unittest.TestCase):
         self.assertEqual(score, 0)
         self.assertIn('error', metrics)
 
+    def test_batch_matches_scalar(self):
+        """Test that the vectorized batch path agrees with the scalar score on every company."""
+        rng = random.Random(42)
+
+        def value():
+            # Mix in zeros and missing keys to exercise the zero-denominator fallbacks
+            return rng.choice([0, 0.0, rng.randint(-500, 500), rng.uniform(-1, 1), None])
+
+        def statement(fields):
+            row = {}
+            for field in fields:
+                v = value()
+                if v is not None:
+                    row[field] = v
+            return row
+
+        universe = [self.mock_financials_good, self.mock_financials_bad, {'income_statement': [{}]}]
+        for _ in range(500):
+            universe.append({
+                'income_statement': [statement(['netIncome', 'grossProfitRatio', 'revenue']) for _ in range(2)],
+                'balance_sheet': [statement(['totalAssets', 'longTermDebt', 'totalCurrentAssets',
+                                             'totalCurrentLiabilities', 'commonStock']) for _ in range(2)],
+                'cash_flow_statement': [statement(['operatingCashFlow']) for _ in range(rng.choice([1, 2, 2, 2]))],
+            })
+
+        scores, signals, valid = self.score_service.calculate_piotroski_batch(universe)
+        self.assertEqual(signals.shape, (len(universe), 9))
+        for i, financials in enumerate(universe):
+            score, metrics = self.score_service.calculate_piotroski_f_score(financials)
+            self.assertEqual(scores[i], score)
+            if 'error' in metrics:
+                self.assertFalse(valid[i])
+                self.assertEqual(signals[i].sum(), 0)
+            else:
+                self.assertTrue(valid[i])
+                self.assertEqual([int(x) for x in signals[i]], [metrics[name] for name in PIOTROSKI_SIGNALS])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
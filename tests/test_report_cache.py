@@ -0,0 +1,119 @@
+import threading
+import time
+import unittest
+from app.services.cache_service import ReportCache
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the redis client calls ReportCache makes."""
+
+    def __init__(self, fail=False):
+        self.data = {}
+        self.ttls = {}
+        self.fail = fail
+
+    def get(self, key):
+        if self.fail:
+            raise ConnectionError("redis down")
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        if self.fail:
+            raise ConnectionError("redis down")
+        self.data[key] = value
+        self.ttls[key] = ex
+
+class TestReportCache(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        self.cache = ReportCache(maxsize=2, ttl=60, redis_client=self.redis)
+        self.calls = 0
+
+    def _compute(self, ticker="AAPL", delay=0.0):
+        def compute():
+            self.calls += 1
+            time.sleep(delay)
+            return {"ticker": ticker, "scores": {"piotroskiF": 7}}
+        return compute
+
+    def test_miss_then_local_hit(self):
+        """Test that a miss computes and stores in both tiers, then hits locally."""
+        first = self.cache.get_or_compute("aapl", "2024-01-02", self._compute())
+        second = self.cache.get_or_compute("AAPL", "2024-01-02", self._compute())
+        self.assertEqual(first, second)
+        self.assertEqual(self.calls, 1)
+        self.assertIn("report:AAPL:2024-01-02", self.redis.data)
+        self.assertEqual(self.redis.ttls["report:AAPL:2024-01-02"], 60)
+        stats = self.cache.stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["local_hits"], 1)
+
+    def test_redis_hit_fills_local_tier(self):
+        """Test that another process's cached report is served from Redis without recomputing."""
+        other = ReportCache(maxsize=2, ttl=60, redis_client=self.redis)
+        other.get_or_compute("AAPL", "2024-01-02", self._compute())
+        report = self.cache.get_or_compute("AAPL", "2024-01-02", self._compute())
+        self.assertEqual(report["ticker"], "AAPL")
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.cache.stats()["redis_hits"], 1)
+        self.cache.get("AAPL", "2024-01-02")
+        self.assertEqual(self.cache.stats()["local_hits"], 1)
+
+    def test_cached_reports_are_copies(self):
+        """Test that mutating a returned report does not change the cache."""
+        report = self.cache.get_or_compute("AAPL", "2024-01-02", self._compute())
+        report["scores"]["piotroskiF"] = 0
+        self.assertEqual(self.cache.get("AAPL", "2024-01-02")["scores"]["piotroskiF"], 7)
+
+    def test_concurrent_misses_coalesce(self):
+        """Test that simultaneous misses for one ticker run compute exactly once."""
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                self.cache.get_or_compute("MSFT", "2024-01-02", self._compute("MSFT", delay=0.2))))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(r["ticker"] == "MSFT" for r in results))
+        self.assertEqual(self.cache.stats()["coalesced"], 7)
+
+    def test_none_not_cached(self):
+        """Test that unknown tickers are recomputed rather than cached."""
+        for _ in range(2):
+            self.assertIsNone(self.cache.get_or_compute("NOPE", "2024-01-02", lambda: None))
+        self.assertEqual(self.cache.stats()["misses"], 2)
+        self.assertEqual(self.redis.data, {})
+
+    def test_partial_reports_not_cached(self):
+        """Test that a report built past a fetch deadline is served but recomputed next time."""
+        partial = lambda: {"ticker": "AAPL", "partial": True}
+        for _ in range(2):
+            self.assertTrue(self.cache.get_or_compute("AAPL", "2024-01-02", partial)["partial"])
+        self.cache.set("AAPL", "2024-01-02", partial())
+        self.assertIsNone(self.cache.get("AAPL", "2024-01-02"))
+        self.assertEqual(self.redis.data, {})
+        self.assertEqual(self.cache.stats()["partial_skipped"], 3)
+
+    def test_eviction_counter(self):
+        """Test that the bounded local tier evicts and counts it."""
+        for ticker in ("A", "B", "C"):
+            self.cache.get_or_compute(ticker, "2024-01-02", self._compute(ticker))
+        stats = self.cache.stats()
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual(stats["local_size"], 2)
+
+    def test_redis_failure_degrades_to_local(self):
+        """Test that Redis errors do not fail the request."""
+        cache = ReportCache(maxsize=2, ttl=60, redis_client=FakeRedis(fail=True))
+        report = cache.get_or_compute("AAPL", "2024-01-02", self._compute())
+        self.assertEqual(report["ticker"], "AAPL")
+        self.assertEqual(cache.get("AAPL", "2024-01-02")["ticker"], "AAPL")
+        self.assertEqual(cache.stats()["redis_errors"], 2)
+
+if __name__ == '__main__':
+    unittest.main()
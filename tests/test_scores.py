@@ -1,14 +1,198 @@
+import os
+import tempfile
 import unittest
+import numpy as np
+from app.services.score_service import ScoreService
+from app.services.sector_stats import FACTOR_INDEX, FACTORS, SectorStats, factor_values
+
+def factors(**values) -> np.ndarray:
+    row = np.full(len(FACTORS), np.nan)
+    for name, value in values.items():
+        row[FACTOR_INDEX[name]] = value
+    return row
+
+def statements(revenue: list, years: int = 5) -> dict:
+    """Annual statements, newest first, with revenue (and everything derived from it) as given."""
+    return {
+        "income_statement": [
+            {"revenue": r, "netIncome": r * 0.1, "operatingIncome": r * 0.15, "grossProfitRatio": 0.4,
+             "interestExpense": 10, "weightedAverageShsOutDil": 100, "eps": r * 0.001}
+            for r in revenue[:years]
+        ],
+        "balance_sheet": [{"totalAssets": 2000, "longTermDebt": 400, "totalCurrentLiabilities": 200} for _ in revenue[:years]],
+        "cash_flow_statement": [{"operatingCashFlow": r * 0.12} for r in revenue[:years]],
+    }
+
+class TestSectorStats(unittest.TestCase):
+
+    def test_winsorized_min_max_within_sector(self):
+        """Test that values are clipped at the sector's 10th/90th percentiles and scaled to 0..1."""
+        stats = SectorStats(by_sector=True, min_size=5)
+        for i in range(11):
+            stats.update(f"T{i}", "Tech", factors(roe=float(i)))
+        low, high = stats.bounds("Tech")
+        self.assertEqual((low[FACTOR_INDEX["roe"]], high[FACTOR_INDEX["roe"]]), (1.0, 9.0))
+
+        scaled = stats.normalize_many(["Tech"] * 3, np.vstack([factors(roe=0.0), factors(roe=5.0), factors(roe=50.0)]))
+        np.testing.assert_allclose(scaled[:, FACTOR_INDEX["roe"]], [0.0, 0.5, 1.0])
+        self.assertTrue(np.isnan(scaled[:, FACTOR_INDEX["roa"]]).all())
+
+    def test_small_sectors_fall_back_to_universe(self):
+        """Test that a sector below min_size uses universe bounds, and pooling when sectors are off."""
+        stats = SectorStats(by_sector=True, min_size=5)
+        for i in range(10):
+            stats.update(f"T{i}", "Tech", factors(roe=float(i)))
+        stats.update("U1", "Utilities", factors(roe=100.0))
+        np.testing.assert_allclose(stats.bounds("Utilities")[1][FACTOR_INDEX["roe"]], stats.bounds(None)[1][FACTOR_INDEX["roe"]])
+
+        pooled = SectorStats(by_sector=False)
+        pooled.update("A", "Tech", factors(roe=1.0))
+        pooled.update("B", "Utilities", factors(roe=3.0))
+        self.assertEqual(pooled.normalize("Tech", factors(roe=3.0))[FACTOR_INDEX["roe"]], 1.0)
+
+    def test_tables_are_cached_and_updated_incrementally(self):
+        """Test that lookups reuse the cached table and only a changed sector is recomputed."""
+        stats = SectorStats(by_sector=True, min_size=1, refresh_interval=3600)
+        stats.update("A", "Tech", factors(roe=1.0))
+        stats.update("B", "Energy", factors(roe=2.0))
+        stats.bounds("Tech")
+        stats.bounds("Energy")
+        computed = stats.recomputes
+        for _ in range(5):
+            stats.bounds("Tech")
+        stats.update("A", "Tech", factors(roe=1.0)) # unchanged: no-op
+        stats.bounds("Tech")
+        self.assertEqual(stats.recomputes, computed)
+
+        stats.update("C", "Tech", factors(roe=3.0)) # new member: Tech and the universe refresh
+        stats.bounds("Tech")
+        stats.bounds("Energy")
+        self.assertEqual(stats.recomputes, computed + 2)
+        self.assertAlmostEqual(stats.bounds("Tech")[1][FACTOR_INDEX["roe"]], 2.8)
+
+    def test_save_and_load(self):
+        stats = SectorStats(by_sector=True, min_size=1)
+        stats.update("A", "Tech", factors(roe=1.0))
+        stats.update("B", "Tech", factors(roe=2.0))
+        with tempfile.TemporaryDirectory() as path:
+            stats.save(os.path.join(path, "stats.npz"))
+            loaded = SectorStats(by_sector=True, min_size=1)
+            loaded.load(os.path.join(path, "stats.npz"))
+        self.assertEqual(len(loaded), 2)
+        np.testing.assert_array_equal(loaded.bounds("Tech")[0], stats.bounds("Tech")[0])
 
 class TestInvestorScores(unittest.TestCase):
 
+    def setUp(self):
+        self.service = ScoreService(SectorStats(by_sector=True, min_size=2, refresh_interval=0))
+
+    def report(self, ticker: str, pe: float, revenue: list, sector: str = "Tech") -> dict:
+        return {
+            "ticker": ticker,
+            "company": {"sector": sector},
+            "fundamentals": {"ratios": {"pe": pe, "pb": pe / 5, "evEbit": pe / 2, "fcfYield": 10 / pe, "roa": 0.05, "roe": 0.1}},
+            "raw_financials": statements(revenue),
+        }
+
+    def index(self, *reports):
+        """Builds the sector index from reports, as the universe refresh does."""
+        matrix = np.vstack([factor_values(r["raw_financials"], r["fundamentals"]["ratios"]) for r in reports])
+        self.service.rescore_universe([r["ticker"] for r in reports], [r["company"]["sector"] for r in reports], matrix)
+
     def test_value_investor_score(self):
-        """Placeholder for value investor score tests."""
-        self.assertTrue(True)
+        """Test that the cheaper company in a sector gets the higher Value score."""
+        cheap = self.report("CHEAP", 8, [1000] * 5)
+        dear = self.report("DEAR", 40, [1000] * 5)
+        self.index(cheap, dear)
+        cheap_value = self.service.calculate_investor_scores(cheap)["value"]
+        dear_value = self.service.calculate_investor_scores(dear)["value"]
+        self.assertGreater(cheap_value["score"], dear_value["score"])
+        self.assertEqual(cheap_value["factors"]["earningsYield"], 1.0)
+        self.assertEqual(cheap_value["confidence"], "high")
+        self.assertIn("relative to Tech peers", cheap_value["summary"])
+
+        score, details = self.service.calculate_value_investor_score(cheap["raw_financials"], cheap["fundamentals"]["ratios"], sector="Tech")
+        self.assertEqual((score, details["score"]), (cheap_value["score"], cheap_value["score"]))
 
     def test_growth_investor_score(self):
-        """Placeholder for growth investor score tests."""
-        self.assertTrue(True)
+        """Test that faster growth scores higher and a 2-year history lowers confidence."""
+        fast = self.report("FAST", 20, [2000, 1600, 1300, 1000, 800])
+        slow = self.report("SLOW", 20, [1050, 1040, 1020, 1000, 990])
+        short = self.report("SHORT", 20, [1500, 1200, 1000])
+        self.index(fast, slow, short)
+        fast_growth = self.service.calculate_investor_scores(fast)["growth"]
+        slow_growth = self.service.calculate_investor_scores(slow)["growth"]
+        short_growth = self.service.calculate_investor_scores(short)["growth"]
+        self.assertGreater(fast_growth["score"], slow_growth["score"])
+        self.assertEqual((fast_growth["years"], short_growth["years"]), (3, 2))
+        self.assertNotEqual(short_growth["confidence"], "high")
+
+        self.assertIn("revenueCagr", fast_growth["factors"])
+
+        empty = self.service.calculate_growth_investor_score({}, {}, sector="Tech")
+        self.assertIsNone(empty[0])
+        self.assertEqual(empty[1]["confidence"], "low")
+        self.assertEqual(empty[1]["summary"], "Not scored: insufficient data.")
+
+    def test_serving_never_changes_the_index(self):
+        """Test that scores depend on the loaded index only, not on the reports served before."""
+        acme = self.report("ACME", 10, [1000] * 5)
+        first = self.service.calculate_investor_scores(acme)["value"]
+        self.assertEqual((first["score"], first["summary"]), (None, "Not scored: insufficient peers."))
+        self.assertEqual(len(self.service.sector_stats), 0)
+
+        peers = [self.report(f"P{i}", 5 + 5 * i, [1000] * 5, sector="Energy" if i else "Tech") for i in range(4)]
+        self.index(*peers)
+        before = self.service.calculate_investor_scores(acme)["value"]
+        for peer in peers:
+            self.service.calculate_investor_scores(peer)
+        self.assertEqual(self.service.calculate_investor_scores(acme)["value"], before)
+        # Tech has one member (below min_size), so ACME is ranked against the universe
+        self.assertIn("relative to the universe", before["summary"])
+        self.assertIn("relative to Energy peers", self.service.calculate_investor_scores(peers[1])["value"]["summary"])
+
+    def test_index_is_loaded_from_sector_stats_path(self):
+        """Test that a saved index is loaded at startup and picked up again when the file changes."""
+        reports = [self.report(f"T{i}", 5 + 5 * i, [1000] * 5) for i in range(3)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "stats.npz")
+            builder = ScoreService(stats_path=path)
+            builder.sector_stats = SectorStats(by_sector=True, min_size=2)
+            matrix = np.vstack([factor_values(r["raw_financials"], r["fundamentals"]["ratios"]) for r in reports[:2]])
+            builder.rescore_universe(["T0", "T1"], ["Tech", "Tech"], matrix)
+            builder.save_index()
+
+            serving = ScoreService(stats_path=path)
+            self.assertEqual(len(serving.sector_stats), 2)
+
+            builder.rescore_universe(["T2"], ["Tech"], matrix[:1])
+            builder.save_index()
+            os.utime(path, (0, 0)) # a different mtime, however fast the test runs
+            serving._stats_checked = -np.inf
+            serving.calculate_investor_scores(reports[0])
+            self.assertEqual(len(serving.sector_stats), 3)
+            self.assertEqual(os.listdir(directory), ["stats.npz"]) # no temporary files left behind
+
+            # A damaged file (e.g. copied in half-written) keeps the index already loaded
+            with open(path, "r+b") as f:
+                f.truncate(100)
+            os.utime(path, (1, 1))
+            serving._stats_checked = -np.inf
+            serving.calculate_investor_scores(reports[0])
+            self.assertEqual(len(serving.sector_stats), 3)
+
+    def test_rescore_universe_matches_single_scoring(self):
+        """Test that the vectorized universe pass gives the same scores as one-by-one scoring."""
+        reports = [self.report(f"T{i}", 5 + 3 * i, [1000 + 100 * i - 20 * y for y in range(5)], sector="AB"[i % 2]) for i in range(8)]
+        tickers = [r["ticker"] for r in reports]
+        sectors = [r["company"]["sector"] for r in reports]
+        matrix = np.vstack([factor_values(r["raw_financials"], r["fundamentals"]["ratios"]) for r in reports])
+        self.assertTrue(np.isnan(self.service.rescore_universe(tickers[:1], sectors[:1], matrix[:1])["value"]).all())
+        batch = self.service.rescore_universe(tickers, sectors, matrix, years=np.full(8, 3))
+        single = [self.service.calculate_investor_scores(r) for r in reports]
+        self.assertEqual(batch["value"].tolist(), [s["value"]["score"] for s in single])
+        self.assertEqual(batch["growth"].tolist(), [s["growth"]["score"] for s in single])
+        self.assertEqual(batch["value_confidence"].tolist(), [s["value"]["confidence"] for s in single])
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,124 @@
+import datetime
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from app.services.cache_service import ReportCache
+from app.services.data_service import DataService
+from app.services.fixture_adapter import FixtureAdapter
+from app.services.report_service import ReportService
+from app.services.score_service import ScoreService
+from app.services.sector_stats import SectorStats
+from app.services.universe_refresh import UniverseRefresher, statement_fingerprint, statements_status
+
+TICKERS = ["ACME", "GLOBEX", "INITECH"]
+
+class TestUniverseRefresh(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.state_path = os.path.join(self.tmp.name, "state.json")
+        self.adapter = FixtureAdapter()
+        self.cache = ReportCache(ttl=60)
+        self.report_service = ReportService(DataService(self.adapter, max_workers=1),
+                                            ScoreService(SectorStats(min_size=2, refresh_interval=0)), cache=self.cache)
+
+    def refresher(self) -> UniverseRefresher:
+        return UniverseRefresher(self.report_service, state_path=self.state_path, workers=2)
+
+    def set_quote(self, ticker: str, **fields):
+        self.adapter._fixtures[ticker]["quote"] = [dict(self.adapter._fixtures[ticker]["quote"][0], **fields)]
+        self.adapter._cache.clear()
+
+    def test_only_changed_statements_are_rescored(self):
+        """Test that unchanged companies are repriced from the quote and new filings trigger a rescore."""
+        first = self.refresher().refresh(TICKERS)
+        self.assertEqual((first["rescored"], first["repriced"]), (3, 0))
+        before = self.cache.get("ACME", datetime.date.today().isoformat())
+
+        quote = self.adapter._fixtures["ACME"]["quote"][0]
+        self.set_quote("ACME", price=quote["price"] * 2, marketCap=quote["marketCap"] * 2)
+        statements = self.adapter._fixtures["GLOBEX"]["income-statement"]
+        statements[0] = dict(statements[0], netIncome=statements[0]["netIncome"] + 1)
+
+        refresher = self.refresher() # state reloaded from disk
+        second = refresher.refresh() # defaults to the stored universe
+        self.assertEqual((second["rescored"], second["repriced"], second["failed"]), (1, 2, 0))
+
+        after = self.cache.get("ACME", datetime.date.today().isoformat())
+        ratios, previous = after["fundamentals"]["ratios"], before["fundamentals"]["ratios"]
+        self.assertAlmostEqual(ratios["pe"], previous["pe"] * 2)
+        self.assertAlmostEqual(ratios["fcfYield"], previous["fcfYield"] / 2)
+        self.assertEqual(after["scores"]["piotroskiF"], before["scores"]["piotroskiF"])
+        self.assertEqual(after["raw_financials"], self.adapter.get_financials("ACME"))
+        self.assertNotIn("raw_financials", refresher.state["ACME"]["report"])
+
+    def test_repriced_report_matches_full_rebuild(self):
+        """Test that repricing gives the same price-dependent fields as rebuilding from scratch."""
+        self.refresher().refresh(TICKERS)
+        quote = self.adapter._fixtures["INITECH"]["quote"][0]
+        self.set_quote("INITECH", price=quote["price"] * 1.5, marketCap=quote["marketCap"] * 1.5)
+        refresher = self.refresher()
+        refresher.refresh(["INITECH"])
+        repriced = refresher.state["INITECH"]["report"]["fundamentals"]
+
+        rebuilt = self.report_service.data_service.get_full_report_data("INITECH")["fundamentals"]
+        self.assertAlmostEqual(repriced["ratios"]["fcfYield"], rebuilt["ratios"]["fcfYield"])
+        self.assertEqual(repriced["ttm"], rebuilt["ttm"])
+
+    def test_missing_tickers_leave_the_state(self):
+        """Test that a ticker the provider no longer knows is dropped from the state file."""
+        refresher = self.refresher()
+        refresher.refresh(["ACME"])
+        del self.adapter._fixtures["ACME"]
+        self.adapter._cache.clear()
+        summary = refresher.refresh(["ACME"])
+        self.assertEqual(summary["missing"], 1)
+        self.assertNotIn("ACME", refresher.state)
+        self.assertNotEqual(statement_fingerprint({"income_statement": [{"revenue": 1}]}),
+                            statement_fingerprint({"income_statement": [{"revenue": 2}]}))
+
+    def test_fetch_errors_keep_the_previous_entry(self):
+        """Test that failed or incomplete fetches count as failed and never drop or overwrite a ticker."""
+        refresher = self.refresher()
+        refresher.refresh(TICKERS)
+        before = {ticker: dict(entry) for ticker, entry in refresher.state.items()}
+
+        self.adapter.error_rate = 1.0 # every upstream call fails; nothing stale to serve
+        self.adapter._cache.clear()
+        summary = self.refresher().refresh()
+        self.assertEqual((summary["failed"], summary["missing"]), (3, 0))
+
+        self.adapter.error_rate = 0.0
+        self.adapter._fixtures["ACME"]["cash-flow-statement"] = []
+        self.adapter._cache.clear()
+        refresher = self.refresher()
+        summary = refresher.refresh()
+        self.assertEqual((summary["failed"], summary["repriced"]), (1, 2))
+        self.assertEqual(refresher.state["ACME"]["fingerprint"], before["ACME"]["fingerprint"])
+        self.assertEqual(refresher.state["ACME"]["report"], before["ACME"]["report"])
+        self.assertEqual(statements_status({"income_statement": {}, "balance_sheet": [], "cash_flow_statement": []}),
+                         "error")
+
+    def test_rescore_fetches_statements_once_on_a_frozen_index(self):
+        """Test that a rescore reuses the fetched statements and the index is not reloaded mid-run."""
+        score_service = self.report_service.score_service
+        frozen = []
+        get_full = self.report_service.data_service.get_full_report_data
+        def recording(ticker, financials=None):
+            frozen.append(score_service._frozen)
+            return get_full(ticker, financials=financials)
+
+        with patch.object(self.adapter, "get_financials", wraps=self.adapter.get_financials) as fetch, \
+                patch.object(self.report_service.data_service, "get_full_report_data", side_effect=recording), \
+                patch.object(score_service, "rescore_universe", wraps=score_service.rescore_universe) as rescore:
+            summary = self.refresher().refresh(TICKERS)
+        self.assertEqual(summary["rescored"], 3)
+        self.assertEqual(fetch.call_count, 3)
+        self.assertEqual(rescore.call_count, 1)
+        self.assertEqual(frozen, [1, 1, 1])
+        self.assertEqual(score_service._frozen, 0)
+
+if __name__ == '__main__':
+    unittest.main()
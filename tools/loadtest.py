@@ -0,0 +1,133 @@
+"""
+Open-loop load test for GET /api/report/<ticker>.
+
+Requests are started on a fixed schedule (--rate per second for --duration seconds)
+whether or not earlier ones have finished, and each latency is measured from its
+scheduled start, so a stalled server shows up as queueing delay instead of being
+hidden by a slower send rate.
+
+Against a running server:
+    python tools/loadtest.py --url http://localhost:8000 --rate 50 --duration 30 --tickers AAPL MSFT
+
+Fully offline, against the app in-process with recorded FMP fixtures:
+    python tools/loadtest.py --in-process --rate 50 --duration 10
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+def run_load(send: Callable[[str], int], tickers: list[str], rate: float, duration: float,
+             concurrency: int = 64) -> tuple[list[tuple[float, int]], float]:
+    """
+    Calls send(ticker) rate times per second for duration seconds, cycling through tickers.
+    Returns ([(latency seconds, status), ...], elapsed seconds). A send that raises counts
+    as status 0.
+    """
+    results = []
+    lock = threading.Lock()
+
+    def one(ticker, scheduled):
+        try:
+            status = send(ticker)
+        except Exception:
+            status = 0
+        latency = time.perf_counter() - scheduled
+        with lock:
+            results.append((latency, status))
+
+    total = max(1, int(rate * duration))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for i in range(total):
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(one, tickers[i % len(tickers)], scheduled)
+    return results, time.perf_counter() - start
+
+def summarize(results: list[tuple[float, int]], elapsed: float) -> dict:
+    """Latency percentiles in milliseconds, throughput and error counts of a run."""
+    latencies = np.array([latency for latency, _ in results]) * 1000
+    ok = sum(1 for _, status in results if 200 <= status < 300)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (0.0, 0.0, 0.0)
+    return {
+        "requests": len(results),
+        "ok": ok,
+        "errors": len(results) - ok,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(results) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(float(p50), 1),
+        "p95_ms": round(float(p95), 1),
+        "p99_ms": round(float(p99), 1),
+        "max_ms": round(float(latencies.max()), 1) if len(latencies) else 0.0,
+    }
+
+def http_sender(base_url: str, timeout: float) -> Callable[[str], int]:
+    import requests
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=256))
+    session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=256))
+
+    def send(ticker):
+        return session.get(f"{base_url.rstrip('/')}/api/report/{ticker}", timeout=timeout).status_code
+    return send
+
+def in_process_sender() -> tuple[Callable[[str], int], list[str]]:
+    # Offline defaults; anything already set in the environment wins
+    os.environ.setdefault("DATA_PROVIDER", "fixture")
+    os.environ.setdefault("NEWS_DEADLINE", "0")
+    os.environ.setdefault("NEWS_POLL_INTERVAL", "0")
+    from app import create_app
+    app = create_app()
+    adapter = app.extensions["services"].adapter
+    tickers = adapter.tickers() if hasattr(adapter, "tickers") else []
+
+    def send(ticker):
+        return app.test_client().get(f"/api/report/{ticker}").status_code
+    return send, tickers
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Open-loop load test for /api/report/<ticker>.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="base URL of a running server")
+    target.add_argument("--in-process", action="store_true", help="drive the Flask app in this process (DATA_PROVIDER=fixture)")
+    parser.add_argument("--tickers", nargs="+", help="tickers to cycle through (default: every fixture ticker)")
+    parser.add_argument("--rate", type=float, default=20, help="requests started per second")
+    parser.add_argument("--duration", type=float, default=10, help="seconds to generate load")
+    parser.add_argument("--concurrency", type=int, default=64, help="maximum requests in flight")
+    parser.add_argument("--timeout", type=float, default=30, help="per-request timeout (HTTP mode)")
+    parser.add_argument("--warmup", type=int, default=0, help="untimed requests per ticker before the run")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    if args.in_process:
+        send, tickers = in_process_sender()
+    else:
+        send, tickers = http_sender(args.url, args.timeout), []
+    tickers = args.tickers or tickers
+    if not tickers:
+        parser.error("--tickers is required")
+
+    for ticker in tickers * args.warmup:
+        send(ticker)
+    summary = summarize(*run_load(send, tickers, args.rate, args.duration, args.concurrency))
+    summary["target_rps"] = args.rate
+    if args.json:
+        print(json.dumps(summary))
+    else:
+        for key, value in summary.items():
+            print(f"{key:>16}: {value}")
+    return 0 if summary["errors"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())